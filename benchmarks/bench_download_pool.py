@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+下载池基准 - 本地模拟教务系统提供照片（每张有 --latency 秒延迟），用抓取器的下载函数
+比较逐张下载与 PhotoDownloadPool 不同线程数的用时，并核对每张照片都已保存、
+不存在的照片（--missing）都通过 on_done 回报为失败（不需要Chrome）
+
+用法: python3 benchmarks/bench_download_pool.py --photos 100 --latency 0.05 --workers 1,4,8
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from typing import Dict, List
+
+from portal_fixture import SESSION_COOKIE, SESSION_VALUE, FakePortal, PortalSettings, student_name
+
+from download_pool import DownloadJob, PhotoDownloadPool
+from photo_store import manifest_photo_files
+from student_photo_scraper_enhanced import EnhancedStudentPhotoScraper
+
+
+def make_jobs(portal: FakePortal, missing: int) -> List[DownloadJob]:
+    """每个学生一个下载任务；最后 missing 个任务的照片地址不存在（服务器返回404）"""
+    cookies = {SESSION_COOKIE: SESSION_VALUE}
+    jobs = []
+    for index in range(portal.settings.students):
+        url = portal.base_url + portal.photo_url(index)
+        jobs.append(DownloadJob(student_name(index), url, portal.base_url + portal.detail_url(index), cookies))
+    for i in range(missing):
+        jobs.append(DownloadJob(f"缺失{i:04d}", f"{portal.base_url}/photos/missing{i}.jpg",
+                                portal.base_url + portal.page_url(1), cookies))
+    return jobs
+
+
+def saved_photos(out_dir: str) -> int:
+    """照片索引中列出且确实存在于磁盘上的照片数"""
+    return sum(1 for path in manifest_photo_files(out_dir) or [] if os.path.isfile(path))
+
+
+def run(portal: FakePortal, jobs: List[DownloadJob], out_dir: str, workers: int) -> Dict:
+    """workers 为0时在当前线程逐张下载，否则经过下载池"""
+    scraper = EnhancedStudentPhotoScraper(out_dir, rate_limit=False)
+    failed: List[str] = []
+    lock = threading.Lock()
+
+    def on_done(job: DownloadJob, success: bool):
+        if not success:
+            with lock:
+                failed.append(job.name)
+
+    started = time.perf_counter()
+    if workers == 0:
+        for job in jobs:
+            on_done(job, scraper.download_photo_job(job, scraper.session))
+    else:
+        with PhotoDownloadPool(scraper.download_photo_job, workers=workers, on_done=on_done) as pool:
+            for job in jobs:
+                pool.submit(job)
+    seconds = time.perf_counter() - started
+    scraper.photo_store.save()
+    return {'seconds': seconds, 'saved': saved_photos(out_dir), 'failed': sorted(failed)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="照片下载池基准（本地模拟教务系统）")
+    parser.add_argument("--photos", type=int, default=100, help="照片数")
+    parser.add_argument("--missing", type=int, default=3, help="另外加入的不存在的照片数（应全部回报失败）")
+    parser.add_argument("--latency", type=float, default=0.05, help="每张照片的响应延迟（秒）")
+    parser.add_argument("--workers", default="1,2,4,8", help="要比较的下载线程数，逗号分隔")
+    parser.add_argument("--log-level", default="WARNING", help="抓取程序的输出级别")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+    portal = FakePortal(PortalSettings(students=args.photos, photo_latency=args.latency,
+                                       photo_size=(240, 320))).start()
+    expected_failed = sorted(f"缺失{i:04d}" for i in range(args.missing))
+    problems = []
+    print(f"\n=== 下载池基准: {args.photos} 张照片 + {args.missing} 张不存在, 延迟 {args.latency:g} s ===")
+    try:
+        jobs = make_jobs(portal, args.missing)
+        for workers in [0] + [int(n) for n in args.workers.split(',')]:
+            with tempfile.TemporaryDirectory() as out_dir:
+                result = run(portal, jobs, out_dir, workers)
+            label = '逐张下载' if workers == 0 else f'{workers} 个线程'
+            print(f"{label:>8}: {result['seconds']:6.2f} s, {args.photos / result['seconds']:6.1f} 张/秒, "
+                  f"保存 {result['saved']}/{args.photos}, 失败 {len(result['failed'])}")
+            if result['saved'] != args.photos:
+                problems.append(f"{label}: 只保存了 {result['saved']} 张照片")
+            if result['failed'] != expected_failed:
+                problems.append(f"{label}: 回报失败的任务 {result['failed']} 与预期不符")
+    finally:
+        portal.stop()
+
+    for problem in problems:
+        print(f"✗ {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("✓ 所有照片都已保存，不存在的照片都已回报失败")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web抽认卡加载基准 - 在本地生成照片文件夹，用无头Chrome打开 flashcard.html 并选择全部照片，
+测量从选择文件到显示第一张卡片的时间，以及加载和连续翻页过程中的内存峰值
+
+用法: python3 benchmarks/bench_flashcard.py --photos 2000 --size 1200x1600
+      python3 benchmarks/bench_flashcard.py --html /path/to/old/flashcard.html   # 与旧版本比较
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import threading
+
+from fixtures import PROJECT_ROOT, serve_directory, make_jpeg, write_file
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+
+FIRST_CARD_JS = r"""
+var photo = document.getElementById('photo');
+var section = document.getElementById('cardSection');
+return section.style.display !== 'none' && photo.complete && photo.naturalWidth > 0;
+"""
+
+JS_HEAP_JS = "return performance.memory ? performance.memory.usedJSHeapSize : 0;"
+
+
+def process_tree_rss(root_pid: int) -> int:
+    """root_pid 及其所有子进程的常驻内存（字节，仅Linux；其他系统返回0）"""
+    if not os.path.isdir('/proc'):
+        return 0
+    children = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(pid))
+
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1]) * 1024
+                        break
+        except OSError:
+            continue
+    return total
+
+
+class MemorySampler:
+    """后台定时采样浏览器进程树的内存，记录峰值"""
+
+    def __init__(self, root_pid: int, interval: float = 0.1):
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, process_tree_rss(self.root_pid))
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def build_folder(root: str, count: int, width: int, height: int):
+    colors = [(102, 126, 234), (118, 75, 162), (240, 147, 251), (79, 172, 254)]
+    data = [make_jpeg(width, height, color, quality=95) for color in colors]
+    paths = []
+    for i in range(count):
+        paths.append(write_file(os.path.join(root, f"学生{i:05d}.jpg"), data[i % len(data)]))
+    return paths, sum(len(data[i % len(data)]) for i in range(count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Web抽认卡加载基准")
+    parser.add_argument("--photos", type=int, default=2000, help="照片数量")
+    parser.add_argument("--size", default="1200x1600", help="照片尺寸（宽x高）")
+    parser.add_argument("--flips", type=int, default=200, help="加载后连续翻页次数")
+    parser.add_argument("--html", default=os.path.join(PROJECT_ROOT, 'flashcard.html'), help="要测试的页面")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split('x'))
+
+    with tempfile.TemporaryDirectory() as root:
+        site = os.path.join(root, 'site')
+        write_file(os.path.join(site, 'flashcard.html'), open(args.html, encoding='utf-8').read())
+        paths, total_bytes = build_folder(os.path.join(root, 'photos'), args.photos, width, height)
+        server, base_url = serve_directory(site)
+
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        options.add_argument("--enable-precise-memory-info")
+        driver = webdriver.Chrome(options=options)
+        try:
+            driver.get(f"{base_url}/flashcard.html")
+            baseline = process_tree_rss(driver.service.process.pid)
+
+            # 文件夹选择框无法通过WebDriver操作，改为普通多文件选择
+            driver.execute_script("document.getElementById('fileInput').removeAttribute('webkitdirectory');"
+                                  "document.getElementById('fileInput').removeAttribute('directory');")
+            file_input = driver.find_element(By.ID, 'fileInput')
+
+            with MemorySampler(driver.service.process.pid) as load_sampler:
+                start = time.perf_counter()
+                file_input.send_keys("\n".join(paths))
+                while not driver.execute_script(FIRST_CARD_JS):
+                    time.sleep(0.01)
+                first_card = time.perf_counter() - start
+                heap_after_load = driver.execute_script(JS_HEAP_JS)
+
+            with MemorySampler(driver.service.process.pid) as flip_sampler:
+                start = time.perf_counter()
+                for _ in range(args.flips):
+                    driver.execute_script("nextPhoto();")
+                flip_time = time.perf_counter() - start
+                heap_after_flips = driver.execute_script(JS_HEAP_JS)
+        finally:
+            driver.quit()
+            server.shutdown()
+
+    mb = 1024 * 1024
+    print(f"\n=== Web抽认卡加载基准: {args.photos} 张 {args.size} 照片 (共 {total_bytes / mb:.0f} MB) ===")
+    print(f"页面: {args.html}")
+    print(f"第一张卡片用时: {first_card * 1000:.0f} ms")
+    print(f"浏览器内存峰值（加载）: {load_sampler.peak / mb:.0f} MB (打开页面后 {baseline / mb:.0f} MB)")
+    print(f"浏览器内存峰值（翻页 {args.flips} 次）: {flip_sampler.peak / mb:.0f} MB, "
+          f"平均每次 {flip_time / max(args.flips, 1) * 1000:.1f} ms")
+    print(f"JS堆: 加载后 {heap_after_load / mb:.1f} MB, 翻页后 {heap_after_flips / mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
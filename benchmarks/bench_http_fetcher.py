@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP快速通道核对与基准 - 把各种写法的详情页和列表页保存为本地HTML并用 http.server 提供，
+核对 SimpleSelector、extract_photo_url、extract_roster 和 HttpDetailFetcher 的结果，
+再比较不同线程数请求 --pages 个详情页的用时（不需要Chrome）
+
+用法: python3 benchmarks/bench_http_fetcher.py --pages 200 --latency 0.02 --workers 1,4,8
+"""
+
+import os
+import time
+import logging
+import argparse
+import tempfile
+from typing import Dict, List, Optional
+
+from fixtures import QuietHandler, serve_directory, write_file, detail_page_html, roster_page_html
+
+from http_fetcher import HttpDetailFetcher, SimpleSelector, extract_photo_url, extract_roster
+from student_photo_scraper_enhanced import EnhancedStudentPhotoScraper
+
+# 详情页夹具：文件名 -> (页面HTML, 期望的照片地址（相对于页面地址）或None)
+DETAIL_PAGES: Dict[str, tuple] = {
+    'avatar.html': (detail_page_html('张三', '/p/a1.jpg', 'img.avatar', noise_images=50), '/p/a1.jpg'),
+    'student-photo.html': (detail_page_html('李四', '/p/b2.jpg', 'img.student-photo'), '/p/b2.jpg'),
+    'wrapped.html': (detail_page_html('王五', '/p/c3.jpg', 'student-avatar'), '/p/c3.jpg'),
+    'relative.html': (detail_page_html('赵六', '../p/d4.jpg', 'photo'), '/p/d4.jpg'),
+    'keyword.html': ('<html><body><div><img src="/upload/face/e5.jpg" width="150" height="200">'
+                     '</div></body></html>', '/upload/face/e5.jpg'),
+    'icons-only.html': ('<html><body><img class="avatar" src="/p/tiny.jpg" width="40" height="40">'
+                        '<img src="/static/photo-icon.png" width="16" height="16"></body></html>', None),
+    # 照片由脚本渲染，静态HTML中只有地址带关键词（img）却未声明尺寸的学校徽标
+    'logo-only.html': ('<html><body><img src="/static/img/school_logo.png"><div id="photo-box"></div>'
+                       '</body></html>', None),
+    'script-rendered.html': ('<html><body><div id="box"></div><script>'
+                             'document.getElementById("box").innerHTML = \'<img class="avatar" src="/p/f6.jpg">\';'
+                             '</script></body></html>', None),
+}
+
+SELECTOR_CASES = [
+    # (选择器, 标签, 属性, 祖先链, 是否匹配)
+    ("img.student-photo", 'img', {'class': 'big student-photo'}, [], True),
+    ("img.student-photo", 'img', {'class': 'student'}, [], False),
+    (".student-avatar img", 'img', {}, [('div', {'class': 'student-avatar'}), ('span', {})], True),
+    (".student-avatar img", 'img', {}, [('div', {'class': 'avatar'})], False),
+    ("img[src*='photo']", 'img', {'src': '/x/photo1.jpg'}, [], True),
+    ("img[src*='photo']", 'img', {'src': '/x/1.jpg'}, [], False),
+    ("img[src^='/x']", 'img', {'src': '/x/1.jpg'}, [], True),
+    ("img[alt*='照片']", 'img', {'alt': '学生照片'}, [], True),
+    ("#student-photo", 'img', {'id': 'student-photo'}, [], True),
+    ("#student-photo", 'img', {'id': 'photo'}, [], False),
+    ("table tbody tr td a", 'a', {}, [('table', {}), ('tbody', {}), ('tr', {}), ('td', {})], True),
+    ("table tbody tr td a", 'a', {}, [('table', {}), ('tr', {}), ('td', {})], False),
+]
+
+
+class SlowHandler(QuietHandler):
+    """每个请求先等待 latency 秒，模拟教务系统的响应延迟"""
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        super().do_GET()
+
+
+def check(problems: List[str], label: str, actual, expected):
+    if actual != expected:
+        problems.append(f"{label}: 得到 {actual!r}，期望 {expected!r}")
+
+
+def check_selectors(problems: List[str]):
+    for selector, tag, attrs, stack, expected in SELECTOR_CASES:
+        check(problems, f"SimpleSelector({selector}) {attrs} {stack}",
+              SimpleSelector(selector).matches(tag, attrs, stack), expected)
+    # 不支持的伪类选择器应判为无效，而不是误匹配
+    check(problems, "SimpleSelector(a:contains('下一页')).valid",
+          SimpleSelector("a:contains('下一页')").valid, False)
+
+
+def expected_url(base_url: str, path: Optional[str]) -> Optional[str]:
+    return f"{base_url}{path}" if path else None
+
+
+def check_details(problems: List[str], base_url: str):
+    """extract_photo_url 直接解析保存的HTML，HttpDetailFetcher 经过本地服务请求同一批页面"""
+    for filename, (html, path) in DETAIL_PAGES.items():
+        page_url = f"{base_url}/detail/{filename}"
+        check(problems, f"extract_photo_url({filename})",
+              extract_photo_url(html, page_url), expected_url(base_url, path))
+
+    fetcher = HttpDetailFetcher({}, workers=4)
+    try:
+        students = [{'name': name, 'url': f"{base_url}/detail/{name}"} for name in DETAIL_PAGES]
+        students.append({'name': '不存在', 'url': f"{base_url}/detail/missing.html"})
+        results = fetcher.fetch_many(students)
+        for filename, (_, path) in DETAIL_PAGES.items():
+            check(problems, f"HttpDetailFetcher({filename})",
+                  results.get(f"{base_url}/detail/{filename}"), expected_url(base_url, path))
+        check(problems, "HttpDetailFetcher(404)", results.get(f"{base_url}/detail/missing.html"), None)
+        found = sum(1 for _, path in DETAIL_PAGES.values() if path)
+        check(problems, "HttpDetailFetcher 命中/回退", (fetcher.hits, fetcher.misses),
+              (found, len(students) - found))
+    finally:
+        fetcher.close()
+
+
+def check_rosters(problems: List[str], root: str, base_url: str, students: int):
+    """extract_roster 解析保存的三种链接形式的列表页，fetch_roster 经过本地服务请求同一批页面"""
+    selectors = EnhancedStudentPhotoScraper.STUDENT_LINK_SELECTORS
+    expected = [(f"学生{i:03d}", f"{base_url}/roster/detail/{i}.html") for i in range(students)]
+    fetcher = HttpDetailFetcher({}, workers=1)
+    try:
+        for style in ('href', 'js', 'onclick'):
+            page_url = f"{base_url}/roster/{style}.html"
+            with open(os.path.join(root, 'roster', f"{style}.html"), encoding='utf-8') as f:
+                roster = extract_roster(f.read(), page_url, selectors)
+            check(problems, f"extract_roster({style}) 选择器", roster['selector'], "a.student-link")
+            check(problems, f"extract_roster({style})",
+                  [(s['name'], s['url']) for s in roster['students']], expected)
+            fetched = fetcher.fetch_roster(page_url, selectors) or {'students': []}
+            check(problems, f"HttpDetailFetcher.fetch_roster({style})",
+                  [(s['name'], s['url']) for s in fetched['students']], expected)
+        check(problems, "extract_roster(空列表页)",
+              extract_roster(roster_page_html([]), f"{base_url}/roster/empty.html", selectors)['students'], [])
+    finally:
+        fetcher.close()
+
+
+def time_fetch_many(base_url: str, pages: int, workers: int) -> float:
+    names = list(DETAIL_PAGES)
+    students = [{'name': f"学生{i}", 'url': f"{base_url}/detail/{names[i % len(names)]}?n={i}"}
+                for i in range(pages)]
+    fetcher = HttpDetailFetcher({}, workers=workers)
+    try:
+        started = time.perf_counter()
+        fetcher.fetch_many(students)
+        return time.perf_counter() - started
+    finally:
+        fetcher.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP快速通道核对与基准（本地保存的HTML夹具）")
+    parser.add_argument("--pages", type=int, default=200, help="计时时请求的详情页数")
+    parser.add_argument("--students", type=int, default=30, help="列表页学生数")
+    parser.add_argument("--workers", default="1,4,8", help="要比较的请求线程数，逗号分隔")
+    parser.add_argument("--latency", type=float, default=0.02, help="计时时每个详情页的响应延迟（秒）")
+    parser.add_argument("--log-level", default="WARNING", help="输出级别")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+    problems: List[str] = []
+    with tempfile.TemporaryDirectory() as root:
+        for filename, (html, _) in DETAIL_PAGES.items():
+            write_file(os.path.join(root, 'detail', filename), html)
+        roster = [(f"学生{i:03d}", f"detail/{i}.html") for i in range(args.students)]
+        for style in ('href', 'js', 'onclick'):
+            write_file(os.path.join(root, 'roster', f"{style}.html"), roster_page_html(roster, style))
+        server, base_url = serve_directory(root, SlowHandler)
+        try:
+            check_selectors(problems)
+            check_details(problems, base_url)
+            check_rosters(problems, root, base_url, args.students)
+
+            SlowHandler.latency = args.latency
+            print(f"\n=== HTTP快速通道: 请求 {args.pages} 个详情页并解析照片地址 (延迟 {args.latency:g} s) ===")
+            for workers in (int(n) for n in args.workers.split(',')):
+                seconds = time_fetch_many(base_url, args.pages, workers)
+                print(f"{workers:>3} 个线程: {seconds:6.2f} s, {args.pages / seconds:7.1f} 页/秒")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    for problem in problems:
+        print(f"✗ {problem}")
+    if problems:
+        raise SystemExit(1)
+    print(f"✓ {len(SELECTOR_CASES) + 1} 个选择器、{len(DETAIL_PAGES) + 1} 个详情页和 4 个列表页的解析结果均正确")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+照片查找基准 - 比较页面内单次脚本查找与逐个选择器WebDriver查找的耗时
+
+用法: python3 benchmarks/bench_photo_discovery.py --pages 20 --noise 200
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+from fixtures import serve_directory, make_jpeg, write_file, detail_page_html
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from student_photo_scraper_enhanced import EnhancedStudentPhotoScraper
+
+
+def build_site(root: str, pages: int, noise: int):
+    write_file(os.path.join(root, 'photos', 'student.jpg'), make_jpeg())
+    for i in range(10):
+        write_file(os.path.join(root, 'static', f'icon{i}.png'), make_jpeg(16, 16))
+    for i in range(pages):
+        html = detail_page_html(f"学生{i}", '/photos/student.jpg', noise_images=noise)
+        write_file(os.path.join(root, 'detail', f'{i}.html'), html)
+
+
+def time_method(driver, base_url, pages, method):
+    timings = []
+    for i in range(pages):
+        driver.get(f"{base_url}/detail/{i}.html")
+        start = time.perf_counter()
+        result = method()
+        timings.append(time.perf_counter() - start)
+        assert result, f"第 {i} 页未找到照片"
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="照片查找基准")
+    parser.add_argument("--pages", type=int, default=20, help="测试页面数")
+    parser.add_argument("--noise", type=int, default=200, help="每页干扰图片数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        build_site(root, args.pages, args.noise)
+        server, base_url = serve_directory(root)
+
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        driver = webdriver.Chrome(options=options)
+
+        scraper = EnhancedStudentPhotoScraper(os.path.join(root, 'out'))
+        scraper.driver = driver
+        try:
+            results = {
+                '页面脚本 (find_photo_candidates)':
+                    time_method(driver, base_url, args.pages, lambda: scraper.find_photo_candidates()),
+                '逐个选择器 (find_photo_by_selectors)':
+                    time_method(driver, base_url, args.pages, scraper.find_photo_by_selectors),
+            }
+        finally:
+            driver.quit()
+            server.shutdown()
+
+    print(f"\n=== 照片查找基准: {args.pages} 页, 每页 {args.noise} 张干扰图片 ===")
+    for label, timings in results.items():
+        print(f"{label}: 平均 {statistics.mean(timings) * 1000:.1f} ms, "
+              f"最大 {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
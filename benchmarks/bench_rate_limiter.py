@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+限速基准 - 模拟教务系统每秒只处理 --max-rate 个请求（超过时返回429和Retry-After），
+用多个下载线程经过 RateLimiter 请求全部学生的详情页和照片（不需要Chrome），
+比较自适应限速、原来的固定间隔（每个学生等待1.5秒）和不限速三种方式的用时与被限流次数
+
+用法: python3 benchmarks/bench_rate_limiter.py --students 200 --max-rate 20 --threads 4
+"""
+
+import time
+import logging
+import argparse
+import threading
+from typing import Dict
+
+import requests
+
+from portal_fixture import SESSION_COOKIE, SESSION_VALUE, FakePortal, PortalSettings
+
+from rate_limiter import RateLimiter, Throttled, backoff_delay
+from config import Config
+
+
+def fetch_all(portal: FakePortal, mode: str, threads: int, fixed_interval: float) -> Dict:
+    """按 mode（'adaptive' / 'fixed' / 'none'）请求每个学生的详情页和照片，被限流的请求退避后重试"""
+    limiter = RateLimiter(enabled=(mode == 'adaptive'))
+    settings = Config.RATE_LIMIT
+    indexes = list(range(portal.settings.students))
+    lock = threading.Lock()
+    result = {'ok': 0, 'throttled': 0, 'failed': 0}
+
+    def get(session: requests.Session, path: str) -> bool:
+        url = portal.base_url + path
+        for attempt in range(1, settings['retries'] + 2):
+            try:
+                with limiter.request(url) as slot:
+                    response = session.get(url, timeout=10)
+                    slot.observe(response.status_code, response.headers)
+                return response.ok
+            except Throttled as e:
+                with lock:
+                    result['throttled'] += 1
+                if mode != 'adaptive':
+                    # 固定间隔和不限速方式没有 Retry-After 处理，只按退避重试
+                    e.retry_after = None
+                time.sleep(backoff_delay(attempt, 0.2, 5.0, e.retry_after))
+        return False
+
+    def worker():
+        session = requests.Session()
+        session.cookies.set(SESSION_COOKIE, SESSION_VALUE)
+        while True:
+            with lock:
+                if not indexes:
+                    break
+                index = indexes.pop(0)
+            ok = get(session, portal.detail_url(index)) and get(session, portal.photo_url(index))
+            with lock:
+                result['ok' if ok else 'failed'] += 1
+            if mode == 'fixed':
+                time.sleep(fixed_interval)
+        session.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    result['seconds'] = time.perf_counter() - started
+    result['limiter'] = limiter.report()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自适应限速基准（本地模拟限流的教务系统）")
+    parser.add_argument("--students", type=int, default=200, help="学生数（每个学生请求详情页和照片）")
+    parser.add_argument("--max-rate", type=float, default=20.0, help="模拟系统每秒最多处理的请求数")
+    parser.add_argument("--retry-after", type=int, default=1, help="429 响应中的 Retry-After（秒）")
+    parser.add_argument("--latency", type=float, default=0.02, help="详情页响应延迟（秒）")
+    parser.add_argument("--threads", type=int, default=4, help="并发请求线程数")
+    parser.add_argument("--fixed-interval", type=float, default=1.5, help="固定间隔方式每个学生后的等待（秒）")
+    parser.add_argument("--modes", default="adaptive,fixed,none", help="要比较的方式，逗号分隔")
+    parser.add_argument("--log-level", default="WARNING", help="限速器的输出级别（DEBUG 显示每次降速）")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+    settings = PortalSettings(students=args.students, latency=args.latency, photo_size=(120, 160),
+                              max_rate=args.max_rate, retry_after=args.retry_after, require_login=False)
+    print(f"\n=== 限速基准: {args.students} 个学生 x 2 个请求, 服务器上限 {args.max_rate:g} 请求/秒, "
+          f"{args.threads} 个线程 ===")
+    for mode in args.modes.split(','):
+        portal = FakePortal(settings).start()
+        try:
+            result = fetch_all(portal, mode, args.threads, args.fixed_interval)
+        finally:
+            portal.stop()
+        rate = (result['ok'] * 2) / max(result['seconds'], 1e-9)
+        print(f"{mode:>9}: {result['seconds']:6.1f} s, 完成 {result['ok']}/{args.students}, "
+              f"有效 {rate:5.1f} 请求/秒, 收到429 {result['throttled']} 次")
+        for line in result['limiter']:
+            print(f"           {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+--refresh 条件请求基准 - 本地服务按 ETag / Last-Modified 响应条件请求（未变化返回304），
+依次运行：首次抓取（全部200）、照片未变化时 --refresh（全部304）、部分照片更换后 --refresh，
+核对每次的响应状态、磁盘上的照片内容，并比较 --refresh 与重新下载全部照片的用时和流量（不需要Chrome）
+
+照片按序号轮流只发送 ETag、只发送 Last-Modified、两者都发送，分别覆盖三种验证方式。
+
+用法: python3 benchmarks/bench_refresh.py --photos 60 --changed 6 --latency 0.02
+"""
+
+import os
+import time
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+import http.server
+import email.utils
+from typing import Dict, List
+
+import requests
+
+from fixtures import QuietHandler, make_jpeg
+
+from student_photo_scraper_enhanced import EnhancedStudentPhotoScraper
+
+VALIDATORS = ('etag', 'last-modified', 'both')
+
+
+class PhotoServer:
+    """提供 /photos/<序号>.jpg，记录每种响应状态的次数和发送的字节数"""
+
+    def __init__(self, photos: int, latency: float):
+        self.latency = latency
+        self.photos: Dict[str, Dict] = {}
+        self.statuses: Dict[int, int] = {}
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        for index in range(photos):
+            self.set_photo(index, version=1)
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), ConditionalHandler)
+        self.server.photo_server = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def set_photo(self, index: int, version: int):
+        """生成（或更换）一张照片；每张照片颜色不同，避免被当作占位图"""
+        body = make_jpeg(120, 160, color=(index % 256, (index // 256) % 256, 60 * version % 256))
+        # 更换后的 Last-Modified 必须晚于之前的时间（HTTP日期精确到秒）
+        modified = time.time() - 3600 + version * 60
+        self.photos[f"/photos/{index}.jpg"] = {
+            'body': body,
+            'etag': '"' + hashlib.sha1(body).hexdigest()[:16] + '"',
+            'modified': int(modified),
+            'validator': VALIDATORS[index % len(VALIDATORS)],
+        }
+
+    def url(self, index: int) -> str:
+        return f"{self.base_url}/photos/{index}.jpg"
+
+    def record(self, status: int, size: int = 0):
+        with self._lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.bytes_sent += size
+
+    def reset_counts(self):
+        with self._lock:
+            self.statuses = {}
+            self.bytes_sent = 0
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class ConditionalHandler(QuietHandler):
+    """If-None-Match 优先于 If-Modified-Since（RFC 9110 13.2.2）"""
+
+    def do_GET(self):
+        server: PhotoServer = self.server.photo_server
+        time.sleep(server.latency)
+        photo = server.photos.get(self.path)
+        if photo is None:
+            self.send_error(404)
+            server.record(404)
+            return
+
+        headers = {}
+        if photo['validator'] in ('etag', 'both'):
+            headers['ETag'] = photo['etag']
+        if photo['validator'] in ('last-modified', 'both'):
+            headers['Last-Modified'] = email.utils.formatdate(photo['modified'], usegmt=True)
+
+        not_modified = False
+        if 'ETag' in headers and self.headers.get('If-None-Match'):
+            not_modified = photo['etag'] in [tag.strip() for tag in self.headers['If-None-Match'].split(',')]
+        elif 'Last-Modified' in headers and self.headers.get('If-Modified-Since'):
+            try:
+                since = email.utils.parsedate_to_datetime(self.headers['If-Modified-Since']).timestamp()
+                not_modified = photo['modified'] <= since
+            except (TypeError, ValueError):
+                not_modified = False
+
+        status = 304 if not_modified else 200
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if not_modified:
+            self.end_headers()
+            server.record(304)
+            return
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(photo['body'])))
+        self.end_headers()
+        self.wfile.write(photo['body'])
+        server.record(200, len(photo['body']))
+
+
+def run(server: PhotoServer, out_dir: str, photos: int, refresh: bool) -> Dict:
+    """用抓取器的下载函数逐张请求全部照片（与浏览器线程提交下载任务时相同的路径）"""
+    server.reset_counts()
+    scraper = EnhancedStudentPhotoScraper(out_dir, refresh=refresh, rate_limit=False)
+    session = requests.Session()
+    started = time.perf_counter()
+    ok = sum(1 for index in range(photos)
+             if scraper.download_photo(f"学生{index:04d}", server.url(index), referer=server.base_url,
+                                       cookies={}, session=session))
+    seconds = time.perf_counter() - started
+    session.close()
+    scraper.photo_store.save()
+    scraper.fetch_index.save()
+    return {'seconds': seconds, 'ok': ok, 'statuses': dict(server.statuses), 'bytes': server.bytes_sent,
+            'store': scraper.photo_store}
+
+
+def stale_photos(server: PhotoServer, result: Dict, photos: int) -> List[int]:
+    """磁盘上的内容与服务器当前版本不同的照片序号"""
+    store = result['store']
+    stale = []
+    for index in range(photos):
+        entry = store.get(f"学生{index:04d}", server.url(index))
+        path = os.path.join(store.photo_dir, entry['file']) if entry and entry.get('file') else None
+        if path is None or not os.path.isfile(path):
+            stale.append(index)
+            continue
+        with open(path, 'rb') as f:
+            if f.read() != server.photos[f"/photos/{index}.jpg"]['body']:
+                stale.append(index)
+    return stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description="--refresh 条件请求基准（本地服务模拟 ETag / Last-Modified）")
+    parser.add_argument("--photos", type=int, default=60, help="照片数")
+    parser.add_argument("--changed", type=int, default=6, help="第三次运行前更换的照片数")
+    parser.add_argument("--latency", type=float, default=0.02, help="每个请求的响应延迟（秒）")
+    parser.add_argument("--log-level", default="WARNING", help="抓取程序的输出级别")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    logging.getLogger("urllib3").setLevel(logging.WARNING)
+
+    changed = list(range(0, args.photos, max(1, args.photos // max(1, args.changed))))[:args.changed]
+    server = PhotoServer(args.photos, args.latency)
+    problems: List[str] = []
+    rows = []
+    try:
+        with tempfile.TemporaryDirectory() as out_dir:
+            first = run(server, out_dir, args.photos, refresh=False)
+            rows.append(('首次抓取', first, {200: args.photos}))
+
+            unchanged = run(server, out_dir, args.photos, refresh=True)
+            rows.append(('--refresh 未变化', unchanged, {304: args.photos}))
+
+            for index in changed:
+                server.set_photo(index, version=2)
+            partial = run(server, out_dir, args.photos, refresh=True)
+            expected = {200: len(changed), 304: args.photos - len(changed)}
+            rows.append((f'--refresh 更换{len(changed)}张', partial, {k: v for k, v in expected.items() if v}))
+
+            stale = stale_photos(server, partial, args.photos)
+            if stale:
+                problems.append(f"磁盘上的照片与服务器不一致: {stale}")
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            full = run(server, out_dir, args.photos, refresh=False)
+            rows.append(('重新下载全部', full, {200: args.photos}))
+    finally:
+        server.stop()
+
+    print(f"\n=== --refresh 条件请求: {args.photos} 张照片, 延迟 {args.latency:g} s ===")
+    for label, result, expected in rows:
+        statuses = ', '.join(f"{status}: {count}" for status, count in sorted(result['statuses'].items()))
+        print(f"{label}: {result['seconds']:6.2f} s, 传输 {result['bytes'] / 1024:8.1f} KB, "
+              f"成功 {result['ok']}/{args.photos}, 响应 {statuses}")
+        if result['statuses'] != expected:
+            problems.append(f"{label}: 响应状态 {result['statuses']}，期望 {expected}")
+        if result['ok'] != args.photos:
+            problems.append(f"{label}: 只有 {result['ok']} 张照片成功")
+
+    for problem in problems:
+        print(f"✗ {problem}")
+    if problems:
+        raise SystemExit(1)
+    print("✓ 未变化的照片都只收到304，更换的照片已重新下载并替换")
+
+
+if __name__ == "__main__":
+    main()
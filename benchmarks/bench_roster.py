@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+学生列表提取基准 - 比较单次页面脚本提取与逐个元素读取 text/href 的耗时
+
+用法: python3 benchmarks/bench_roster.py --students 100 --style js
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import statistics
+
+from fixtures import serve_directory, write_file, roster_page_html
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from student_photo_scraper_enhanced import EnhancedStudentPhotoScraper
+
+
+def per_element_roster(driver):
+    """旧做法：每个元素的 text 和 href 各是一次WebDriver往返（不含JavaScript链接的点击）"""
+    students = []
+    for element in driver.find_elements(By.CSS_SELECTOR, "a.student-link"):
+        name = element.text.strip()
+        href = element.get_attribute('href')
+        if name and href:
+            students.append({'name': name, 'url': href})
+    return students
+
+
+def main():
+    parser = argparse.ArgumentParser(description="学生列表提取基准")
+    parser.add_argument("--students", type=int, default=100, help="每页学生数")
+    parser.add_argument("--style", choices=['href', 'js', 'onclick'], default='href', help="链接形式")
+    parser.add_argument("--rounds", type=int, default=10, help="重复次数")
+    args = parser.parse_args()
+
+    roster = [(f"学生{i:03d}", f"detail/{i}.html") for i in range(args.students)]
+    with tempfile.TemporaryDirectory() as root:
+        write_file(os.path.join(root, 'list.html'), roster_page_html(roster, args.style))
+        server, base_url = serve_directory(root)
+
+        options = Options()
+        options.add_argument("--headless=new")
+        options.add_argument("--no-sandbox")
+        driver = webdriver.Chrome(options=options)
+
+        scraper = EnhancedStudentPhotoScraper(os.path.join(root, 'out'))
+        scraper.driver = driver
+        results = {'页面脚本 (get_students_from_page)': [], '逐个元素读取': []}
+        try:
+            driver.get(f"{base_url}/list.html")
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                students = scraper.get_students_from_page()
+                results['页面脚本 (get_students_from_page)'].append(time.perf_counter() - start)
+                assert len(students) == args.students, f"只提取到 {len(students)} 个学生"
+                assert all(s['url'].startswith(base_url) for s in students), "存在未解析的链接"
+
+                start = time.perf_counter()
+                per_element_roster(driver)
+                results['逐个元素读取'].append(time.perf_counter() - start)
+        finally:
+            driver.quit()
+            server.shutdown()
+
+    print(f"\n=== 学生列表提取基准: {args.students} 个学生, 链接形式 {args.style} ===")
+    for label, timings in results.items():
+        print(f"{label}: 平均 {statistics.mean(timings) * 1000:.1f} ms, "
+              f"最大 {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
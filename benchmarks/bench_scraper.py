@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端抓取基准 - 启动本地模拟教务系统，用无头Chrome完整运行 EnhancedStudentPhotoScraper，
+报告每分钟处理的学生数、下载速度和各阶段耗时，修改抓取程序后可用来检查性能回退
+
+用法: python3 benchmarks/bench_scraper.py --students 60 --per-page 20 --links js --latency 0.05
+      python3 benchmarks/bench_scraper.py --pipeline --browsers 3 --json result.json
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+from typing import Optional
+from unittest import mock
+
+from portal_fixture import FakePortal, PortalSettings
+
+from selenium import webdriver
+from config import Config
+from student_photo_scraper_enhanced import EnhancedStudentPhotoScraper
+
+
+class BenchScraper(EnhancedStudentPhotoScraper):
+    """始终使用无头浏览器，由Selenium自带的驱动管理查找chromedriver（不访问网络下载）"""
+
+    def create_driver(self, headless: bool = False, profile_dir: Optional[str] = None):
+        driver = webdriver.Chrome(options=self.build_chrome_options(headless=True, profile_dir=profile_dir))
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        return driver
+
+
+def downloaded_bytes(timings_path: str) -> int:
+    """从阶段事件文件中累计实际下载的字节数"""
+    total = 0
+    with open(timings_path, encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get('stage') == 'download' and record.get('ok'):
+                total += record.get('bytes', 0)
+    return total
+
+
+def run(settings: PortalSettings, scraper_options: dict):
+    """运行一次完整抓取，返回结果字典"""
+    portal = FakePortal(settings).start()
+    with tempfile.TemporaryDirectory() as root:
+        out_dir = os.path.join(root, 'photos')
+        scraper = BenchScraper(out_dir, **scraper_options)
+        started = {}
+
+        def operator_ready(prompt=''):
+            # 代替操作员：登录并打开学生列表第1页
+            scraper.driver.get(portal.login_url)
+            started['at'] = time.perf_counter()
+            return 'y'
+
+        try:
+            with mock.patch('builtins.input', operator_ready):
+                scraper.scrape_all_photos()
+            elapsed = time.perf_counter() - started.get('at', time.perf_counter())
+        finally:
+            portal.stop()
+
+        timings_path = os.path.join(out_dir, Config.FILE_SETTINGS['timings_file'])
+        saved = sum(1 for name in os.listdir(out_dir) if name.endswith('.jpg'))
+        return {
+            'settings': settings._asdict(),
+            'options': scraper_options,
+            'seconds': elapsed,
+            'students': settings.students,
+            'saved': saved,
+            'students_per_minute': saved / elapsed * 60 if elapsed else 0,
+            'bytes': downloaded_bytes(timings_path) if os.path.exists(timings_path) else 0,
+            'requests': dict(portal.counts),
+            'stages': scraper.timer.summary(),
+            'report': scraper.timer.report() + scraper.limiter.report(),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端抓取基准（本地模拟教务系统）")
+    parser.add_argument("--students", type=int, default=60, help="学生总数")
+    parser.add_argument("--per-page", type=int, default=20, help="每页学生数")
+    parser.add_argument("--pagination", choices=['query', 'path', 'cursor'], default='query',
+                        help="分页地址形式（cursor 为不带页码的游标）")
+    parser.add_argument("--links", choices=['href', 'js', 'onclick'], default='href', help="学生链接形式")
+    parser.add_argument("--same-window", action="store_true", help="详情页在当前窗口打开（默认弹出新窗口）")
+    parser.add_argument("--latency", type=float, default=0.0, help="列表页和详情页的响应延迟（秒）")
+    parser.add_argument("--photo-latency", type=float, default=0.0, help="照片的响应延迟（秒）")
+    parser.add_argument("--photo-size", default="300x400", help="照片尺寸（宽x高）")
+    parser.add_argument("--assets", type=int, default=0, help="每个详情页附带的样式表和横幅图片数量")
+    parser.add_argument("--asset-latency", type=float, default=0.0, help="这些资源的响应延迟（秒）")
+    parser.add_argument("--max-rate", type=float, default=0.0,
+                        help="模拟系统每秒最多处理的请求数（超过时返回429），0为不限")
+    parser.add_argument("--opaque-photos", action="store_true", help="照片地址没有规律（无法推断）")
+    parser.add_argument("--http", action="store_true", help="抓取程序使用HTTP快速通道")
+    parser.add_argument("--browsers", type=int, default=1, help="抓取程序的浏览器数量")
+    parser.add_argument("--pipeline", action="store_true", help="抓取程序先读取全部名单")
+    parser.add_argument("--no-infer", action="store_true", help="抓取程序不推断照片地址")
+    parser.add_argument("--no-capture", action="store_true", help="抓取程序不从浏览器读取照片内容")
+    parser.add_argument("--no-lean", action="store_true", help="抓取程序加载详情页的全部资源")
+    parser.add_argument("--detail-tabs", type=int, default=Config.TAB_SETTINGS['detail_tabs'],
+                        help="详情标签页数量（0 为在列表页点击链接、等待弹出窗口）")
+    parser.add_argument("--no-rate-limit", action="store_true", help="抓取程序不自适应限速")
+    parser.add_argument("--log-level", default="WARNING", help="抓取程序的输出级别")
+    parser.add_argument("--json", help="把结果写入JSON文件（用于与之前的结果比较）")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    for noisy in ("urllib3", "selenium"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    Config.TAB_SETTINGS['detail_tabs'] = args.detail_tabs
+
+    width, height = (int(v) for v in args.photo_size.split('x'))
+    settings = PortalSettings(
+        students=args.students, per_page=args.per_page, pagination=args.pagination,
+        link_style=args.links, popup=not args.same_window, latency=args.latency,
+        photo_latency=args.photo_latency, photo_size=(width, height),
+        photo_urls='opaque' if args.opaque_photos else 'pattern',
+        assets=args.assets, asset_latency=args.asset_latency, max_rate=args.max_rate,
+    )
+    options = {'http_fast_path': args.http, 'browsers': args.browsers, 'pipeline': args.pipeline,
+               'infer_urls': False if args.no_infer else None,
+               'capture_responses': not args.no_capture, 'lean': not args.no_lean,
+               'rate_limit': not args.no_rate_limit}
+    result = run(settings, options)
+
+    mb = 1024 * 1024
+    print(f"\n=== 抓取基准: {settings.students} 个学生 / 每页 {settings.per_page} 个, "
+          f"分页 {settings.pagination}, 链接 {settings.link_style}, "
+          f"{'弹出窗口' if settings.popup else '当前窗口'} ===")
+    print(f"选项: {', '.join(f'{k}={v}' for k, v in options.items())}, detail_tabs={args.detail_tabs}")
+    print(f"用时: {result['seconds']:.1f} s, 保存照片 {result['saved']}/{result['students']}")
+    print(f"吞吐: {result['students_per_minute']:.1f} 个学生/分钟, "
+          f"下载 {result['bytes'] / mb:.2f} MB ({result['bytes'] / max(result['seconds'], 1e-9) / 1024:.0f} KB/s)")
+    print(f"服务器请求: {', '.join(f'{k} {v}' for k, v in sorted(result['requests'].items()))}")
+    print("各阶段耗时 (秒):")
+    for line in result['report']:
+        print(f"   {line}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({k: v for k, v in result.items() if k != 'report'}, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
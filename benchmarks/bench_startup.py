@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+冷启动基准 - 从创建抓取器到读到第一页学生的用时，分别测量：
+  cold    空的驱动缓存（webdriver-manager 联网解析）+ 空白浏览器配置（需要登录）
+  cached  已缓存的驱动 + 空白浏览器配置（需要登录）
+  profile 已缓存的驱动 + 保留的浏览器配置（登录仍有效，跳过操作员确认）
+登录由脚本代替操作员完成（瞬间完成），真实运行中需要登录的方式还要再加上人工登录的时间。
+
+用法: python3 benchmarks/bench_startup.py --runs 3
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+from typing import Dict, Optional
+
+from portal_fixture import FakePortal, PortalSettings
+
+from browser_startup import save_profile_state
+from config import Config
+from student_photo_scraper_enhanced import EnhancedStudentPhotoScraper
+
+
+def time_to_first_student(portal: FakePortal, out_dir: str, profile_dir: Optional[str]) -> Dict:
+    """启动浏览器（必要时代替操作员登录），返回各阶段用时和到读到第一页学生的总用时"""
+    started = time.perf_counter()
+    scraper = EnhancedStudentPhotoScraper(out_dir, profile_dir=profile_dir)
+    if not scraper.setup_driver():
+        raise RuntimeError("浏览器启动失败")
+    try:
+        resumed = scraper.resume_session()
+        if not resumed:
+            scraper.driver.get(portal.login_url)
+            scraper.wait_for_page_load()
+            if profile_dir:
+                save_profile_state(profile_dir, start_url=scraper.driver.current_url)
+        students = scraper.get_students_from_page()
+        total = time.perf_counter() - started
+    finally:
+        scraper.driver.quit()
+    stages = scraper.timer.summary()
+    return {
+        'seconds': total,
+        'resumed': resumed,
+        'students': len(students),
+        'driver_resolve': stages.get('driver_resolve', {}).get('total', 0.0),
+        'browser_launch': stages.get('browser_launch', {}).get('total', 0.0),
+        'session_check': stages.get('session_check', {}).get('total', 0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="抓取程序冷启动基准（本地模拟教务系统，无头Chrome）")
+    parser.add_argument("--runs", type=int, default=3, help="cached / profile 两种方式各运行几次")
+    parser.add_argument("--students", type=int, default=20, help="每页学生数")
+    parser.add_argument("--chromedriver", help="指定chromedriver路径（此时 cold 与 cached 相同）")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    parser.add_argument("--log-level", default="WARNING", help="抓取程序的输出级别")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    for noisy in ("urllib3", "selenium", "WDM"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    Config.BROWSER_SETTINGS['headless'] = True
+    Config.DRIVER_SETTINGS['chromedriver_path'] = args.chromedriver
+    portal = FakePortal(PortalSettings(students=args.students, per_page=args.students,
+                                       remember_login=True)).start()
+    results = {'cold': [], 'cached': [], 'profile': []}
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            Config.DRIVER_SETTINGS['cache_file'] = os.path.join(root, 'chromedriver.json')
+            out_dir = os.path.join(root, 'photos')
+            profile_dir = os.path.join(root, 'profile')
+
+            results['cold'].append(time_to_first_student(portal, out_dir, None))
+            for _ in range(args.runs):
+                results['cached'].append(time_to_first_student(portal, out_dir, None))
+            # 第一次使用配置目录时需要登录，之后的运行直接复用登录状态
+            time_to_first_student(portal, out_dir, profile_dir)
+            for _ in range(args.runs):
+                results['profile'].append(time_to_first_student(portal, out_dir, profile_dir))
+    finally:
+        portal.stop()
+
+    print(f"\n=== 冷启动基准: 启动到读到第一页学生 ({args.students} 个学生) ===")
+    for mode, runs in results.items():
+        if not runs:
+            continue
+        median = {key: statistics.median(run[key] for run in runs)
+                  for key in ('seconds', 'driver_resolve', 'browser_launch', 'session_check')}
+        resumed = all(run['resumed'] for run in runs)
+        print(f"{mode:>8}: {median['seconds']:6.2f} s (解析驱动 {median['driver_resolve']:.2f}, "
+              f"启动浏览器 {median['browser_launch']:.2f}, 检查登录 {median['session_check']:.2f}), "
+              f"跳过操作员确认: {'是' if resumed else '否'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
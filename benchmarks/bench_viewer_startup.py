@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+照片查看器启动基准 - 比较按扩展名多次 glob、单次 scandir 流式扫描、读取照片索引
+三种方式得到第一张照片和完整列表的耗时（不需要图形界面）
+
+用法: python3 benchmarks/bench_viewer_startup.py --photos 50000
+"""
+
+import os
+import glob
+import json
+import time
+import argparse
+import tempfile
+
+from fixtures import make_jpeg, write_file
+
+from photo_scan import iter_photo_files
+from photo_store import MANIFEST_NAME, manifest_photo_files
+
+
+def build_archive(root: str, count: int, with_manifest: bool):
+    """用硬链接生成大量照片文件（混合大小写扩展名）"""
+    source = write_file(os.path.join(root, '.source.jpg'), make_jpeg(60, 80))
+    extensions = ['.jpg', '.JPG', '.jpeg', '.png']
+    entries = {}
+    for i in range(count):
+        filename = f"学生{i:06d}{extensions[i % len(extensions)]}"
+        path = os.path.join(root, filename)
+        try:
+            os.link(source, path)
+        except OSError:
+            write_file(path, open(source, 'rb').read())
+        entries[f"学生{i:06d}|http://example/{i}.jpg"] = {'name': f"学生{i:06d}", 'file': filename,
+                                                          'placeholder': False}
+    if with_manifest:
+        with open(os.path.join(root, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': entries, 'blobs': {}}, f, ensure_ascii=False)
+
+
+def glob_listing(root: str):
+    """旧做法：每种扩展名一次 glob（区分大小写），全部完成并排序后才有第一张"""
+    photos = []
+    for ext in ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp']:
+        photos.extend(glob.glob(os.path.join(root, ext)))
+    photos.sort()
+    return photos
+
+
+def measure(label: str, first_fn, full_fn):
+    start = time.perf_counter()
+    first = first_fn()
+    first_time = time.perf_counter() - start
+    start = time.perf_counter()
+    photos = full_fn()
+    full_time = time.perf_counter() - start
+    print(f"{label}: 第一张 {first_time * 1000:.1f} ms, 完整列表 {full_time * 1000:.1f} ms "
+          f"({len(photos)} 张{'' if first else '，未找到照片'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="照片查看器启动基准")
+    parser.add_argument("--photos", type=int, default=50000, help="照片数量")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        build_archive(root, args.photos, with_manifest=True)
+        print(f"\n=== 查看器启动基准: {args.photos} 张照片 ===")
+        measure("多次 glob + 排序", lambda: glob_listing(root)[:1], lambda: glob_listing(root))
+        measure("单次 scandir 流式", lambda: next(iter_photo_files(root), None),
+                lambda: sorted(iter_photo_files(root)))
+        measure("照片索引 manifest.json", lambda: manifest_photo_files(root)[:1],
+                lambda: manifest_photo_files(root))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试夹具 - 生成本地测试页面和图片，并用 http.server 在后台提供服务
+"""
+
+import io
+import os
+import sys
+import threading
+import functools
+import http.server
+from typing import Tuple
+
+# 让 benchmarks/ 下的脚本可以直接导入项目模块
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    """不打印访问日志的静态文件处理器"""
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(root: str, handler_class=QuietHandler) -> Tuple[http.server.ThreadingHTTPServer, str]:
+    """在后台线程中提供 root 目录的静态文件服务，返回 (server, base_url)"""
+    handler = functools.partial(handler_class, directory=root)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def make_jpeg(width: int = 300, height: int = 400, color=(102, 126, 234), quality: int = 85) -> bytes:
+    """生成一张纯色JPEG"""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), color).save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def write_file(path: str, data) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    with open(path, mode, **({} if mode == 'wb' else {'encoding': 'utf-8'})) as f:
+        f.write(data)
+    return path
+
+
+def detail_page_html(name: str, photo_src: str, photo_markup: str = 'img.avatar',
+                     noise_images: int = 0) -> str:
+    """生成学生详情页
+
+    photo_markup 决定照片命中哪个选择器：'img.avatar' 位于 Config 选择器列表末尾，
+    逐个选择器查找时要先经历前面所有选择器的等待。
+    """
+    if photo_markup == 'img.avatar':
+        photo = f'<img class="avatar" src="{photo_src}" width="150" height="200" alt="{name}">'
+    elif photo_markup == 'img.student-photo':
+        photo = f'<img class="student-photo" src="{photo_src}" width="150" height="200" alt="{name}">'
+    else:
+        photo = f'<div class="{photo_markup}"><img src="{photo_src}" width="150" height="200"></div>'
+
+    noise = '\n'.join(
+        f'<img src="/static/icon{i % 10}.png" width="16" height="16" alt="">'
+        for i in range(noise_images)
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{name} - 学生信息</title></head>
+<body>
+<div class="toolbar">{noise}</div>
+<table class="info">
+<tr><td>姓名</td><td>{name}</td><td rowspan="3">{photo}</td></tr>
+<tr><td>学号</td><td>2021000000</td></tr>
+<tr><td>班级</td><td>计算机2101</td></tr>
+</table>
+</body></html>
+"""
+
+
+def roster_page_html(students, link_style: str = 'href') -> str:
+    """生成学生列表页，students 为 [(姓名, 详情页地址)]
+
+    link_style:
+        'href'    - 普通链接 <a href="detail/1.html">
+        'js'      - <a href="javascript:openDetail('detail/1.html')">
+        'onclick' - <a href="#" onclick="openDetail('detail/1.html', 1); return false;">
+    """
+    rows = []
+    for i, (name, url) in enumerate(students, 1):
+        if link_style == 'js':
+            link = f'<a class="student-link" href="javascript:openDetail(\'{url}\')">{name}</a>'
+        elif link_style == 'onclick':
+            link = (f'<a class="student-link" href="#" '
+                    f'onclick="openDetail(\'{url}\', {i}); return false;">{name}</a>')
+        else:
+            link = f'<a class="student-link" href="{url}">{name}</a>'
+        rows.append(f'<tr><td>{i}</td><td>{link}</td><td>计算机2101</td></tr>')
+    body = '\n'.join(rows)
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>学生列表</title>
+<script>function openDetail(url) {{ window.open(url, '_blank'); }}</script></head>
+<body>
+<table class="list"><tbody>
+{body}
+</tbody></table>
+</body></html>
+"""
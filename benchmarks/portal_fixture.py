@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模拟教务系统 - 在本地提供登录、分页学生列表、学生详情页和照片，用于离线驱动抓取程序
+
+可配置学生数量、每页人数、分页形式、列表链接形式（普通链接/JavaScript/onclick）、
+详情页是否在新窗口打开、每个请求的延迟、照片尺寸、照片地址是否有规律，
+以及详情页附带的慢速样式表和横幅图片（与照片无关的资源）。
+可以限制每秒处理的请求数，超过时像繁忙的真实系统一样返回 429 和 Retry-After。
+每个学生的照片内容都不相同（否则会被照片存储当作占位图）。
+"""
+
+import io
+import time
+import hashlib
+import threading
+import http.server
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from fixtures import QuietHandler
+
+SESSION_COOKIE = 'JSESSIONID'
+SESSION_VALUE = 'bench-session'
+
+
+class PortalSettings(NamedTuple):
+    """模拟教务系统的参数"""
+    students: int = 60
+    per_page: int = 20
+    pagination: str = 'query'       # 'query' ?page=N / 'path' /list/page/N / 'cursor' 不带页码的游标
+    link_style: str = 'href'        # 'href' / 'js' / 'onclick'，见 fixtures.roster_page_html
+    popup: bool = True              # 详情页在新窗口打开（False 时在当前页面跳转）
+    latency: float = 0.0            # 列表页和详情页的响应延迟（秒）
+    photo_latency: float = 0.0      # 照片的响应延迟（秒）
+    photo_size: Tuple[int, int] = (300, 400)
+    photo_urls: str = 'pattern'     # 'pattern' 照片地址由学号生成 / 'opaque' 无规律的地址
+    require_login: bool = True      # 详情页和照片需要登录cookie
+    remember_login: bool = False    # 登录cookie带有效期（"记住我"），会保存在浏览器配置目录中
+    assets: int = 0                 # 每个详情页附带的样式表和横幅图片数量（与照片无关的资源）
+    asset_latency: float = 0.0      # 这些资源的响应延迟（秒）
+    max_rate: float = 0.0           # 列表页、详情页和照片每秒最多处理的请求数（超过时返回429），0为不限
+    retry_after: int = 1            # 429 响应中的 Retry-After（秒）
+
+
+def student_id(index: int) -> str:
+    return f"2021{index:05d}"
+
+
+def student_name(index: int) -> str:
+    return f"学生{index:04d}"
+
+
+class FakePortal:
+    """模拟教务系统的后台服务
+
+    portal = FakePortal(PortalSettings(students=100)).start()
+    driver.get(portal.login_url)   # 写入登录cookie后跳转到第1页
+    ...
+    portal.stop()
+    """
+
+    def __init__(self, settings: Optional[PortalSettings] = None):
+        self.settings = settings or PortalSettings()
+        self.counts: Dict[str, int] = {}
+        self.photo_bytes = 0
+        self._lock = threading.Lock()
+        self._tokens = max(1.0, self.settings.max_rate)
+        self._refilled = time.monotonic()
+        self._photo_base = self._render_photo()
+        self._banner: Optional[bytes] = None
+        self._cursors = {self._cursor(page): page for page in range(1, self.pages + 1)}
+        self._photo_paths = {self.photo_url(index): index for index in range(self.settings.students)}
+        self.server: Optional[http.server.ThreadingHTTPServer] = None
+        self.base_url = ''
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.settings.students // self.settings.per_page))
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.base_url}/login"
+
+    def start(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), PortalHandler)
+        self.server.portal = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def count(self, kind: str, size: int = 0):
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+            if kind == 'photo':
+                self.photo_bytes += size
+
+    def admit(self) -> bool:
+        """服务器端令牌桶（容量为1秒的请求数）：超过 max_rate 时返回False"""
+        rate = self.settings.max_rate
+        if rate <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(max(1.0, rate), self._tokens + (now - self._refilled) * rate)
+            self._refilled = now
+            if self._tokens < 1:
+                self.counts['throttled'] = self.counts.get('throttled', 0) + 1
+                return False
+            self._tokens -= 1
+            return True
+
+    # ---- 地址 ----
+
+    @staticmethod
+    def _cursor(page: int) -> str:
+        return hashlib.sha1(f"page-{page}".encode()).hexdigest()[:10]
+
+    def page_url(self, page: int) -> str:
+        style = self.settings.pagination
+        if style == 'path':
+            return f"/list/page/{page}"
+        if style == 'cursor':
+            return f"/list?cursor={self._cursor(page)}"
+        return f"/list?page={page}"
+
+    def detail_url(self, index: int) -> str:
+        return f"/student/info?xh={student_id(index)}"
+
+    def photo_url(self, index: int) -> str:
+        if self.settings.photo_urls == 'opaque':
+            token = hashlib.sha1(f"photo-{index}".encode()).hexdigest()[:16]
+            return f"/photos/p/{token}.jpg"
+        return f"/photos/{student_id(index)}.jpg"
+
+    def photo_index(self, path: str) -> Optional[int]:
+        """照片地址 -> 学生序号"""
+        return self._photo_paths.get(path)
+
+    # ---- 页面 ----
+
+    def _render_photo(self) -> bytes:
+        """带噪点的JPEG（大小接近真实照片），所有学生共用同一幅图像数据"""
+        from PIL import Image
+
+        width, height = self.settings.photo_size
+        image = Image.merge('RGB', [Image.effect_noise((width, height), sigma).convert('L')
+                                    for sigma in (40, 50, 60)])
+        buffer = io.BytesIO()
+        image.save(buffer, 'JPEG', quality=85)
+        return buffer.getvalue()
+
+    @property
+    def banner_png(self) -> bytes:
+        if self._banner is None:
+            from PIL import Image
+
+            buffer = io.BytesIO()
+            Image.new('RGB', (600, 60), (30, 60, 120)).save(buffer, 'PNG')
+            self._banner = buffer.getvalue()
+        return self._banner
+
+    def photo_bytes_for(self, index: int) -> bytes:
+        """在SOI后插入注释段，使每个学生的照片内容不同"""
+        comment = f"student {student_id(index)}".encode('ascii')
+        segment = b'\xff\xfe' + (len(comment) + 2).to_bytes(2, 'big') + comment
+        return self._photo_base[:2] + segment + self._photo_base[2:]
+
+    def roster_html(self, page: int) -> str:
+        settings = self.settings
+        first = (page - 1) * settings.per_page
+        rows = []
+        for index in range(first, min(first + settings.per_page, settings.students)):
+            name, url = student_name(index), self.detail_url(index)
+            if settings.link_style == 'js':
+                link = f'<a class="student-link" href="javascript:openDetail(\'{url}\')">{name}</a>'
+            elif settings.link_style == 'onclick':
+                link = (f'<a class="student-link" href="#" '
+                        f'onclick="openDetail(\'{url}\', {index}); return false;">{name}</a>')
+            else:
+                target = ' target="_blank"' if settings.popup else ''
+                link = f'<a class="student-link" href="{url}"{target}>{name}</a>'
+            rows.append(f'<tr><td>{student_id(index)}</td><td>{link}</td><td>计算机2101</td></tr>')
+
+        pager = []
+        if settings.pagination != 'cursor':
+            pager.extend(f'<a href="{self.page_url(n)}">{n}</a>' if n != page else f'<span>{n}</span>'
+                         for n in range(1, self.pages + 1))
+        if page < self.pages:
+            pager.append(f'<a class="next" href="{self.page_url(page + 1)}">下一页</a>')
+        else:
+            pager.append('<span class="next disabled">下一页</span>')
+
+        opener = "window.open(url, '_blank')" if settings.popup else "location.href = url"
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>学生列表 - 第{page}页</title>
+<script>function openDetail(url) {{ {opener}; }}</script></head>
+<body>
+<table class="list"><tbody>
+{chr(10).join(rows)}
+</tbody></table>
+<div class="pagination">{' '.join(pager)}</div>
+</body></html>
+"""
+
+    def detail_html(self, index: int) -> str:
+        name = student_name(index)
+        styles = ''.join(f'<link rel="stylesheet" href="/static/style{i}.css">'
+                         for i in range(self.settings.assets))
+        banners = ''.join(f'<img src="/static/banner{i}.png" width="600" height="60" alt="">'
+                          for i in range(self.settings.assets))
+        return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{name} - 学生信息</title>{styles}</head>
+<body>
+<div class="header">{banners}</div>
+<table class="info">
+<tr><td>姓名</td><td>{name}</td>
+<td rowspan="3"><img class="student-photo" src="{self.photo_url(index)}" width="150" height="200" alt="{name}"></td></tr>
+<tr><td>学号</td><td>{student_id(index)}</td></tr>
+<tr><td>班级</td><td>计算机2101</td></tr>
+</table>
+</body></html>
+"""
+
+    def roster_page(self, path: str, query: Dict) -> Optional[int]:
+        """列表页地址 -> 页码"""
+        if path.startswith('/list/page/'):
+            number = path[len('/list/page/'):]
+            page = int(number) if number.isdigit() else None
+        elif path == '/list':
+            if 'cursor' in query:
+                page = self._cursors.get(query['cursor'][0])
+            else:
+                number = query.get('page', ['1'])[0]
+                page = int(number) if number.isdigit() else None
+        else:
+            return None
+        return page if page and 1 <= page <= self.pages else None
+
+
+class PortalHandler(QuietHandler):
+    """按地址分发到模拟教务系统的各个页面"""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def portal(self) -> FakePortal:
+        return self.server.portal
+
+    def logged_in(self) -> bool:
+        if not self.portal.settings.require_login:
+            return True
+        return f"{SESSION_COOKIE}={SESSION_VALUE}" in (self.headers.get('Cookie') or '')
+
+    def send_body(self, status: int, body: bytes, content_type: str, headers: Optional[Dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_html(self, html: str, status: int = 200):
+        self.send_body(status, html.encode('utf-8'), 'text/html; charset=utf-8')
+
+    def do_GET(self):
+        portal = self.portal
+        settings = portal.settings
+        parsed = urlparse(self.path)
+        path, query = parsed.path, parse_qs(parsed.query)
+
+        if path == '/login':
+            portal.count('login')
+            self.send_body(302, b'', 'text/html', {
+                'Location': portal.page_url(1),
+                'Set-Cookie': f"{SESSION_COOKIE}={SESSION_VALUE}; Path=/"
+                              + ("; Max-Age=86400" if settings.remember_login else ""),
+            })
+            return
+
+        if not path.startswith(('/login', '/static/')) and not portal.admit():
+            self.send_body(429, b'Too Many Requests', 'text/plain',
+                           {'Retry-After': str(settings.retry_after)})
+            return
+
+        if path.startswith('/photos/'):
+            time.sleep(settings.photo_latency)
+            index = portal.photo_index(path)
+            if index is None:
+                self.send_html('<h1>404</h1>', 404)
+            elif not self.logged_in():
+                # 真实系统在会话失效时返回登录页而不是图片
+                self.send_html('<html><body>请先登录</body></html>')
+            else:
+                body = portal.photo_bytes_for(index)
+                portal.count('photo', len(body))
+                self.send_body(200, body, 'image/jpeg')
+            return
+
+        if path.startswith('/static/'):
+            time.sleep(settings.asset_latency)
+            portal.count('asset')
+            if path.endswith('.css'):
+                self.send_body(200, b'.header img { display: block; }', 'text/css')
+            else:
+                self.send_body(200, portal.banner_png, 'image/png')
+            return
+
+        time.sleep(settings.latency)
+        page = portal.roster_page(path, query)
+        if page is not None:
+            if not self.logged_in():
+                self.send_html('<html><body>请先登录</body></html>')
+                return
+            portal.count('roster')
+            self.send_html(portal.roster_html(page))
+        elif path == '/student/info':
+            xh = query.get('xh', [''])[0]
+            index = int(xh[4:]) if xh.startswith('2021') and xh[4:].isdigit() else -1
+            if not 0 <= index < settings.students:
+                self.send_html('<h1>404</h1>', 404)
+            elif not self.logged_in():
+                self.send_html('<html><body>请先登录</body></html>')
+            else:
+                portal.count('detail')
+                self.send_html(portal.detail_html(index))
+        else:
+            self.send_html('<h1>404</h1>', 404)
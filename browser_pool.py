@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多浏览器工作池 - 多个无头Chrome共享操作员登录后的cookies，并行处理学生详情页
+"""
+
+import logging
+import queue
+import threading
+from typing import Dict, List
+
+log = logging.getLogger(__name__)
+
+# add_cookie 接受的字段
+_COOKIE_FIELDS = ('name', 'value', 'path', 'domain', 'secure', 'httpOnly', 'expiry', 'sameSite')
+
+
+def share_session(driver, cookies: List[Dict], origin_url: str) -> int:
+    """打开来源页面所在的域，再写入登录cookies，返回成功写入的数量"""
+    driver.get(origin_url)
+    added = 0
+    for cookie in cookies:
+        try:
+            driver.add_cookie({k: v for k, v in cookie.items() if k in _COOKIE_FIELDS})
+            added += 1
+        except Exception:
+            continue  # 其他域的cookie无法在当前页面写入
+    return added
+
+
+class BrowserWorkerPool:
+    """N个无头浏览器从共享队列中取学生，各自执行 process_student
+
+    每个工作线程持有一个独立的抓取器实例和浏览器，但共用主抓取器的
+    下载池和抓取日志，结果汇总到同一个下载目录。
+    """
+
+    _SENTINEL = None
+
+    def __init__(self, scraper, workers: int):
+        self.scraper = scraper
+        self.workers = workers
+        self.queue = queue.Queue()
+
+        self.processed = 0
+        self.found = 0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._ready = threading.Semaphore(0)
+        self._alive = 0
+        self._closed = False
+
+    def start(self, cookies: List[Dict], origin_url: str):
+        """启动工作浏览器，等待它们完成登录状态同步"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(cookies, origin_url),
+                                      name=f"browser-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        for _ in self._threads:
+            self._ready.acquire()
+        log.info(f"✓ 浏览器工作池已启动 ({self._alive}/{self.workers} 个浏览器)")
+        return self
+
+    def _spawn_worker(self, cookies: List[Dict], origin_url: str):
+        """创建与主抓取器共享下载池和日志的工作抓取器，并启动它的无头浏览器"""
+        worker = type(self.scraper).for_worker(self.scraper)
+        worker.driver = worker.create_driver(headless=True)
+        share_session(worker.driver, cookies, origin_url)
+        return worker
+
+    def _worker(self, cookies: List[Dict], origin_url: str):
+        """工作线程主循环"""
+        worker = None
+        try:
+            worker = self._spawn_worker(cookies, origin_url)
+            with self._lock:
+                self._alive += 1
+        except Exception as e:
+            log.error(f"✗ 工作浏览器启动失败: {e}")
+            if worker and worker.driver:
+                worker.driver.quit()
+            return
+        finally:
+            self._ready.release()
+
+        try:
+            while True:
+                student = self.queue.get()
+                try:
+                    if student is self._SENTINEL:
+                        return
+                    success = worker.process_student(student)
+                    with self._lock:
+                        self.processed += 1
+                        if success:
+                            self.found += 1
+                finally:
+                    self.queue.task_done()
+        finally:
+            with self._lock:
+                self._alive -= 1
+            worker.driver.quit()
+
+    @property
+    def alive(self) -> int:
+        with self._lock:
+            return self._alive
+
+    def submit(self, student: Dict[str, str]):
+        """提交学生到共享队列"""
+        if self._closed:
+            raise RuntimeError("浏览器工作池已关闭")
+        self.queue.put(student)
+
+    def close(self, cancel: bool = False) -> List[Dict[str, str]]:
+        """等待队列处理完并关闭所有浏览器；返回未处理的学生
+
+        cancel 为True时（如用户中断）丢弃尚未开始的学生，只等待正在处理的完成。
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        leftover: List[Dict[str, str]] = []
+        if cancel:
+            leftover.extend(self._drain())
+        for _ in self._threads:
+            self.queue.put(self._SENTINEL)
+        for thread in self._threads:
+            thread.join()
+
+        leftover.extend(self._drain())
+        log.info(f"✓ 浏览器工作池已关闭: 处理 {self.processed} 个学生，找到照片 {self.found} 个")
+        return leftover
+
+    def _drain(self) -> List[Dict[str, str]]:
+        """取出队列中所有尚未处理的学生"""
+        students = []
+        while True:
+            try:
+                student = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            self.queue.task_done()
+            if student is not self._SENTINEL:
+                students.append(student)
+        return students
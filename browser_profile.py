@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精简浏览器配置 - 详情页只需要文档、页面脚本和照片：
+用 pageLoadStrategy 'eager' 让导航在DOM就绪时返回，并用 DevTools Network.setBlockedURLs
+屏蔽样式表、字体、统计脚本、横幅图标等与照片无关的资源
+
+setBlockedURLs 只支持通配符屏蔽列表（不支持"只放行照片"），且只作用于当前窗口，
+新打开的窗口需要重新调用 block_resources。
+"""
+
+import logging
+from typing import List, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+def apply_page_load_strategy(options, strategy: Optional[str] = None):
+    """'normal' 等待全部资源 / 'eager' DOM就绪即返回 / 'none' 不等待（创建浏览器前设置）"""
+    options.page_load_strategy = strategy or Config.LEAN_PROFILE['page_load_strategy']
+    return options
+
+
+def block_resources(driver, patterns: Optional[List[str]] = None) -> bool:
+    """屏蔽当前窗口中与照片无关的资源请求，返回是否成功"""
+    patterns = Config.LEAN_PROFILE['blocked_urls'] if patterns is None else patterns
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+        return True
+    except WebDriverException as e:
+        log.warning(f"⚠ 无法屏蔽页面资源，按完整页面加载: {e}")
+        return False
+
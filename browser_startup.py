@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器冷启动 - ChromeDriverManager().install() 每次都要联网查询驱动版本（离线时直接失败），
+这里按本机Chrome的主版本缓存解析到的chromedriver路径，版本不变时不再联网；也可以直接指定驱动路径。
+
+可选的保留浏览器配置目录（user-data-dir）：登录状态随配置保存，
+并在其中记下上次的学生列表地址，下次启动时登录仍有效就直接开始，无需操作员确认。
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import subprocess
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+_VERSION_RE = re.compile(r'\d+\.\d+\.\d+\.\d+')
+
+# 各平台读取Chrome版本的命令（不启动浏览器窗口）
+CHROME_VERSION_COMMANDS: Dict[str, List[List[str]]] = {
+    'win32': [
+        ['reg', 'query', r'HKEY_CURRENT_USER\Software\Google\Chrome\BLBeacon', '/v', 'version'],
+        ['reg', 'query', r'HKEY_LOCAL_MACHINE\Software\Google\Chrome\BLBeacon', '/v', 'version'],
+    ],
+    'darwin': [
+        ['/Applications/Google Chrome.app/Contents/MacOS/Google Chrome', '--version'],
+        ['/Applications/Chromium.app/Contents/MacOS/Chromium', '--version'],
+    ],
+    'linux': [
+        ['google-chrome', '--version'],
+        ['google-chrome-stable', '--version'],
+        ['chromium', '--version'],
+        ['chromium-browser', '--version'],
+    ],
+}
+
+
+def detect_chrome_version() -> Optional[str]:
+    """本机Chrome的完整版本号（如 '126.0.6478.126'），找不到时返回None"""
+    platform = 'linux' if sys.platform.startswith('linux') else sys.platform
+    for command in CHROME_VERSION_COMMANDS.get(platform, CHROME_VERSION_COMMANDS['linux']):
+        try:
+            output = subprocess.run(command, capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = _VERSION_RE.search(output or '')
+        if match:
+            return match.group(0)
+    return None
+
+
+class DriverCache:
+    """Chrome主版本 -> chromedriver路径 的本机缓存（JSON文件）"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = os.path.expanduser(path or Config.DRIVER_SETTINGS['cache_file'])
+        self.entries: Dict[str, Dict] = {}
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key: str) -> Optional[str]:
+        """缓存中该版本的驱动路径（文件已被删除时视为未缓存）"""
+        entry = self.entries.get(key)
+        if entry and os.path.isfile(entry.get('path', '')):
+            return entry['path']
+        return None
+
+    def put(self, key: str, path: str, chrome_version: Optional[str]):
+        self.entries[key] = {'path': path, 'chrome': chrome_version,
+                             'resolved_at': datetime.now().isoformat(timespec='seconds')}
+        self.save()
+
+    def forget(self, path: str) -> bool:
+        """删除指向 path 的缓存项（驱动与更新后的Chrome不匹配时），返回是否删除了缓存项"""
+        stale = [key for key, entry in self.entries.items() if entry.get('path') == path]
+        for key in stale:
+            del self.entries[key]
+        if stale:
+            self.save()
+        return bool(stale)
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.debug(f"⚠ 无法写入驱动缓存 {self.path}: {e}")
+
+
+def resolve_chromedriver(override: Optional[str] = None, refresh: bool = False) -> Optional[str]:
+    """chromedriver路径；返回None表示交给Selenium自行查找（PATH 或 Selenium Manager）
+
+    顺序：指定的路径 -> 与本机Chrome主版本对应的缓存 -> webdriver-manager 联网解析（结果写入缓存）。
+    联网失败时使用Selenium自带的查找方式。
+    """
+    override = override or Config.DRIVER_SETTINGS['chromedriver_path']
+    if override:
+        if not os.path.isfile(override):
+            raise FileNotFoundError(f"指定的chromedriver不存在: {override}")
+        log.debug(f"✓ 使用指定的ChromeDriver: {override}")
+        return override
+
+    chrome_version = detect_chrome_version()
+    key = chrome_version.split('.')[0] if chrome_version else 'unknown'
+    cache = DriverCache()
+    cached = None if refresh else cache.get(key)
+    if cached:
+        log.debug(f"✓ 使用缓存的ChromeDriver (Chrome {chrome_version or '版本未知'}): {cached}")
+        return cached
+
+    try:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+    except Exception as e:
+        log.warning(f"⚠ 无法联网解析ChromeDriver，改由Selenium在本机查找: {e}")
+        return None
+    cache.put(key, path, chrome_version)
+    log.info(f"✓ 已解析ChromeDriver (Chrome {chrome_version or '版本未知'})，之后启动直接使用缓存")
+    return path
+
+
+def forget_chromedriver(path: Optional[str]) -> bool:
+    """从缓存中删除不再可用的驱动路径"""
+    return bool(path) and DriverCache().forget(path)
+
+
+def is_driver_version_mismatch(error: Exception) -> bool:
+    """会话创建失败是否因为驱动与Chrome版本不匹配（配置目录被占用、找不到浏览器等其他原因返回False）"""
+    return 'only supports chrome version' in str(error).lower()
+
+
+def load_profile_state(profile_dir: str) -> Dict:
+    """保留的浏览器配置目录中记录的抓取状态（上次的学生列表地址等）"""
+    path = os.path.join(profile_dir, Config.DRIVER_SETTINGS['profile_state_file'])
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_profile_state(profile_dir: str, **fields):
+    """更新配置目录中的抓取状态"""
+    state = load_profile_state(profile_dir)
+    state.update(fields)
+    path = os.path.join(profile_dir, Config.DRIVER_SETTINGS['profile_state_file'])
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+    except OSError as e:
+        log.debug(f"⚠ 无法写入配置目录状态 {path}: {e}")
@@ -27,8 +27,18 @@ class Config:
         "img[alt*='头像']",              # alt包含头像的图片
         ".profile-image img",           # class为profile-image下的图片
         "img.profile-photo",            # class为profile-photo的图片
+        ".id-photo img",                # class为id-photo下的图片
+        "img.id-card",                  # class为id-card的图片
+        ".student-card img",            # class为student-card下的图片
+        "img[src*='head']",            # src包含head的图片
+        "img[src*='face']",            # src包含face的图片
+        ".avatar-img",                  # class为avatar-img的元素
+        "img.avatar",                   # class为avatar的图片
     ]
     
+    # 通用查找时照片地址中可能包含的关键词
+    PHOTO_KEYWORDS = ['photo', 'avatar', 'pic', 'img', 'head', 'face', 'student']
+    
     # 下一页按钮的选择器
     NEXT_PAGE_SELECTORS = [
         "a.next",                       # class为next的链接
@@ -44,6 +54,15 @@ class Config:
         'page_load': 2,                 # 页面加载等待时间
         'photo_load': 3,                # 照片加载等待时间
         'between_requests': 1,          # 请求间隔时间
+        'poll_interval': 0.1,           # 条件轮询间隔
+        'network_idle': 0.3,            # 多久没有新的资源请求视为网络空闲
+    }
+    
+    # 自适应超时：根据最近观测到的页面延迟（p95 * factor）调整，限制在上下限之间
+    ADAPTIVE_WAIT = {
+        'min_timeout': 1,
+        'max_timeout': 15,
+        'factor': 3,
     }
     
     # 文件设置
@@ -51,11 +70,126 @@ class Config:
         'download_dir': 'student_photos',  # 下载目录
         'default_format': 'jpg',            # 默认图片格式
         'max_filename_length': 50,          # 文件名最大长度
+        'journal_file': '.scrape_journal.jsonl',  # 断点续抓日志（位于下载目录中）
+        'selector_stats_file': '.selector_stats.json',  # 选择器命中统计（位于下载目录中）
+        'fetch_index_file': '.fetch_index.json',  # 照片ETag/Last-Modified索引（位于下载目录中）
+        'timings_file': '.timings.jsonl',  # 各阶段耗时事件（位于下载目录中，每次运行重写）
     }
     
     # 浏览器设置
     BROWSER_SETTINGS = {
         'window_size': '1920,1080',         # 浏览器窗口大小
-        'headless': False,                  # 是否无头模式运行
+        'headless': False,                  # 主浏览器是否无头模式运行（无头时无法手动登录，需已有登录状态）
         'timeout': 10,                      # 页面加载超时时间
-    }
\ No newline at end of file
+        'workers': 1,                       # 并行处理详情页的无头浏览器数量（1为只用主浏览器）
+    }
+    
+    # 浏览器启动设置
+    DRIVER_SETTINGS = {
+        'chromedriver_path': None,          # 指定chromedriver路径（--chromedriver），不再自动解析
+        'cache_file': '~/.cache/student_photo_scraper/chromedriver.json',  # 按Chrome主版本缓存的驱动路径
+        'profile_dir': None,                # 保留的浏览器配置目录（--profile），保存登录状态；None为每次使用空白配置
+        'profile_state_file': 'scraper_state.json',  # 配置目录中记录上次学生列表地址的文件
+    }
+    
+    # 精简浏览器配置：处理详情页时只加载文档、脚本和照片（--no-lean 关闭）
+    LEAN_PROFILE = {
+        'enabled': True,
+        'page_load_strategy': 'eager',      # 'normal' 等待全部资源 / 'eager' DOM就绪即返回 / 'none'
+        'blocked_urls': [                   # Network.setBlockedURLs 通配符
+            '*.css', '*.css?*',             # 样式表（照片查找只依赖元素和图片尺寸）
+            '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+            '*.svg', '*.ico', '*.mp4', '*.webm', '*.mp3',
+            '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+            '*hm.baidu.com*', '*cnzz.com*', '*51.la*',
+            '*banner*', '*logo*', '*/icons/*', '*favicon*',
+        ],
+    }
+    
+    # 详情标签页设置：列表页固定在一个标签页，详情页在复用的标签页中打开（不弹出新窗口）
+    TAB_SETTINGS = {
+        'detail_tabs': 1,                   # 详情标签页数量；大于1时提前在空闲标签页加载后面学生的详情页；
+                                            # 0 表示使用旧方式（在列表页点击链接/弹出窗口）
+    }
+    
+    # 照片存储设置
+    STORE_SETTINGS = {
+        'placeholder_threshold': 3,         # 同一图片被多少个学生共用时视为占位图
+        'manifest_flush_every': 20,         # 每保存多少张照片写一次索引
+    }
+    
+    # 图片校验与规范化设置
+    IMAGE_SETTINGS = {
+        'normalize': True,                  # 是否生成限制尺寸的展示版本（.display/ 目录）
+        'display_max_size': 800,            # 展示版本最长边（像素）
+        'display_format': 'JPEG',           # 展示版本格式：JPEG 或 WEBP
+        'display_quality': 85,              # 展示版本压缩质量
+    }
+    
+    # 下载设置
+    DOWNLOAD_SETTINGS = {
+        'workers': 4,                       # 并发下载线程数
+        'queue_size': 64,                   # 下载队列上限（队列满时浏览器线程等待）
+        'pool_connections': 8,              # 每个下载线程的连接池大小
+        'timeout': 15,                      # 单张照片下载超时时间（秒）
+    }
+
+    # 浏览器响应捕获设置：照片直接从浏览器已下载的内容中读取，不再重复请求
+    CAPTURE_SETTINGS = {
+        'enabled': True,                    # 是否开启（需要Chrome性能日志；失败时自动改为HTTP下载）
+        'timeout': 5,                       # 等待照片请求完成的最长时间（秒）
+        'max_responses': 500,               # 记住的最近响应数量
+    }
+
+    # 请求限速：每个主机一个令牌桶，速率和并发上限按响应延迟和错误码自适应调整（加性增、乘性减）
+    RATE_LIMIT = {
+        'enabled': True,                    # --no-rate-limit 关闭（不限速，也不遵守 Retry-After）
+        'initial_rate': 2.0,                # 初始每秒请求数
+        'min_rate': 0.2,
+        'max_rate': 20.0,
+        'burst': 3,                         # 令牌桶容量（允许的瞬时突发请求数）
+        'initial_concurrency': 2,           # 初始同时进行的请求数上限
+        'max_concurrency': 8,
+        'increase': 1.0,                    # 每个正常响应加 increase/当前值（约每轮加 increase）；慢启动阶段每次加 increase
+        'decrease': 0.5,                    # 429/5xx/超时/响应变慢时乘以该系数
+        'slow_factor': 3.0,                 # 响应时间超过平均值的多少倍视为变慢
+        'slow_min': 2.0,                    # 且至少超过多少秒
+        'max_retry_after': 120,             # Retry-After 最多遵守多少秒
+        'retries': 3,                       # 失败学生和下载最多重试次数
+        'retry_base': 2.0,                  # 重试退避基数（秒，每次翻倍）
+        'retry_max': 60.0,                  # 单次退避上限（秒）
+    }
+
+    # 分页预取设置（--pipeline）
+    PAGINATION_SETTINGS = {
+        'http_workers': 4,                  # 按页码并行请求列表页的线程数
+        'max_pages': 200,                   # 最多读取的页数
+    }
+    
+    # 照片地址推断设置
+    INFERENCE_SETTINGS = {
+        'enabled': True,                    # 是否从已处理学生推断照片地址模板
+        'learn_samples': 3,                 # 学习模板所需的学生数
+        'verify_samples': 3,                # 模板生效前需要核对一致的学生数
+        'min_token_length': 4,              # 学生链接中参与匹配的最短片段（避免匹配到页码等短数字）
+        'max_failures': 3,                  # 模板失效次数达到后停用推断
+    }
+    
+    # 照片查看器设置
+    VIEWER_SETTINGS = {
+        'thumbnail_dir': '.thumbs',         # 缩略图磁盘缓存目录（位于照片目录中）
+        'thumbnail_quality': 85,            # 缩略图JPEG质量
+        'size_step': 64,                    # 缩略图尺寸步长（窗口尺寸向下取整到该步长）
+        'memory_cache_size': 64,            # 内存中保留的已渲染照片数
+        'resize_delay_ms': 150,             # 窗口大小停止变化多久后重新渲染当前照片
+        'prefetch_count': 3,                # 后台预先渲染前后各几张照片
+        'prefetch_poll_ms': 30,             # 主线程接收预取结果的间隔（毫秒）
+    }
+    
+    # 抽认卡本地服务设置（flashcard_server.py）
+    SERVER_SETTINGS = {
+        'host': '127.0.0.1',                # 监听地址
+        'port': 8000,                       # 监听端口
+        'thumbnail_size': 512,              # 缩略图最长边（像素）
+        'max_age': 31536000,                # 带版本号的照片/缩略图的浏览器缓存时间（秒）
+    }
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并发照片下载池 - 浏览器线程只负责入队，由多个下载线程并行下载
+"""
+
+import logging
+import queue
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+class DownloadJob(NamedTuple):
+    """一个下载任务"""
+    name: str                   # 学生姓名
+    photo_url: str              # 照片地址
+    referer: str                # 照片所在详情页（作为Referer）
+    cookies: Dict[str, str]     # 浏览器会话cookies
+    student: Optional[Dict[str, str]] = None  # 原始学生记录（用于回写抓取日志）
+    captured: Optional[object] = None  # 浏览器已取到的照片内容（response_capture.CapturedResponse），有则不再请求
+
+
+class PhotoDownloadPool:
+    """有界下载队列 + 固定数量的下载线程
+
+    每个下载线程持有自己的 requests.Session，连接在同一线程的多次下载之间复用。
+    handler(job, session) 负责实际下载，返回是否成功；
+    on_done(job, success) 在下载线程中回报每个任务的结果（抓取器据此把失败的学生写入抓取日志）。
+    """
+
+    _SENTINEL = None
+
+    def __init__(self, handler: Callable[[DownloadJob, requests.Session], bool],
+                 workers: Optional[int] = None, queue_size: Optional[int] = None,
+                 on_done: Optional[Callable[[DownloadJob, bool], None]] = None):
+        settings = Config.DOWNLOAD_SETTINGS
+        self.handler = handler
+        self.on_done = on_done
+        self.workers = workers or settings['workers']
+        self.queue = queue.Queue(maxsize=queue_size or settings['queue_size'])
+        self.pool_connections = settings['pool_connections']
+
+        self.downloaded = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._closed = False
+
+    def start(self):
+        """启动下载线程"""
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"photo-download-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        log.info(f"✓ 下载池已启动 ({self.workers} 个线程)")
+        return self
+
+    def _make_session(self) -> requests.Session:
+        """创建带连接池的Session"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_connections)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _worker(self):
+        """下载线程主循环"""
+        session = self._make_session()
+        try:
+            while True:
+                job = self.queue.get()
+                try:
+                    if job is self._SENTINEL:
+                        return
+                    try:
+                        success = bool(self.handler(job, session))
+                    except Exception as e:
+                        log.error(f"✗ 下载线程出错 {job.name}: {e}")
+                        success = False
+
+                    with self._lock:
+                        if success:
+                            self.downloaded += 1
+                        else:
+                            self.failed += 1
+
+                    if self.on_done:
+                        try:
+                            self.on_done(job, success)
+                        except Exception as e:
+                            log.warning(f"⚠ 下载回调出错 {job.name}: {e}")
+                finally:
+                    self.queue.task_done()
+        finally:
+            session.close()
+
+    def submit(self, job: DownloadJob):
+        """提交下载任务（队列满时阻塞，防止内存无限增长）"""
+        if self._closed:
+            raise RuntimeError("下载池已关闭")
+        self.queue.put(job)
+
+    def pending(self) -> int:
+        """队列中尚未开始的任务数"""
+        return self.queue.qsize()
+
+    def close(self, wait: bool = True):
+        """停止接收任务，等待已入队的任务全部完成"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self.queue.put(self._SENTINEL)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        log.info(f"✓ 下载池已关闭: 成功 {self.downloaded}，失败 {self.failed}")
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+照片缓存验证索引 - 记录每个照片地址的 ETag / Last-Modified / Content-Length，
+再次抓取时发送条件请求，未变化的照片只需一个 304 响应
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+class FetchIndex:
+    """{照片地址: {'etag', 'last_modified', 'content_length', 'sha256', 'checked_at'}}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.records = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"⚠ 读取缓存验证索引失败，本次 --refresh 将重新下载全部照片: {e}")
+
+    def get(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            record = self.records.get(url)
+            return dict(record) if record else None
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """根据已保存的验证信息生成条件请求头"""
+        record = self.get(url) or {}
+        headers = {}
+        if record.get('etag'):
+            headers['If-None-Match'] = record['etag']
+        if record.get('last_modified'):
+            headers['If-Modified-Since'] = record['last_modified']
+        return headers
+
+    def update(self, url: str, response_headers, sha256: Optional[str] = None):
+        """记录200响应的验证信息"""
+        with self._lock:
+            record = self.records.setdefault(url, {})
+            record['etag'] = response_headers.get('ETag')
+            record['last_modified'] = response_headers.get('Last-Modified')
+            record['content_length'] = response_headers.get('Content-Length')
+            if sha256:
+                record['sha256'] = sha256
+            record['checked_at'] = time.time()
+            self._dirty = True
+
+    def touch(self, url: str, response_headers=None):
+        """记录一次304响应（服务器可能下发新的ETag）"""
+        with self._lock:
+            record = self.records.setdefault(url, {})
+            if response_headers is not None and response_headers.get('ETag'):
+                record['etag'] = response_headers['ETag']
+            record['checked_at'] = time.time()
+            self._dirty = True
+
+    def save(self):
+        """原子写入"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.records, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抽认卡本地服务 - 提供 flashcard.html、照片索引（JSON）、照片原图/展示版本和磁盘缓存的缩略图
+
+- 照片和缩略图地址带版本号（修改时间+大小），以强缓存头发送，再次打开时直接使用浏览器缓存
+- 支持 ETag 条件请求和 Range 请求
+- 用法: python3 flashcard_server.py --dir student_photos，然后访问 http://localhost:8000/
+"""
+
+import os
+import json
+import hashlib
+import mimetypes
+import http.server
+from email.utils import formatdate
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from PIL import Image
+
+from config import Config
+from photo_scan import iter_photo_files
+from photo_store import load_manifest
+from thumbnail_cache import ThumbnailCache
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _version(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def build_photo_index(photo_dir: str) -> List[Dict[str, str]]:
+    """照片索引：[{name, url, thumb}]，优先使用抓取程序的 manifest.json（学生姓名、展示版本）"""
+    manifest = load_manifest(photo_dir)
+    if manifest is not None:
+        items = [(entry['name'], entry.get('display') or entry['file'])
+                 for entry in manifest.get('entries', {}).values()
+                 if entry.get('file') and not entry.get('placeholder')]
+    else:
+        items = [(os.path.splitext(os.path.basename(path))[0], os.path.basename(path))
+                 for path in iter_photo_files(photo_dir)]
+
+    index = []
+    for name, relpath in sorted(items):
+        try:
+            version = _version(os.path.join(photo_dir, relpath))
+        except OSError:
+            continue  # 索引中的文件已被删除
+        quoted = quote(relpath.replace(os.sep, '/'))
+        index.append({
+            'name': name,
+            'url': f"/photos/{quoted}?v={version}",
+            'thumb': f"/thumbs/{quoted}?v={version}",
+        })
+    return index
+
+
+class FlashcardServer(http.server.ThreadingHTTPServer):
+    """保存照片目录和缩略图缓存，供请求处理器使用"""
+
+    def __init__(self, address: Tuple[str, int], photo_dir: str):
+        super().__init__(address, FlashcardHandler)
+        self.photo_dir = os.path.realpath(photo_dir)  # 与 photo_path 中解析符号链接后的路径比较
+        self.thumbnails = ThumbnailCache(os.path.join(self.photo_dir, Config.VIEWER_SETTINGS['thumbnail_dir']))
+
+
+class FlashcardHandler(http.server.BaseHTTPRequestHandler):
+    server_version = "FlashcardServer/1.0"
+    protocol_version = "HTTP/1.1"  # 保持连接，连续请求缩略图时复用
+
+    def log_message(self, format, *args):
+        pass  # 不逐个打印请求
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def end_headers(self):
+        super().end_headers()
+        self.headers_sent = True
+
+    def do_GET(self, head: bool = False):
+        parsed = urlparse(self.path)
+        path = unquote(parsed.path)
+        self.headers_sent = False
+        try:
+            if path in ('/', '/index.html'):
+                self.send_response(302)
+                self.send_header('Location', '/flashcard.html')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+            elif path == '/flashcard.html':
+                self.send_file(os.path.join(PROJECT_DIR, 'flashcard.html'), 'no-cache', head)
+            elif path == '/api/photos':
+                self.send_index(head)
+            elif path.startswith('/photos/'):
+                source = self.photo_path(path[len('/photos/'):])
+                if source:
+                    self.send_file(source, self.immutable_cache(parsed.query), head)
+                else:
+                    self.send_error(404)
+            elif path.startswith('/thumbs/'):
+                source = self.photo_path(path[len('/thumbs/'):])
+                if source:
+                    size = Config.SERVER_SETTINGS['thumbnail_size']
+                    try:
+                        thumb = self.server.thumbnails.get_path(source, (size, size))
+                    except Image.DecompressionBombError as e:
+                        # 像素数超过Pillow上限的图片不生成缩略图
+                        self.send_error(500, explain=str(e))
+                        return
+                    self.send_file(thumb, self.immutable_cache(parsed.query), head)
+                else:
+                    self.send_error(404)
+            else:
+                self.send_error(404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 浏览器取消了请求（快速翻页时常见）
+        except OSError as e:
+            if self.headers_sent:
+                # 响应头已经发出，只能断开连接（浏览器会看到不完整的响应）
+                self.close_connection = True
+            else:
+                self.send_error(500, explain=str(e))
+
+    def photo_path(self, relpath: str) -> Optional[str]:
+        """照片目录内的文件路径；越出照片目录或不存在时返回None"""
+        root = self.server.photo_dir
+        full = os.path.realpath(os.path.join(root, relpath))
+        if not full.startswith(root + os.sep) or not os.path.isfile(full):
+            return None
+        return full
+
+    @staticmethod
+    def immutable_cache(query: str) -> str:
+        """地址带版本号时内容不会变化，可以长期缓存"""
+        if 'v' in parse_qs(query):
+            return f"public, max-age={Config.SERVER_SETTINGS['max_age']}, immutable"
+        return 'no-cache'
+
+    def send_index(self, head: bool):
+        body = json.dumps(build_photo_index(self.server.photo_dir), ensure_ascii=False).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('ETag', etag)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def parse_range(self, size: int) -> Optional[Tuple[int, int]]:
+        """解析单个 bytes 范围，返回 (start, end)；无效范围返回 (-1, -1)"""
+        header = self.headers.get('Range')
+        if not header or not header.startswith('bytes=') or ',' in header:
+            return None
+        start_text, _, end_text = header[len('bytes='):].strip().partition('-')
+        try:
+            if start_text:
+                start = int(start_text)
+                end = int(end_text) if end_text else size - 1
+            else:
+                start = max(size - int(end_text), 0)  # bytes=-N 表示最后N个字节
+                end = size - 1
+        except ValueError:
+            return None
+        if start >= size or start > end:
+            return -1, -1
+        return start, min(end, size - 1)
+
+    def send_file(self, path: str, cache_control: str, head: bool):
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.end_headers()
+            return
+
+        size = stat.st_size
+        byte_range = self.parse_range(size)
+        if byte_range == (-1, -1):
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{size}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        start, end = byte_range or (0, size - 1)
+        length = max(end - start + 1, 0)
+
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Type', mimetypes.guess_type(path)[0] or 'application/octet-stream')
+        self.send_header('Content-Length', str(length))
+        self.send_header('Accept-Ranges', 'bytes')
+        if byte_range:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(stat.st_mtime, usegmt=True))
+        self.send_header('Cache-Control', cache_control)
+        self.end_headers()
+        if head:
+            return
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(64 * 1024, remaining))
+                if not chunk:
+                    break
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+
+def main():
+    import argparse
+
+    settings = Config.SERVER_SETTINGS
+    parser = argparse.ArgumentParser(description="学生照片抽认卡本地服务")
+    parser.add_argument("--dir", default="student_photos", help="照片目录")
+    parser.add_argument("--host", default=settings['host'], help="监听地址")
+    parser.add_argument("--port", type=int, default=settings['port'], help="监听端口")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        print(f"目录 {args.dir} 不存在，请先运行照片抓取脚本")
+        return
+
+    server = FlashcardServer((args.host, args.port), args.dir)
+    print(f"🌐 抽认卡已启动: http://{args.host}:{args.port}/")
+    print(f"📁 照片目录: {server.photo_dir}")
+    print("按 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ 已停止")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
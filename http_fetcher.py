@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTTP快速通道 - 复用浏览器登录后的cookies，直接请求详情页HTML并解析照片地址，
+无需Chrome导航；需要JavaScript渲染的页面返回None，由调用方回退到Selenium
+"""
+
+import logging
+import re
+import requests
+from html.parser import HTMLParser
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from config import Config
+from rate_limiter import RateLimiter, Throttled
+
+log = logging.getLogger(__name__)
+
+# 简单CSS选择器的单个片段：标签、#id、.class、[属性*='值']
+_SIMPLE_SELECTOR_RE = re.compile(
+    r"^(?P<tag>[a-zA-Z][\w-]*)?"
+    r"(?P<parts>(?:[#.][\w-]+|\[[\w-]+(?:[*^$]?=['\"]?[^'\"\]]*['\"]?)?\])*)$"
+)
+_PART_RE = re.compile(r"([#.])([\w-]+)|\[([\w-]+)(?:([*^$]?=)['\"]?([^'\"\]]*)['\"]?)?\]")
+
+
+class SimpleSelector:
+    """支持 Config 中使用的选择器子集：'img.cls'、'.cls img'、'img[src*=x]'、'#id'"""
+
+    def __init__(self, selector: str):
+        self.selector = selector
+        steps = selector.split()
+        self.target = self._parse(steps[-1])
+        self.ancestors = [self._parse(step) for step in steps[:-1]]
+        self.valid = self.target is not None and all(a is not None for a in self.ancestors)
+
+    @staticmethod
+    def _parse(step: str) -> Optional[Dict]:
+        match = _SIMPLE_SELECTOR_RE.match(step)
+        if not match:
+            return None
+        compound = {'tag': (match.group('tag') or '').lower(), 'ids': [], 'classes': [], 'attrs': []}
+        for kind, name, attr, op, value in _PART_RE.findall(match.group('parts')):
+            if kind == '#':
+                compound['ids'].append(name)
+            elif kind == '.':
+                compound['classes'].append(name)
+            else:
+                compound['attrs'].append((attr, op, value))
+        return compound
+
+    @staticmethod
+    def _matches(compound: Dict, tag: str, attrs: Dict[str, str]) -> bool:
+        if compound['tag'] and compound['tag'] != tag:
+            return False
+        if any(attrs.get('id') != id_ for id_ in compound['ids']):
+            return False
+        classes = attrs.get('class', '').split()
+        if any(cls not in classes for cls in compound['classes']):
+            return False
+        for attr, op, value in compound['attrs']:
+            actual = attrs.get(attr)
+            if actual is None:
+                return False
+            if op == '*=' and value not in actual:
+                return False
+            if op == '^=' and not actual.startswith(value):
+                return False
+            if op == '$=' and not actual.endswith(value):
+                return False
+            if op == '=' and actual != value:
+                return False
+        return True
+
+    def matches(self, tag: str, attrs: Dict[str, str], stack: List[Tuple[str, Dict[str, str]]]) -> bool:
+        """stack 为从根到父元素的祖先链"""
+        if not self.valid or not self._matches(self.target, tag, attrs):
+            return False
+        # 祖先按顺序匹配（后代组合器）
+        remaining = list(self.ancestors)
+        for ancestor_tag, ancestor_attrs in reversed(stack):
+            if not remaining:
+                break
+            if self._matches(remaining[-1], ancestor_tag, ancestor_attrs):
+                remaining.pop()
+        return not remaining
+
+
+class _ImageCollector(HTMLParser):
+    """收集页面中的图片及其祖先链"""
+
+    _VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                  'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[Tuple[str, Dict[str, str]]] = []
+        self.images: List[Tuple[Dict[str, str], List[Tuple[str, Dict[str, str]]]]] = []
+
+    def handle_starttag(self, tag, attrs):
+        attr_dict = {k: (v or '') for k, v in attrs}
+        if tag == 'img':
+            self.images.append((attr_dict, list(self.stack)))
+        if tag not in self._VOID_TAGS:
+            self.stack.append((tag, attr_dict))
+
+    def handle_startendtag(self, tag, attrs):
+        attr_dict = {k: (v or '') for k, v in attrs}
+        if tag == 'img':
+            self.images.append((attr_dict, list(self.stack)))
+
+    def handle_endtag(self, tag):
+        # 容忍未闭合的标签
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                del self.stack[i:]
+                break
+
+
+class _LinkCollector(_ImageCollector):
+    """收集带 href / onclick 的元素及其文字（学生列表页）"""
+
+    def __init__(self):
+        super().__init__()
+        self.links: List[Dict] = []
+        self._open: List[Tuple[str, Dict]] = []
+
+    def handle_starttag(self, tag, attrs):
+        attr_dict = {k: (v or '') for k, v in attrs}
+        if ('href' in attr_dict or 'onclick' in attr_dict) and tag not in self._VOID_TAGS:
+            link = {'tag': tag, 'attrs': attr_dict, 'stack': list(self.stack), 'text': []}
+            self.links.append(link)
+            self._open.append((tag, link))
+        super().handle_starttag(tag, attrs)
+
+    def handle_data(self, data):
+        for _, link in self._open:
+            link['text'].append(data)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._open) - 1, -1, -1):
+            if self._open[i][0] == tag:
+                del self._open[i:]
+                break
+        super().handle_endtag(tag)
+
+
+# JavaScript调用参数中的字符串和数字字面量（与 EXTRACT_ROSTER_JS 一致）
+_LITERAL_RE = re.compile(r"""(['"])((?:\\.|(?!\1)[^\\])*)\1|(-?\d+(?:\.\d+)?)""")
+_URL_LIKE_RE = re.compile(r"^(https?:)?//|[/?]|\.(do|action|jsp|aspx?|php|html?)(\?|#|$)", re.IGNORECASE)
+
+
+def _call_args(code: str) -> List[str]:
+    start, end = code.find('('), code.rfind(')')
+    if start < 0 or end <= start:
+        return []
+    return [number if number else string
+            for _, string, number in _LITERAL_RE.findall(code[start + 1:end])]
+
+
+def _roster_entry(link: Dict, base_url: str, min_name: int) -> Optional[Dict]:
+    name = ' '.join(''.join(link['text']).split())
+    if len(name) < min_name:
+        return None
+    raw_href = link['attrs'].get('href', '').strip()
+    onclick = link['attrs'].get('onclick', '')
+    is_script = raw_href.lower().startswith('javascript:')
+
+    if raw_href and not is_script and not raw_href.startswith('#'):
+        url = urljoin(base_url, raw_href)
+        payload = _call_args(onclick) if onclick else []
+    elif is_script or onclick:
+        payload = _call_args(raw_href if is_script else onclick)
+        if is_script and onclick:
+            payload += _call_args(onclick)
+        url = next((urljoin(base_url, arg) for arg in payload if _URL_LIKE_RE.search(arg)), None)
+        if not url:
+            url = raw_href if is_script else 'javascript:' + onclick
+    else:
+        return None
+    return {'name': name, 'url': url, 'onclick': onclick, 'payload': payload, 'row': []}
+
+
+def extract_roster(html: str, base_url: str, selectors: List[str], min_name: int = 2) -> Dict:
+    """从静态HTML中提取学生列表，返回格式与 EXTRACT_ROSTER_JS 相同（row 为空）"""
+    collector = _LinkCollector()
+    collector.feed(html)
+    collector.close()
+
+    for index, selector in enumerate(selectors):
+        compiled = SimpleSelector(selector)
+        students = []
+        for link in collector.links:
+            if compiled.matches(link['tag'], link['attrs'], link['stack']):
+                entry = _roster_entry(link, base_url, min_name)
+                if entry:
+                    students.append(entry)
+        if students:
+            return {'selector': selector, 'index': index, 'students': students}
+    return {'selector': None, 'index': -1, 'students': []}
+
+
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*['"]?([\w-]+)""", re.IGNORECASE)
+
+
+def page_text(response: requests.Response) -> str:
+    """响应的HTML文本；Content-Type 未声明编码时按页面 <meta charset> 解码
+    （requests 默认按 ISO-8859-1 解码，中文姓名会变成乱码）"""
+    if 'charset' not in response.headers.get('content-type', '').lower():
+        match = _META_CHARSET_RE.search(response.content[:2048])
+        response.encoding = match.group(1).decode('ascii') if match else response.apparent_encoding
+    return response.text
+
+
+def _attr_size(attrs: Dict[str, str], name: str) -> int:
+    match = re.match(r'\s*(\d+)', attrs.get(name, ''))
+    return int(match.group(1)) if match else 0
+
+
+def extract_photo_url(html: str, base_url: str, selectors: Optional[List[str]] = None) -> Optional[str]:
+    """从静态HTML中找出照片地址，规则与 find_photo_element 保持一致"""
+    collector = _ImageCollector()
+    collector.feed(html)
+    collector.close()
+
+    images = [(attrs, stack) for attrs, stack in collector.images
+              if attrs.get('src') and not attrs['src'].startswith('data:')]
+
+    # 按选择器优先级查找；静态HTML没有布局信息，只有显式声明的尺寸才用来排除小图
+    for selector in (selectors or Config.STUDENT_PHOTO_SELECTORS):
+        compiled = SimpleSelector(selector)
+        for attrs, stack in images:
+            if not compiled.matches('img', attrs, stack):
+                continue
+            width, height = _attr_size(attrs, 'width'), _attr_size(attrs, 'height')
+            if (width and width <= 50) or (height and height <= 50):
+                continue
+            return urljoin(base_url, attrs['src'])
+
+    # 通用查找：地址中包含照片关键词、且明确声明了照片大小的图片。关键词（img、pic、head 等）
+    # 也会出现在徽标、横幅的地址里，没有声明尺寸时无法区分，交给浏览器按实际尺寸判断
+    for attrs, _ in images:
+        src_lower = attrs['src'].lower()
+        if any(keyword in src_lower for keyword in Config.PHOTO_KEYWORDS):
+            width, height = _attr_size(attrs, 'width'), _attr_size(attrs, 'height')
+            if width < 100 or height < 100:
+                continue
+            return urljoin(base_url, attrs['src'])
+
+    return None
+
+
+class HttpDetailFetcher:
+    """用浏览器cookies直接请求详情页"""
+
+    def __init__(self, cookies: Dict[str, str], user_agent: Optional[str] = None, workers: int = 4,
+                 limiter: Optional[RateLimiter] = None):
+        self.workers = workers
+        self.limiter = limiter or RateLimiter(enabled=False)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.cookies.update(cookies)
+        self.session.headers.update({
+            'User-Agent': user_agent or 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        })
+        self.selectors: Optional[List[str]] = None  # 为None时使用 Config 中的顺序
+        self.hits = 0       # 解析到照片地址的详情页数
+        self.misses = 0     # 回退到浏览器的详情页数
+
+    def fetch_photo_url(self, url: str, referer: Optional[str] = None) -> Optional[str]:
+        """请求详情页并解析照片地址；失败或需要JavaScript时返回None"""
+        if not url.startswith('http'):
+            return None
+        try:
+            headers = {'Referer': referer} if referer else None
+            with self.limiter.request(url) as slot:
+                response = self.session.get(url, headers=headers, timeout=Config.DOWNLOAD_SETTINGS['timeout'])
+                slot.observe(response.status_code, response.headers)
+            response.raise_for_status()
+            if 'html' not in response.headers.get('content-type', 'text/html').lower():
+                return None
+            photo_url = extract_photo_url(page_text(response), response.url, self.selectors)
+        except (requests.exceptions.RequestException, Throttled) as e:
+            # 被限流的学生交给浏览器处理（同样受限速，失败后进入重试队列）
+            log.debug(f"⚠ HTTP获取详情页失败 {url}: {e}")
+            photo_url = None
+        return photo_url
+
+    def fetch_roster(self, url: str, selectors: List[str], referer: Optional[str] = None) -> Optional[Dict]:
+        """请求学生列表页并提取学生，返回 extract_roster 的结果（含命中的选择器）；请求失败时返回None"""
+        try:
+            headers = {'Referer': referer} if referer else None
+            with self.limiter.request(url) as slot:
+                response = self.session.get(url, headers=headers, timeout=Config.DOWNLOAD_SETTINGS['timeout'])
+                slot.observe(response.status_code, response.headers)
+            response.raise_for_status()
+        except (requests.exceptions.RequestException, Throttled) as e:
+            log.warning(f"⚠ HTTP获取列表页失败 {url}: {e}")
+            return None
+        return extract_roster(page_text(response), response.url, selectors)
+
+    def fetch_many(self, students: List[Dict[str, str]], referer: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """并行请求多个详情页，返回 {学生url: 照片地址}"""
+        urls = [student['url'] for student in students if student['url'].startswith('http')]
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = dict(zip(urls, executor.map(lambda u: self.fetch_photo_url(u, referer), urls)))
+        found = sum(1 for photo_url in results.values() if photo_url)
+        self.hits += found
+        self.misses += len(results) - found
+        return results
+
+    def close(self):
+        self.session.close()
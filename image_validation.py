@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+图片校验与规范化 - 下载时按文件头识别真实格式（挡住以 image/* 返回的HTML错误页），
+下载完成后用Pillow解码一次（JPEG使用draft模式按目标尺寸解码），拒绝损坏的图片，
+并生成限制尺寸的展示版本（JPEG/WebP），查看器和导出只需读取这个小文件
+"""
+
+import os
+import tempfile
+from typing import NamedTuple, Optional
+
+from config import Config
+
+# (文件头, 扩展名)
+_MAGIC_NUMBERS = [
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'BM', '.bmp'),
+]
+
+DISPLAY_EXTENSIONS = {'JPEG': '.jpg', 'WEBP': '.webp'}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """根据文件头判断图片格式，返回扩展名；不是支持的图片时返回None"""
+    for magic, ext in _MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return ext
+    if len(head) >= 12 and head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+class ImageSniffer:
+    """在 iter_content 的数据块上识别格式，收到足够的文件头后即可判定"""
+
+    HEAD_SIZE = 12
+
+    def __init__(self):
+        self._head = b''
+        self.ext: Optional[str] = None
+        self.decided = False
+
+    def feed(self, chunk: bytes) -> bool:
+        """返回False表示已确定不是图片，调用方应立即停止下载"""
+        if not self.decided:
+            self._head += chunk[:self.HEAD_SIZE - len(self._head)]
+            if len(self._head) >= self.HEAD_SIZE:
+                self._decide()
+        return not self.decided or self.ext is not None
+
+    def finish(self) -> bool:
+        """数据结束（文件头不足 HEAD_SIZE 的极小文件）"""
+        if not self.decided:
+            self._decide()
+        return self.ext is not None
+
+    def _decide(self):
+        self.ext = sniff_image_type(self._head)
+        self.decided = True
+
+
+class ImageCheck(NamedTuple):
+    """解码校验结果"""
+    valid: bool
+    width: Optional[int] = None
+    height: Optional[int] = None
+    display_path: Optional[str] = None   # 规范化后的展示版本（临时文件，由照片存储接管）
+    display_ext: Optional[str] = None
+    reason: str = ''
+
+
+def check_and_normalize(path: str, tmp_dir: Optional[str] = None) -> ImageCheck:
+    """解码一次图片：损坏时返回 valid=False；按设置生成展示版本
+
+    没有安装Pillow时只能依赖文件头校验，视为有效且不生成展示版本。
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return ImageCheck(valid=True)
+
+    settings = Config.IMAGE_SETTINGS
+    max_size = settings['display_max_size']
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            if image.format == 'JPEG':
+                # 按DCT缩放解码，只需要不小于目标尺寸的分辨率
+                image.draft('RGB', (max_size, max_size))
+            image.load()  # 截断或损坏的图片在这里抛出异常
+
+            if not settings['normalize']:
+                return ImageCheck(valid=True, width=width, height=height)
+
+            if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+                rgba = image.convert('RGBA')
+                image = Image.new('RGB', rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel('A'))
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+            image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+            display_format = settings['display_format']
+            display_ext = DISPLAY_EXTENSIONS[display_format]
+            fd, display_path = tempfile.mkstemp(dir=tmp_dir or os.path.dirname(path), suffix=display_ext)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    image.save(f, display_format, quality=settings['display_quality'], optimize=True)
+            except BaseException:
+                # 编码或写入失败时不留下写了一半的临时文件
+                os.unlink(display_path)
+                raise
+            return ImageCheck(valid=True, width=width, height=height,
+                              display_path=display_path, display_ext=display_ext)
+    except Exception as e:
+        return ImageCheck(valid=False, reason=str(e) or type(e).__name__)
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+页面脚本 - 通过一次 execute_script 在浏览器内完成的查找逻辑，避免逐个元素的WebDriver往返
+"""
+
+# 照片候选查找
+# 参数: arguments[0] 选择器列表（按优先级），arguments[1] 照片关键词列表
+# 返回: 按优先级排序的候选列表 [{src, tier, selector, width, height, visible, alt}]
+#   tier 1 - 标准选择器命中，尺寸 > 50x50
+#   tier 2 - 任意可见图片，尺寸 >= 100x100 且地址含照片关键词
+#   tier 3 - 任意可见图片，宽度 >= 100
+FIND_PHOTO_CANDIDATES_JS = r"""
+var selectors = arguments[0] || [];
+var keywords = arguments[1] || [];
+
+function describe(el) {
+    var src = el.tagName === 'IMG' ? (el.currentSrc || el.src) : el.getAttribute('src');
+    if (!src || src.indexOf('data:') === 0) {
+        return null;
+    }
+    var rect = el.getBoundingClientRect();
+    var style = window.getComputedStyle(el);
+    var visible = rect.width > 0 && rect.height > 0 &&
+        style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0';
+    return {
+        src: src,
+        width: Math.round(rect.width),
+        height: Math.round(rect.height),
+        visible: visible,
+        alt: el.getAttribute('alt') || '',
+        loaded: el.tagName === 'IMG' ? (el.complete && el.naturalWidth > 0) : true
+    };
+}
+
+var candidates = [];
+var seen = {};
+
+function add(info, tier, selector, rank) {
+    var key = tier + '|' + info.src;
+    if (seen[key]) {
+        return;
+    }
+    seen[key] = true;
+    info.tier = tier;
+    info.selector = selector;
+    info.rank = rank;
+    candidates.push(info);
+}
+
+for (var i = 0; i < selectors.length; i++) {
+    var matched;
+    try {
+        matched = document.querySelectorAll(selectors[i]);
+    } catch (e) {
+        continue;  // 浏览器不支持的选择器
+    }
+    for (var j = 0; j < matched.length; j++) {
+        var info = describe(matched[j]);
+        if (info && info.width > 50 && info.height > 50) {
+            add(info, 1, selectors[i], i);
+        }
+    }
+}
+
+var images = document.images;
+for (var k = 0; k < images.length; k++) {
+    var img = describe(images[k]);
+    if (!img || !img.visible) {
+        continue;
+    }
+    var srcLower = img.src.toLowerCase();
+    var hasKeyword = keywords.some(function (kw) { return srcLower.indexOf(kw) !== -1; });
+    if (img.width >= 100 && img.height >= 100 && hasKeyword) {
+        add(img, 2, null, k);
+    } else if (img.width >= 100) {
+        add(img, 3, null, k);
+    }
+}
+
+candidates.sort(function (a, b) {
+    return (a.tier - b.tier) || (a.rank - b.rank);
+});
+return candidates;
+"""
+
+# 网络空闲检测
+# 返回: {ready, idle_ms, resources}，idle_ms 为距最后一个资源请求结束的毫秒数
+NETWORK_IDLE_JS = r"""
+var entries = performance.getEntriesByType('resource');
+var last = 0;
+for (var i = 0; i < entries.length; i++) {
+    last = Math.max(last, entries[i].responseEnd);
+}
+var nav = performance.getEntriesByType('navigation')[0];
+if (nav) {
+    last = Math.max(last, nav.loadEventEnd || nav.responseEnd);
+}
+return {
+    ready: document.readyState === 'complete',
+    idle_ms: performance.now() - last,
+    resources: entries.length
+};
+"""
+
+# 照片是否已加载
+# 参数: arguments[0] 选择器列表
+# 返回: 任一命中的图片已解码完成（complete 且 naturalWidth > 0）时为 true
+PHOTO_LOADED_JS = r"""
+var selectors = arguments[0] || [];
+for (var i = 0; i < selectors.length; i++) {
+    var matched;
+    try {
+        matched = document.querySelectorAll(selectors[i]);
+    } catch (e) {
+        continue;
+    }
+    for (var j = 0; j < matched.length; j++) {
+        var el = matched[j];
+        if (el.tagName === 'IMG' && el.complete && el.naturalWidth > 0 &&
+                (el.currentSrc || el.src).indexOf('data:') !== 0) {
+            return true;
+        }
+    }
+}
+return false;
+"""
+
+# 学生列表提取
+# 参数: arguments[0] 链接选择器列表（按优先级），arguments[1] 姓名最短长度
+# 返回: {selector, index, students: [{name, url, onclick, payload, row}]}
+#   使用第一个能提取到学生的选择器；url 由 URL() 按 document.baseURI 解析为绝对地址
+#   javascript: 链接和 onclick 处理函数不点击执行，而是从调用参数中找出详情页地址；
+#   找不到地址时 url 保留 javascript: 代码，payload 为调用参数（字符串和数字）
+#   row 为所在表格行（或列表项）各单元格的文本
+EXTRACT_ROSTER_JS = r"""
+var selectors = arguments[0] || [];
+var minName = arguments[1] || 2;
+var LITERAL = /(['"])((?:\\.|(?!\1)[^\\])*)\1|(-?\d+(?:\.\d+)?)/g;
+
+function callArgs(code) {
+    var start = code.indexOf('(');
+    var end = code.lastIndexOf(')');
+    if (start < 0 || end <= start) {
+        return [];
+    }
+    var inner = code.slice(start + 1, end);
+    var args = [];
+    var match;
+    LITERAL.lastIndex = 0;
+    while ((match = LITERAL.exec(inner)) !== null) {
+        args.push(match[3] !== undefined ? match[3] : match[2]);
+    }
+    return args;
+}
+
+function looksLikeUrl(value) {
+    return /^(https?:)?\/\//i.test(value) || /[\/?]/.test(value) ||
+        /\.(do|action|jsp|aspx?|php|html?)(\?|#|$)/i.test(value);
+}
+
+function resolve(value) {
+    try {
+        return new URL(value, document.baseURI).href;
+    } catch (e) {
+        return null;
+    }
+}
+
+function rowContext(el) {
+    var row = el.closest('tr, li, .list-item, .student-item');
+    if (!row) {
+        return [];
+    }
+    var cells = row.querySelectorAll('td, th');
+    var texts = [];
+    if (cells.length) {
+        for (var i = 0; i < cells.length; i++) {
+            texts.push((cells[i].innerText || cells[i].textContent || '').trim());
+        }
+    } else {
+        texts.push((row.innerText || row.textContent || '').trim());
+    }
+    return texts;
+}
+
+function describe(el) {
+    var name = (el.innerText || el.textContent || '').trim();
+    if (name.length < minName) {
+        return null;
+    }
+    var rawHref = (el.getAttribute('href') || '').trim();
+    var onclick = el.getAttribute('onclick') || '';
+    var isScript = /^javascript:/i.test(rawHref);
+    var url = null;
+    var payload = [];
+
+    if (rawHref && !isScript && rawHref.charAt(0) !== '#') {
+        url = resolve(rawHref);
+        payload = onclick ? callArgs(onclick) : [];
+    } else if (isScript || onclick) {
+        payload = callArgs(isScript ? rawHref : onclick);
+        if (isScript && onclick) {
+            payload = payload.concat(callArgs(onclick));
+        }
+        for (var i = 0; i < payload.length && !url; i++) {
+            if (looksLikeUrl(payload[i])) {
+                url = resolve(payload[i]);
+            }
+        }
+        if (!url) {
+            url = isScript ? rawHref : 'javascript:' + onclick;
+        }
+    } else {
+        return null;
+    }
+
+    return {name: name, url: url, onclick: onclick, payload: payload, row: rowContext(el)};
+}
+
+for (var s = 0; s < selectors.length; s++) {
+    var matched;
+    try {
+        matched = document.querySelectorAll(selectors[s]);
+    } catch (e) {
+        continue;
+    }
+    var students = [];
+    for (var j = 0; j < matched.length; j++) {
+        var info = describe(matched[j]);
+        if (info) {
+            students.push(info);
+        }
+    }
+    if (students.length) {
+        return {selector: selectors[s], index: s, students: students};
+    }
+}
+return {selector: null, index: -1, students: []};
+"""
+
+# 分页信息
+# 参数: arguments[0] "下一页"按钮选择器列表
+# 返回: {url, next: {selector, url} 或 null, pages: [{num, url}]}
+#   next.url 为下一页按钮的真实地址（javascript: / # 链接为 null）
+#   pages 为页码链接（文字为纯数字且有真实地址），用于推断按页码直接访问的地址规律
+PAGER_JS = r"""
+var nextSelectors = arguments[0] || [];
+var NEXT_TEXTS = ['下一页', '下页', '后一页', '>', '>>', '»', 'next', 'next >'];
+
+function realUrl(el) {
+    var raw = (el.getAttribute('href') || '').trim();
+    if (!raw || raw.charAt(0) === '#' || /^javascript:/i.test(raw)) {
+        return null;
+    }
+    try {
+        return new URL(raw, document.baseURI).href;
+    } catch (e) {
+        return null;
+    }
+}
+
+function usable(el) {
+    var rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0 && !/\bdisabled\b/.test(el.className || '') &&
+        !el.hasAttribute('disabled');
+}
+
+var next = null;
+for (var i = 0; i < nextSelectors.length && !next; i++) {
+    var matched;
+    try {
+        matched = document.querySelectorAll(nextSelectors[i]);
+    } catch (e) {
+        continue;
+    }
+    for (var j = 0; j < matched.length; j++) {
+        if (usable(matched[j])) {
+            next = {selector: nextSelectors[i], url: realUrl(matched[j])};
+            break;
+        }
+    }
+}
+
+var anchors = document.querySelectorAll('a');
+var pages = [];
+for (var k = 0; k < anchors.length; k++) {
+    var text = (anchors[k].innerText || anchors[k].textContent || '').trim();
+    if (!next && NEXT_TEXTS.indexOf(text.toLowerCase()) >= 0 && usable(anchors[k])) {
+        next = {selector: null, url: realUrl(anchors[k])};
+    }
+    if (/^\d+$/.test(text)) {
+        var url = realUrl(anchors[k]);
+        if (url) {
+            pages.push({num: parseInt(text, 10), url: url});
+        }
+    }
+}
+
+return {url: location.href, next: next, pages: pages};
+"""
+
+# 详情标签页预加载
+# 参数: arguments[0] 详情页地址
+#   先清空当前文档（避免在新页面到达前读到上一个学生的照片），并在旧的 window 上做标记，
+#   然后开始导航，不等待加载完成
+PRELOAD_JS = r"""
+window.__detailPreloading = true;
+document.documentElement.innerHTML = '';
+location.href = arguments[0];
+"""
+
+# 预加载的页面已替换旧文档且DOM已解析
+PRELOAD_ARRIVED_JS = r"""
+return !window.__detailPreloading && document.readyState !== 'loading';
+"""
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分页预取 - 开始处理学生之前先走完全部分页，一次得到完整学生名单，
+详情页处理和下载不再在每个页面边界停顿
+
+- 分页链接能看出页码规律（如 ?page=3、list_3.html）时，用HTTP并行请求各页
+- 否则在单独的标签页中逐页点击"下一页"读取名单，主标签页保持在第一页
+"""
+
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from selenium.common.exceptions import WebDriverException
+
+from config import Config
+from http_fetcher import HttpDetailFetcher
+from page_scripts import PAGER_JS
+from scrape_journal import ScrapeJournal
+
+log = logging.getLogger(__name__)
+
+# (页码, 页面地址, 学生列表)
+RosterPage = Tuple[int, str, List[Dict[str, str]]]
+
+_NUMBERED_SEGMENT_RE = re.compile(r"^(?P<prefix>.*?)(?P<num>\d+)(?P<suffix>\.\w+)?$")
+
+
+class PageUrlTemplate:
+    """按页码生成列表页地址：查询参数（?page=N）或路径段（/list/N、list_N.html）"""
+
+    def __init__(self, sample_url: str, kind: str, key):
+        self.parsed = urlparse(sample_url)
+        self.kind = kind
+        self.key = key
+
+    def url(self, page: int) -> str:
+        if self.kind == 'query':
+            params = [(k, str(page) if k == self.key else v)
+                      for k, v in parse_qsl(self.parsed.query, keep_blank_values=True)]
+            return urlunparse(self.parsed._replace(query=urlencode(params)))
+        index, prefix, suffix = self.key
+        segments = self.parsed.path.split('/')
+        segments[index] = f"{prefix}{page}{suffix}"
+        return urlunparse(self.parsed._replace(path='/'.join(segments)))
+
+    @staticmethod
+    def _same(a: str, b: str) -> bool:
+        pa, pb = urlparse(a), urlparse(b)
+        return (pa.netloc == pb.netloc and pa.path == pb.path and
+                sorted(parse_qsl(pa.query, keep_blank_values=True)) ==
+                sorted(parse_qsl(pb.query, keep_blank_values=True)))
+
+    @classmethod
+    def _candidates(cls, page: int, url: str) -> List['PageUrlTemplate']:
+        parsed = urlparse(url)
+        candidates = [cls(url, 'query', key)
+                      for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+                      if value == str(page)]
+        for index, segment in enumerate(parsed.path.split('/')):
+            match = _NUMBERED_SEGMENT_RE.match(segment)
+            if match and match.group('num') == str(page):
+                candidates.append(cls(url, 'path', (index, match.group('prefix'), match.group('suffix') or '')))
+        return candidates
+
+    @classmethod
+    def infer(cls, links: List[Tuple[int, str]]) -> Optional['PageUrlTemplate']:
+        """从 (页码, 地址) 样本推断规律，所有样本都能还原时才采用"""
+        for page, url in links:
+            if page < 2:
+                continue  # 第一页的地址常常不带页码
+            for candidate in cls._candidates(page, url):
+                if all(cls._same(candidate.url(p), u) for p, u in links if p >= 2):
+                    return candidate
+        return None
+
+
+class RosterPrefetcher:
+    """在处理学生之前收集所有分页的学生名单"""
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.settings = Config.PAGINATION_SETTINGS
+
+    @staticmethod
+    def _keys(students: List[Dict[str, str]]) -> Set[str]:
+        return {ScrapeJournal.student_key(student) for student in students}
+
+    @staticmethod
+    def _unresolved(students: List[Dict[str, str]]) -> bool:
+        return any(student['url'].startswith('javascript:') for student in students)
+
+    def collect(self) -> Optional[List[RosterPage]]:
+        """返回全部分页的名单；名单中有无法解析的JavaScript链接时返回None（调用方逐页处理）"""
+        scraper = self.scraper
+        driver = scraper.driver
+        first_url = driver.current_url
+        first = scraper.get_students_from_page()
+        if not first:
+            return []
+        if self._unresolved(first):
+            log.warning("⚠ 学生链接需要执行JavaScript才能打开，无法预取分页，改为逐页处理")
+            return None
+        pages: List[RosterPage] = [(1, first_url, first)]
+
+        pager = driver.execute_script(PAGER_JS, scraper.NEXT_BUTTON_SELECTORS) or {}
+        links = [(page['num'], page['url']) for page in pager.get('pages', [])]
+        next_button = pager.get('next')
+        if next_button and next_button.get('url'):
+            links.append((2, next_button['url']))
+        if not links and not next_button:
+            log.info("✓ 只有一页")
+            return pages
+
+        template = PageUrlTemplate.infer(links)
+        if template:
+            log.info(f"🔢 分页地址规律: {template.url(2)} ...，并行请求各页")
+            rest = self._fetch_by_page_number(template, first_url, self._keys(first))
+            if rest is not None:
+                return pages + rest
+            log.warning("⚠ HTTP读取分页失败，改为在单独标签页中逐页翻页")
+
+        rest = self._walk_in_tab(first_url, self._keys(first))
+        if rest is None:
+            return None
+        return pages + rest
+
+    def _fetch_by_page_number(self, template: PageUrlTemplate, referer: str,
+                              seen: Set[str]) -> Optional[List[RosterPage]]:
+        """按页码并行请求列表页，直到出现空页或与已读页面重复的页"""
+        scraper = self.scraper
+        workers = self.settings['http_workers']
+        max_pages = self.settings['max_pages']
+        user_agent = scraper.driver.execute_script("return navigator.userAgent")
+        fetcher = HttpDetailFetcher(scraper.get_browser_cookies(), user_agent=user_agent, workers=workers,
+                                    limiter=scraper.limiter)
+        selectors = scraper.ordered_selectors('student_list', scraper.STUDENT_LINK_SELECTORS)
+        pages: List[RosterPage] = []
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                page = 2
+                while page <= max_pages:
+                    batch = list(range(page, min(page + workers, max_pages + 1)))
+                    rosters = list(executor.map(
+                        lambda n: fetcher.fetch_roster(template.url(n), selectors, referer), batch))
+                    for page_num, roster in zip(batch, rosters):
+                        if roster is None:
+                            return None
+                        students = roster['students']
+                        if page_num == 2 and not students:
+                            return None  # 名单可能由JavaScript渲染，静态HTML中没有
+                        if not students or not (self._keys(students) - seen):
+                            return pages
+                        if self._unresolved(students):
+                            return None
+                        seen |= self._keys(students)
+                        pages.append((page_num, template.url(page_num), students))
+                        scraper.record_selector_hit('student_list', roster['selector'], selectors[:roster['index']])
+                        log.debug(f"📄 第 {page_num} 页: {len(students)} 个学生")
+                    page += len(batch)
+        finally:
+            fetcher.close()
+        return pages
+
+    def _walk_in_tab(self, first_url: str, seen: Set[str]) -> Optional[List[RosterPage]]:
+        """在单独的标签页中逐页点击"下一页"，主标签页留在第一页"""
+        scraper = self.scraper
+        driver = scraper.driver
+        main_window = driver.current_window_handle
+        first_keys = set(seen)
+        pages: List[RosterPage] = []
+        page_num = 1
+        driver.switch_to.new_window('tab')
+        try:
+            driver.get(first_url)
+            scraper.wait_for_page_load()
+            if self._keys(scraper.get_students_from_page()) != seen:
+                # 列表页不能直接打开（如表单提交的结果页），改在主标签页翻页，结束后再回到第一页
+                driver.close()
+                driver.switch_to.window(main_window)
+                main_window = None
+            while page_num < self.settings['max_pages'] and scraper.has_next_page():
+                page_num += 1
+                students = scraper.get_students_from_page()
+                if not students or not (self._keys(students) - seen):
+                    break
+                if self._unresolved(students):
+                    log.warning("⚠ 后续页面的学生链接需要执行JavaScript，改为逐页处理")
+                    return None
+                seen |= self._keys(students)
+                pages.append((page_num, driver.current_url, students))
+                log.debug(f"📄 第 {page_num} 页: {len(students)} 个学生")
+            return pages
+        finally:
+            if main_window:
+                driver.close()
+                driver.switch_to.window(main_window)
+            else:
+                self._back_to_first_page(page_num - 1, first_keys)
+
+    def _back_to_first_page(self, steps: int, first_keys: Set[str]):
+        """在主标签页翻过 steps 页后，沿浏览器历史退回操作员打开的第一页（该页地址不能直接打开）"""
+        scraper = self.scraper
+        if steps > 0:
+            try:
+                scraper.driver.execute_script("history.go(arguments[0])", -steps)
+                scraper.wait_for_page_load()
+            except WebDriverException as e:
+                log.debug(f"⚠ 浏览器历史后退失败: {e}")
+        if self._keys(scraper.get_students_from_page()) != first_keys:
+            log.warning("⚠ 无法回到第一页学生列表，请在浏览器中手动返回后再继续")
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+照片目录扫描 - 单次 os.scandir 遍历，扩展名不区分大小写，边扫描边产出，
+不必等整个目录列完才能显示第一张照片
+"""
+
+import os
+from typing import Iterator
+
+PHOTO_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp'}
+
+
+def is_photo_name(filename: str) -> bool:
+    """按扩展名判断（不区分大小写），跳过隐藏文件"""
+    return not filename.startswith('.') and os.path.splitext(filename)[1].lower() in PHOTO_EXTENSIONS
+
+
+def iter_photo_files(photo_dir: str) -> Iterator[str]:
+    """按目录顺序逐个产出照片路径（不排序，不进入子目录）"""
+    with os.scandir(photo_dir) as entries:
+        for entry in entries:
+            if is_photo_name(entry.name) and entry.is_file():
+                yield entry.path
+
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+照片存储 - 按内容哈希保存照片，相同内容只存一份；manifest.json 记录学生与照片的对应关系
+
+目录结构:
+    student_photos/
+        张三.jpg                 # 指向内容文件的硬链接（不支持硬链接时为副本）
+        manifest.json            # 照片索引
+        .blobs/ab/abcdef....jpg  # 按 sha256 命名的内容文件（下载的原图）
+        .blobs/ab/abcdef....display.jpg  # 校验后生成的限制尺寸展示版本
+        .display/张三.jpg        # 展示版本的硬链接，供查看器和导出使用
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+BLOB_DIR_NAME = '.blobs'
+DISPLAY_DIR_NAME = '.display'
+
+
+def load_manifest(photo_dir: str) -> Optional[Dict]:
+    """读取照片目录中的索引，不存在或损坏时返回None"""
+    path = os.path.join(photo_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"⚠ 读取照片索引失败: {e}")
+        return None
+
+
+def manifest_photo_files(photo_dir: str, display: bool = False) -> Optional[List[str]]:
+    """索引中所有非占位图照片的完整路径（按文件名排序）；没有索引时返回None
+
+    display=True 时优先返回规范化后的展示版本（没有展示版本的照片仍返回原图）。
+    """
+    manifest = load_manifest(photo_dir)
+    if manifest is None:
+        return None
+    entries = [entry for entry in manifest.get('entries', {}).values()
+               if entry.get('file') and not entry.get('placeholder')]
+    files = {entry['file']: (entry.get('display') if display else None) or entry['file'] for entry in entries}
+    return [os.path.join(photo_dir, files[name]) for name in sorted(files)]
+
+
+def image_size(path: str):
+    """读取图片尺寸（只解析文件头）；没有Pillow或无法识别时返回 (None, None)"""
+    try:
+        from PIL import Image
+    except ImportError:
+        return None, None
+    try:
+        with Image.open(path) as image:
+            return image.size
+    except Exception:
+        return None, None
+
+
+class BlobWriter:
+    """边下载边写临时文件并计算哈希"""
+
+    def __init__(self, tmp_dir: str):
+        fd, self.path = tempfile.mkstemp(dir=tmp_dir, suffix='.part')
+        self.file = os.fdopen(fd, 'wb')
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.file.write(chunk)
+        self.hasher.update(chunk)
+        self.size += len(chunk)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    def discard(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def digest(self) -> str:
+        return self.hasher.hexdigest()
+
+
+class PhotoStore:
+    """内容寻址的照片存储
+
+    - 相同内容（sha256相同）只保存一个内容文件，每个学生的命名文件是它的硬链接
+    - 同一内容被 placeholder_threshold 个以上学生共用时视为占位图（如"暂无照片"），
+      不再生成命名文件，并删除之前生成的命名文件
+    - 同名学生（清理后的文件名相同但照片地址不同）自动编号，不会被跳过
+    """
+
+    def __init__(self, photo_dir: str):
+        settings = Config.STORE_SETTINGS
+        self.photo_dir = photo_dir
+        self.blob_dir = os.path.join(photo_dir, BLOB_DIR_NAME)
+        self.manifest_path = os.path.join(photo_dir, MANIFEST_NAME)
+        self.placeholder_threshold = settings['placeholder_threshold']
+        self.flush_every = settings['manifest_flush_every']
+
+        os.makedirs(self.blob_dir, exist_ok=True)
+        manifest = load_manifest(photo_dir) or {}
+        self.entries: Dict[str, Dict] = manifest.get('entries', {})
+        self.blobs: Dict[str, Dict] = manifest.get('blobs', {})
+        self._files = {entry['file'] for entry in self.entries.values() if entry.get('file')}
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+    @staticmethod
+    def entry_key(name: str, source_url: str) -> str:
+        return f"{name}|{source_url}"
+
+    def get(self, name: str, source_url: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self.entries.get(self.entry_key(name, source_url))
+            return dict(entry) if entry else None
+
+    def has(self, name: str, source_url: str) -> bool:
+        """该学生的这张照片是否已保存"""
+        entry = self.get(name, source_url)
+        if not entry:
+            return False
+        if entry.get('placeholder'):
+            return True
+        return bool(entry.get('file')) and os.path.exists(os.path.join(self.photo_dir, entry['file']))
+
+    def is_unmanaged_file(self, filename: str) -> bool:
+        """目录中已存在、但不是由本存储生成的文件（旧版本下载的照片）"""
+        return filename not in self._files and os.path.exists(os.path.join(self.photo_dir, filename))
+
+    def new_writer(self) -> BlobWriter:
+        return BlobWriter(self.blob_dir)
+
+    def _blob_relpath(self, digest: str, ext: str) -> str:
+        return os.path.join(BLOB_DIR_NAME, digest[:2], digest + ext)
+
+    def _allocate_filename(self, safe_name: str, ext: str, key: str) -> str:
+        """为学生分配不冲突的文件名"""
+        existing = self.entries.get(key)
+        if existing and existing.get('file'):
+            return existing['file']
+        candidate = f"{safe_name}{ext}"
+        counter = 2
+        while candidate in self._files or os.path.exists(os.path.join(self.photo_dir, candidate)):
+            candidate = f"{safe_name}-{counter}{ext}"
+            counter += 1
+        return candidate
+
+    def _link(self, blob_path: str, filename: str):
+        target = os.path.join(self.photo_dir, filename)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if os.path.exists(target):
+            os.remove(target)
+        try:
+            os.link(blob_path, target)
+        except OSError:
+            shutil.copyfile(blob_path, target)
+
+    def _unlink(self, filename: str):
+        path = os.path.join(self.photo_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+        self._files.discard(filename)
+
+    def _unlink_entry(self, entry: Dict):
+        """删除条目的命名文件和展示文件"""
+        if entry.get('file'):
+            self._unlink(entry['file'])
+            entry['file'] = None
+        if entry.get('display'):
+            self._unlink(entry['display'])
+            entry['display'] = None
+
+    def commit(self, writer: BlobWriter, name: str, safe_name: str, source_url: str,
+               ext: str, content_type: str = '', display_path: Optional[str] = None,
+               display_ext: Optional[str] = None) -> Dict:
+        """保存下载完的内容，返回索引条目（含 duplicate / placeholder 标记）
+
+        display_path 为校验时生成的展示版本临时文件，由存储接管（内容重复时删除）。
+        """
+        writer.close()
+        digest = writer.digest
+        key = self.entry_key(name, source_url)
+
+        with self._lock:
+            blob = self.blobs.get(digest)
+            duplicate = blob is not None
+            if duplicate:
+                os.remove(writer.path)
+                if display_path:
+                    os.remove(display_path)
+            else:
+                relpath = self._blob_relpath(digest, ext)
+                blob_path = os.path.join(self.photo_dir, relpath)
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(writer.path, blob_path)
+                width, height = image_size(blob_path)
+                blob = {'path': relpath, 'size': writer.size, 'width': width, 'height': height,
+                        'content_type': content_type, 'refs': []}
+                if display_path:
+                    display_relpath = self._blob_relpath(digest, '.display' + display_ext)
+                    os.replace(display_path, os.path.join(self.photo_dir, display_relpath))
+                    blob['display'] = display_relpath
+                self.blobs[digest] = blob
+
+            # 同一学生换了照片时，先解除旧内容的引用
+            old_entry = self.entries.get(key)
+            if old_entry and old_entry['sha256'] != digest:
+                old_blob = self.blobs.get(old_entry['sha256'])
+                if old_blob and key in old_blob['refs']:
+                    old_blob['refs'].remove(key)
+
+            if key not in blob['refs']:
+                blob['refs'].append(key)
+
+            entry = {
+                'name': name,
+                'source_url': source_url,
+                'sha256': digest,
+                'size': blob['size'],
+                'width': blob['width'],
+                'height': blob['height'],
+                'fetched_at': time.time(),
+                'file': None,
+                'display': None,
+                'placeholder': False,
+            }
+
+            if len(blob['refs']) >= self.placeholder_threshold:
+                # 占位图：所有引用都不生成命名文件
+                blob['placeholder'] = True
+                for ref in blob['refs']:
+                    ref_entry = self.entries.get(ref)
+                    if ref_entry:
+                        self._unlink_entry(ref_entry)
+                        ref_entry['placeholder'] = True
+                if old_entry:
+                    self._unlink_entry(old_entry)
+                entry['placeholder'] = True
+            else:
+                filename = self._allocate_filename(safe_name, ext, key)
+                display_name = None
+                if blob.get('display'):
+                    display_name = os.path.join(DISPLAY_DIR_NAME, os.path.splitext(filename)[0] +
+                                                os.path.splitext(blob['display'])[1])
+                if old_entry and old_entry.get('file') and old_entry['file'] != filename:
+                    self._unlink(old_entry['file'])
+                if old_entry and old_entry.get('display') and old_entry['display'] != display_name:
+                    self._unlink(old_entry['display'])
+                self._link(os.path.join(self.photo_dir, blob['path']), filename)
+                self._files.add(filename)
+                entry['file'] = filename
+                if display_name:
+                    self._link(os.path.join(self.photo_dir, blob['display']), display_name)
+                    entry['display'] = display_name
+
+            self.entries[key] = entry
+            self._unsaved += 1
+            if self._unsaved >= self.flush_every:
+                self._save_locked()
+
+        result = dict(entry)
+        result['duplicate'] = duplicate
+        result['refs'] = len(blob['refs'])
+        return result
+
+    def _save_locked(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': self.entries, 'blobs': self.blobs},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+        self._unsaved = 0
+
+    def save(self):
+        """写入索引（原子替换）"""
+        with self._lock:
+            if self._unsaved:
+                self._save_locked()
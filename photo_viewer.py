@@ -5,16 +5,50 @@
 """
 
 import os
+import time
+import queue
+import random
+import threading
 import tkinter as tk
 from tkinter import ttk
-from PIL import Image, ImageTk
-import glob
+from PIL import ImageTk
+from collections import OrderedDict
+
+from config import Config
+from photo_store import manifest_photo_files
+from photo_scan import iter_photo_files
+from thumbnail_cache import ThumbnailCache
 
 class PhotoViewer:
-    def __init__(self, photo_dir="student_photos"):
+    def __init__(self, photo_dir="student_photos", use_index=True):
         self.photo_dir = photo_dir
+        self.use_index = use_index
         self.photos = []
         self.current_index = 0
+        self.started_at = time.perf_counter()
+        self.first_photo_seconds = None
+        
+        # 后台扫描目录，扫到第一张照片就显示
+        self.scanning = False
+        self._scan_results = queue.Queue()
+        
+        # 两级缓存：磁盘上的缩略图 + 内存中已转换好的 PhotoImage（LRU）
+        settings = Config.VIEWER_SETTINGS
+        self.thumbnails = ThumbnailCache(os.path.join(photo_dir, settings['thumbnail_dir']))
+        self.photo_cache = OrderedDict()
+        self.photo_cache_size = settings['memory_cache_size']
+        self._resize_job = None
+        self._shown_size = None
+        
+        # 后台预取：工作线程只做解码缩放（PIL），PhotoImage 在主线程中创建
+        self.prefetch_count = settings['prefetch_count']
+        self.next_random_index = None
+        self._prefetch_requests = queue.Queue()
+        self._prefetch_results = queue.Queue()
+        self._prefetch_generation = 0
+        self._prefetched_keys = set()
+        self.prefetch_hits = 0
+        self.prefetch_misses = 0
         
         self.load_photos()
         self.setup_gui()
@@ -25,14 +59,64 @@ class PhotoViewer:
             print(f"目录 {self.photo_dir} 不存在")
             return
         
-        # 支持的图片格式
-        extensions = ['*.jpg', '*.jpeg', '*.png', '*.gif', '*.bmp']
-        for ext in extensions:
-            pattern = os.path.join(self.photo_dir, ext)
-            self.photos.extend(glob.glob(pattern))
+        # 优先使用抓取程序生成的照片索引（及限制尺寸的展示版本），无需扫描目录
+        indexed = manifest_photo_files(self.photo_dir, display=True) if self.use_index else None
+        if indexed is not None:
+            self.photos = indexed
+            print(f"找到 {len(self.photos)} 张照片（来自索引）")
+            return
         
-        self.photos.sort()
+        # 没有索引时在后台单次扫描目录（扩展名不区分大小写）
+        self.scanning = True
+        threading.Thread(target=self._scan_worker, daemon=True).start()
+    
+    def _scan_worker(self):
+        """扫描线程：第一张照片立即交给主线程，之后分批交付"""
+        batch = []
+        delivered = False
+        try:
+            for path in iter_photo_files(self.photo_dir):
+                batch.append(path)
+                if len(batch) >= 500 or not delivered:
+                    self._scan_results.put(batch)
+                    batch = []
+                    delivered = True
+        except OSError as e:
+            print(f"扫描照片目录失败: {e}")
+        if batch:
+            self._scan_results.put(batch)
+        self._scan_results.put(None)
+    
+    def _receive_scanned(self):
+        """主线程：接收扫描结果；扫描结束后按文件名排序"""
+        finished = False
+        try:
+            while True:
+                batch = self._scan_results.get_nowait()
+                if batch is None:
+                    finished = True
+                    break
+                first_batch = not self.photos
+                self.photos.extend(batch)
+                if first_batch:
+                    self.show_photo(0)
+        except queue.Empty:
+            pass
+        
+        if not finished:
+            self.root.after(Config.VIEWER_SETTINGS['prefetch_poll_ms'], self._receive_scanned)
+            return
+        
+        self.scanning = False
         print(f"找到 {len(self.photos)} 张照片")
+        if not self.photos:
+            self.info_label.config(text="未找到照片，请先运行抓取脚本")
+            return
+        current = self.photos[self.current_index]
+        self.photos.sort()
+        self.current_index = self.photos.index(current)
+        self.update_info()
+        self.schedule_prefetch(self.current_index)
     
     def setup_gui(self):
         """设置GUI界面"""
@@ -64,10 +148,18 @@ class PhotoViewer:
         self.root.bind('<Left>', lambda e: self.prev_photo())
         self.root.bind('<Right>', lambda e: self.next_photo())
         self.root.bind('<space>', lambda e: self.random_photo())
+        self.root.bind('<Configure>', self.on_resize)
+        
+        # 启动预取线程
+        threading.Thread(target=self._prefetch_worker, daemon=True).start()
+        self.root.after(Config.VIEWER_SETTINGS['prefetch_poll_ms'], self._receive_prefetched)
         
         # 显示第一张照片
         if self.photos:
             self.show_photo(0)
+        elif self.scanning:
+            self.info_label.config(text="正在扫描照片...")
+            self.root.after(0, self._receive_scanned)
         else:
             self.info_label.config(text="未找到照片，请先运行抓取脚本")
     
@@ -78,36 +170,127 @@ class PhotoViewer:
         
         try:
             photo_path = self.photos[index]
-            
-            # 打开并调整图片大小
-            image = Image.open(photo_path)
-            
-            # 获取窗口大小
-            window_width = self.root.winfo_width() - 40
-            window_height = self.root.winfo_height() - 150
-            
-            if window_width > 1 and window_height > 1:
-                # 计算缩放比例
-                image.thumbnail((window_width, window_height), Image.Resampling.LANCZOS)
-            
-            # 转换为Tkinter格式
-            photo = ImageTk.PhotoImage(image)
+            size = self.target_size()
+            photo = self.get_photo_image(photo_path, size)
+            self._shown_size = size
             
             # 更新标签
             self.photo_label.config(image=photo)
             self.photo_label.image = photo  # 防止垃圾回收
             
-            # 更新信息
-            filename = os.path.basename(photo_path)
-            name = os.path.splitext(filename)[0]
-            self.info_label.config(text=f"{index + 1}/{len(self.photos)} - {name}")
-            
             self.current_index = index
+            self.update_info()
+            self.schedule_prefetch(index)
+            
+            if self.first_photo_seconds is None:
+                self.first_photo_seconds = time.perf_counter() - self.started_at
+                print(f"首张照片显示用时: {self.first_photo_seconds:.3f} 秒")
             
         except Exception as e:
             print(f"显示照片失败: {e}")
             self.info_label.config(text=f"无法加载照片: {os.path.basename(self.photos[index])}")
     
+    def update_info(self):
+        """更新照片序号和姓名（扫描未结束时总数后加 +）"""
+        filename = os.path.basename(self.photos[self.current_index])
+        name = os.path.splitext(filename)[0]
+        total = f"{len(self.photos)}+" if self.scanning else f"{len(self.photos)}"
+        self.info_label.config(text=f"{self.current_index + 1}/{total} - {name}")
+    
+    def target_size(self):
+        """照片显示区域大小（按缩略图步长取整）；窗口尚未显示时按默认窗口大小计算"""
+        window_width = self.root.winfo_width() - 40
+        window_height = self.root.winfo_height() - 150
+        if window_width <= 1 or window_height <= 1:
+            window_width, window_height = 800 - 40, 600 - 150
+        return ThumbnailCache.bucket((window_width, window_height))
+    
+    def get_photo_image(self, photo_path, size):
+        """从内存LRU取已渲染的照片，未命中时从磁盘缩略图缓存生成"""
+        key = (photo_path, size)
+        photo = self.photo_cache.get(key)
+        if photo is not None:
+            self.photo_cache.move_to_end(key)
+            if key in self._prefetched_keys:
+                self._prefetched_keys.discard(key)
+                self.prefetch_hits += 1
+            return photo
+        
+        self.prefetch_misses += 1
+        photo = ImageTk.PhotoImage(self.thumbnails.get_image(photo_path, size))
+        self._cache_photo(key, photo)
+        return photo
+    
+    def _cache_photo(self, key, photo):
+        self.photo_cache[key] = photo
+        if len(self.photo_cache) > self.photo_cache_size:
+            evicted, _ = self.photo_cache.popitem(last=False)
+            self._prefetched_keys.discard(evicted)
+    
+    def schedule_prefetch(self, index):
+        """当前照片显示后，预取前后 prefetch_count 张以及下一张随机照片"""
+        count = len(self.photos)
+        if self.next_random_index is None:
+            self.next_random_index = random.randrange(count)
+        
+        indices = []
+        for offset in range(1, self.prefetch_count + 1):
+            indices.append((index + offset) % count)
+            indices.append((index - offset) % count)
+        indices.append(self.next_random_index)
+        
+        # 新的请求使之前未处理的请求作废
+        self._prefetch_generation += 1
+        size = self._shown_size
+        for i in dict.fromkeys(indices):
+            key = (self.photos[i], size)
+            if key not in self.photo_cache:
+                self._prefetch_requests.put((self._prefetch_generation, key))
+    
+    def _prefetch_worker(self):
+        """工作线程：解码并缩放照片（经过磁盘缩略图缓存）"""
+        while True:
+            generation, key = self._prefetch_requests.get()
+            if generation != self._prefetch_generation:
+                continue
+            try:
+                image = self.thumbnails.get_image(*key)
+            except Exception as e:
+                print(f"预取照片失败: {e}")
+                continue
+            self._prefetch_results.put((key, image))
+    
+    def _receive_prefetched(self):
+        """主线程：把预取好的图片转换为 PhotoImage 放入内存缓存"""
+        try:
+            while True:
+                key, image = self._prefetch_results.get_nowait()
+                if key not in self.photo_cache:
+                    self._cache_photo(key, ImageTk.PhotoImage(image))
+                    self._prefetched_keys.add(key)
+        except queue.Empty:
+            pass
+        self.root.after(Config.VIEWER_SETTINGS['prefetch_poll_ms'], self._receive_prefetched)
+    
+    @property
+    def prefetch_hit_rate(self) -> float:
+        """切换照片时已由预取准备好的比例"""
+        total = self.prefetch_hits + self.prefetch_misses
+        return self.prefetch_hits / total if total else 0.0
+    
+    def on_resize(self, event):
+        """窗口大小变化停止后，只重新渲染当前显示的照片"""
+        if event.widget is not self.root or not self.photos:
+            return
+        if self._resize_job:
+            self.root.after_cancel(self._resize_job)
+        self._resize_job = self.root.after(Config.VIEWER_SETTINGS['resize_delay_ms'], self._rerender)
+    
+    def _rerender(self):
+        self._resize_job = None
+        if self.target_size() != self._shown_size:
+            self.show_photo(self.current_index)
+    
     def next_photo(self):
         """下一张照片"""
         if self.photos:
@@ -123,13 +306,16 @@ class PhotoViewer:
     def random_photo(self):
         """随机显示照片"""
         if self.photos:
-            import random
-            random_index = random.randint(0, len(self.photos) - 1)
+            # 使用上次预先选好（并已预取）的随机照片，再选出下一张
+            random_index = self.next_random_index
+            if random_index is None or random_index >= len(self.photos):
+                random_index = random.randrange(len(self.photos))
+            self.next_random_index = random.randrange(len(self.photos))
             self.show_photo(random_index)
     
     def run(self):
         """运行查看器"""
-        if not self.photos:
+        if not self.photos and not self.scanning:
             print("请先运行照片抓取脚本下载照片")
             return
         
@@ -140,17 +326,22 @@ class PhotoViewer:
         print("- 窗口按钮：导航控制")
         
         self.root.mainloop()
+        
+        total = self.prefetch_hits + self.prefetch_misses
+        if total:
+            print(f"预取命中率: {self.prefetch_hit_rate:.0%} ({self.prefetch_hits}/{total})")
 
 def main():
     import argparse
     
     parser = argparse.ArgumentParser(description="学生照片查看器")
     parser.add_argument("--dir", default="student_photos", help="照片目录")
+    parser.add_argument("--scan", action="store_true", help="忽略照片索引（manifest.json），直接扫描目录")
     
     args = parser.parse_args()
     
     try:
-        viewer = PhotoViewer(args.dir)
+        viewer = PhotoViewer(args.dir, use_index=not args.scan)
         viewer.run()
     except ImportError as e:
         print(f"需要安装Pillow库：pip install Pillow")
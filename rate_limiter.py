@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自适应请求限速 - 每个主机一个令牌桶，发送速率和同时进行的请求数按加性增、乘性减（AIMD）调整：
+第一次遇到拥塞之前快速提高（慢启动，约每轮翻倍），之后响应正常时缓慢提高，
+遇到 429/5xx、超时或响应明显变慢时减半；服务器返回 Retry-After 时暂停该主机。
+浏览器导航、HTTP快速通道和照片下载共用同一个限速器，抓取速度收敛到教务系统能承受的最快速度。
+
+失败的学生放入重试队列，按指数退避（带随机抖动）稍后重试，而不是直接放弃。
+"""
+
+import time
+import heapq
+import random
+import logging
+import itertools
+import threading
+import email.utils
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from selenium.common.exceptions import TimeoutException
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+# 表示服务器繁忙、稍后重试可能成功的状态码
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# 视为服务器过载的异常（其他异常与服务器负载无关，不影响限速）
+TRANSIENT_ERRORS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout, TimeoutException)
+
+
+class Throttled(Exception):
+    """服务器要求降速（429/502/503/504），retry_after 为服务器建议的等待秒数"""
+
+    def __init__(self, url: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}: {url}")
+        self.url = url
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 头部（秒数或HTTP日期）-> 等待秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float, maximum: float, hint: Optional[float] = None) -> float:
+    """第 attempt 次重试前的等待时间：base * 2^(attempt-1)（上限 maximum，随机取其 50%-100%），
+    不少于服务器建议的 hint 秒（hint 最多遵守 max_retry_after 秒）"""
+    delay = min(maximum, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+    hint = min(hint or 0.0, Config.RATE_LIMIT['max_retry_after'])
+    return max(delay, hint)
+
+
+class HostThrottle:
+    """单个主机的令牌桶 + AIMD 并发上限"""
+
+    def __init__(self, host: str, settings: Dict):
+        self.host = host
+        self.settings = settings
+        self.rate = float(settings['initial_rate'])
+        self.concurrency = float(settings['initial_concurrency'])
+        self.tokens = float(settings['burst'])
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.latency: Optional[float] = None    # 正常响应耗时的指数移动平均
+        self.last_decrease = 0.0
+        self.slow_start = True                  # 尚未遇到拥塞：每个正常响应加 increase（约每轮翻倍）
+
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.slow = 0
+        self.waited = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.settings['burst'], self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """等待令牌和并发名额，返回等待的秒数"""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    delay = self.blocked_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    delay = None    # 等待其他请求结束
+                elif self.tokens < 1:
+                    delay = (1 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    self.requests += 1
+                    waited = now - start
+                    self.waited += waited
+                    return waited
+                self._cond.wait(delay)
+
+    def release(self, latency: float, outcome: str, retry_after: Optional[float] = None):
+        """请求结束：outcome 为 'ok' / 'throttled' / 'error' / 'neutral'（与服务器负载无关的失败）"""
+        settings = self.settings
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if outcome == 'ok':
+                threshold = max(settings['slow_min'], (self.latency or 0) * settings['slow_factor'])
+                if self.latency is not None and latency > threshold:
+                    outcome = 'slow'
+                    self.slow += 1
+                else:
+                    self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+                    # 加性增：约每完成"当前值"个请求加 increase；慢启动阶段每个请求都加
+                    increase = settings['increase']
+                    rate_step = increase if self.slow_start else increase / self.rate
+                    concurrency_step = increase if self.slow_start else increase / self.concurrency
+                    self.rate = min(settings['max_rate'], self.rate + rate_step)
+                    self.concurrency = min(settings['max_concurrency'], self.concurrency + concurrency_step)
+            elif outcome == 'throttled':
+                self.throttled += 1
+            elif outcome == 'error':
+                self.errors += 1
+
+            if outcome in ('slow', 'throttled', 'error'):
+                # 乘性减；同一批并发请求的连续失败只降一次
+                if now - self.last_decrease >= max(1.0, self.latency or 0):
+                    self.rate = max(settings['min_rate'], self.rate * settings['decrease'])
+                    self.concurrency = max(1.0, self.concurrency * settings['decrease'])
+                    self.last_decrease = now
+                    self.slow_start = False
+                    log.debug(f"🐢 {self.host} 降速 ({outcome}): {self.rate:.2f} 请求/秒, 并发 {int(self.concurrency)}")
+            if retry_after:
+                pause = min(retry_after, settings['max_retry_after'])
+                self.blocked_until = max(self.blocked_until, now + pause)
+                log.info(f"⏸ {self.host} 要求等待 {pause:.0f} 秒 (Retry-After)")
+            self._cond.notify_all()
+
+    def summary(self) -> Dict:
+        with self._cond:
+            return {
+                'host': self.host, 'rate': self.rate, 'concurrency': int(self.concurrency),
+                'requests': self.requests, 'throttled': self.throttled, 'errors': self.errors,
+                'slow': self.slow, 'waited': self.waited, 'latency': self.latency,
+            }
+
+
+class RequestSlot:
+    """一次受限速的请求；observe() 记录响应状态，遇到要求降速的状态码时抛出 Throttled"""
+
+    def __init__(self, url: str, throttle: Optional[HostThrottle]):
+        self.url = url
+        self.throttle = throttle
+        self.outcome: Optional[str] = None
+        self.retry_after: Optional[float] = None
+        self.waited = throttle.acquire() if throttle else 0.0
+        self.start = time.monotonic()
+        self._closed = False
+
+    def observe(self, status: Optional[int], headers: Optional[Dict] = None):
+        """记录响应状态码（未知时为None）和头部"""
+        if status is None:
+            return
+        if status in RETRY_STATUSES:
+            headers = headers or {}
+            self.outcome = 'throttled'
+            self.retry_after = parse_retry_after(headers.get('Retry-After') or headers.get('retry-after'))
+            raise Throttled(self.url, status, self.retry_after)
+        if status >= 500:
+            self.outcome = 'error'
+
+    def failed(self):
+        """请求因超时或连接错误失败（未抛出异常时由调用方标记）"""
+        self.outcome = 'error'
+
+    def close(self):
+        if self._closed or self.throttle is None:
+            return
+        self._closed = True
+        self.throttle.release(time.monotonic() - self.start, self.outcome or 'ok', self.retry_after)
+
+
+class RateLimiter:
+    """按主机分组的自适应限速器（线程安全，可在浏览器线程和下载线程之间共用）
+
+    with limiter.request(url) as slot:
+        response = session.get(url)
+        slot.observe(response.status_code, response.headers)
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, settings: Optional[Dict] = None):
+        self.settings = settings or Config.RATE_LIMIT
+        self.enabled = self.settings['enabled'] if enabled is None else enabled
+        self._hosts: Dict[str, HostThrottle] = {}
+        self._lock = threading.Lock()
+
+    def host(self, url: str) -> Optional[HostThrottle]:
+        """url 所在主机的限速状态；非HTTP地址不限速"""
+        parsed = urlparse(url)
+        if not self.enabled or parsed.scheme not in ('http', 'https'):
+            return None
+        with self._lock:
+            throttle = self._hosts.get(parsed.netloc)
+            if throttle is None:
+                throttle = self._hosts[parsed.netloc] = HostThrottle(parsed.netloc, self.settings)
+            return throttle
+
+    @contextmanager
+    def request(self, url: str):
+        """等待 url 所在主机的令牌和并发名额，请求结束后按结果调整速率"""
+        slot = RequestSlot(url, self.host(url))
+        try:
+            yield slot
+        except Throttled:
+            raise
+        except TRANSIENT_ERRORS:
+            slot.failed()
+            raise
+        except BaseException:
+            slot.outcome = slot.outcome or 'neutral'
+            raise
+        finally:
+            slot.close()
+
+    def report(self) -> List[str]:
+        """每个主机一行：当前速率、并发上限、请求数、限流/错误/变慢次数和累计等待"""
+        with self._lock:
+            hosts = list(self._hosts.values())
+        lines = []
+        for throttle in hosts:
+            s = throttle.summary()
+            latency = f"{s['latency']:.2f}s" if s['latency'] is not None else '-'
+            lines.append(f"{s['host']}: {s['rate']:.1f} 请求/秒, 并发 {s['concurrency']}, "
+                         f"请求 {s['requests']}, 限流 {s['throttled']}, 错误 {s['errors']}, "
+                         f"变慢 {s['slow']}, 平均响应 {latency}, 累计等待 {s['waited']:.1f}s")
+        return lines
+
+
+class RetryQueue:
+    """推迟重试的任务：按指数退避排队，同一任务超过重试次数后放弃（线程安全）"""
+
+    def __init__(self, retries: Optional[int] = None, base: Optional[float] = None,
+                 maximum: Optional[float] = None):
+        settings = Config.RATE_LIMIT
+        self.retries = settings['retries'] if retries is None else retries
+        self.base = settings['retry_base'] if base is None else base
+        self.maximum = settings['retry_max'] if maximum is None else maximum
+        self._heap: List[Tuple[float, int, Hashable, Any, int]] = []
+        self._attempts: Dict[Hashable, int] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.given_up = 0
+
+    def defer(self, key: Hashable, item: Any, hint: Optional[float] = None) -> bool:
+        """把任务推迟到退避时间之后；已达到重试次数时返回False"""
+        if hint is not None:
+            hint = min(hint, Config.RATE_LIMIT['max_retry_after'])
+        with self._lock:
+            attempt = self._attempts.get(key, 0) + 1
+            if attempt > self.retries:
+                self.given_up += 1
+                return False
+            self._attempts[key] = attempt
+            due = time.monotonic() + backoff_delay(attempt, self.base, self.maximum, hint)
+            heapq.heappush(self._heap, (due, next(self._seq), key, item, attempt))
+            return True
+
+    def pop(self, wait: bool = True) -> Optional[Tuple[Any, int]]:
+        """取出最早到期的任务，返回 (任务, 第几次重试)；wait 为True时等到其到期，否则未到期返回None"""
+        with self._lock:
+            if not self._heap:
+                return None
+            due = self._heap[0][0]
+        delay = due - time.monotonic()
+        if delay > 0:
+            if not wait:
+                return None
+            time.sleep(delay)
+        with self._lock:
+            if not self._heap:
+                return None
+            _, _, _, item, attempt = heapq.heappop(self._heap)
+            return item, attempt
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._heap)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+浏览器响应捕获 - 从Chrome的性能日志（DevTools Network 事件）中找到照片请求，
+再用 Network.getResponseBody 直接取出浏览器已经下载好的图片内容，
+照片不必用复制的cookies重新下载一次（会话绑定或一次性的照片地址也能保存）
+"""
+
+import json
+import time
+import base64
+import logging
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from selenium.common.exceptions import WebDriverException
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+class CapturedResponse(NamedTuple):
+    """浏览器中一个已完成请求的响应内容"""
+    body: bytes
+    headers: Dict[str, str]
+    status: int
+    mime_type: str
+
+
+def enable_performance_logging(options):
+    """让chromedriver记录 Network 事件（创建浏览器前设置）"""
+    options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return options
+
+
+class ResponseCapture:
+    """跟踪当前浏览器的网络响应，按地址取回响应内容
+
+    每次读取性能日志都会清空chromedriver中的缓冲，所以按地址记住最近的响应
+    (requestId、状态、头部、是否加载完成)。响应内容只在页面（窗口）存在期间可取，
+    必须在关闭详情页窗口之前调用 body()。
+    """
+
+    def __init__(self, driver, max_responses: Optional[int] = None):
+        self.driver = driver
+        self.max_responses = max_responses or Config.CAPTURE_SETTINGS['max_responses']
+        self.responses: "OrderedDict[str, Dict]" = OrderedDict()
+        self._by_request: Dict[str, str] = {}
+        self.available = True
+
+    def drain(self):
+        """读取并解析性能日志中新的 Network 事件"""
+        try:
+            entries = self.driver.get_log('performance')
+        except WebDriverException as e:
+            # 浏览器创建时没有开启性能日志
+            log.debug(f"⚠ 无法读取浏览器性能日志，不使用响应捕获: {e}")
+            self.available = False
+            return
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method', '')
+            params = message.get('params', {})
+            if method == 'Network.responseReceived':
+                response = params.get('response', {})
+                url = response.get('url', '')
+                if not url or url.startswith('data:'):
+                    continue
+                self._remember(url, {
+                    'request_id': params.get('requestId'),
+                    'status': response.get('status', 0),
+                    'mime_type': response.get('mimeType', ''),
+                    'headers': response.get('headers', {}),
+                    'finished': False,
+                })
+            elif method in ('Network.loadingFinished', 'Network.loadingFailed'):
+                url = self._by_request.get(params.get('requestId'))
+                record = self.responses.get(url) if url else None
+                if record and record['request_id'] == params.get('requestId'):
+                    if method == 'Network.loadingFinished':
+                        record['finished'] = True
+                    else:
+                        self._forget(url)
+
+    def _remember(self, url: str, record: Dict):
+        self.responses.pop(url, None)
+        self.responses[url] = record
+        self._by_request[record['request_id']] = url
+        while len(self.responses) > self.max_responses:
+            _, old = self.responses.popitem(last=False)
+            self._by_request.pop(old['request_id'], None)
+
+    def _forget(self, url: str):
+        record = self.responses.pop(url, None)
+        if record:
+            self._by_request.pop(record['request_id'], None)
+
+    def body(self, url: str, timeout: Optional[float] = None) -> Optional[CapturedResponse]:
+        """取回 url 的响应内容；浏览器没有请求过该地址、请求失败或内容已释放时返回None"""
+        if not self.available:
+            return None
+        if timeout is None:
+            timeout = Config.CAPTURE_SETTINGS['timeout']
+        deadline = time.monotonic() + timeout
+        url = url.split('#', 1)[0]
+        while True:
+            self.drain()
+            record = self.responses.get(url)
+            if record and record['finished']:
+                break
+            if not self.available or time.monotonic() >= deadline:
+                return None
+            time.sleep(Config.WAIT_TIME['poll_interval'])
+
+        if not 200 <= record['status'] < 300:
+            return None
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': record['request_id']})
+        except WebDriverException as e:
+            # 响应来自其他窗口，或内容已被浏览器释放
+            log.debug(f"⚠ 无法从浏览器取回响应内容 {url}: {e}")
+            return None
+        finally:
+            self._forget(url)
+
+        body = result.get('body', '')
+        data = base64.b64decode(body) if result.get('base64Encoded') else body.encode('utf-8')
+        return CapturedResponse(body=data, headers=record['headers'], status=record['status'],
+                                mime_type=record['mime_type'])
+
+    def status(self, url: str) -> Optional[Dict]:
+        """url 最近一次响应的记录（状态码、头部），不等待加载完成、不取内容；没有记录时返回None"""
+        if not self.available:
+            return None
+        self.drain()
+        return self.responses.get(url.split('#', 1)[0])
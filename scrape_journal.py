@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抓取日志 - 追加写入的JSONL日志，记录每个学生的状态和分页进度，用于断点续抓
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+class StudentState:
+    """学生处理状态"""
+    DISCOVERED = 'discovered'       # 已在列表页发现
+    RESOLVED = 'resolved'           # 已找到照片地址
+    DOWNLOADED = 'downloaded'       # 照片已下载
+    FAILED = 'failed'               # 失败（附带原因）
+
+
+class ScrapeJournal:
+    """追加写入的抓取日志
+
+    每行一条JSON记录，写入后立即 fsync，进程崩溃最多丢失正在写的一行；
+    读取时忽略不完整的末行。同一学生的多条记录以最后一条为准。
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self.students: Dict[str, Dict] = {}
+        self.pages: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self._replay()
+            mode = 'a'
+        else:
+            mode = 'w'
+        self._file = open(path, mode, encoding='utf-8')
+        if mode == 'a' and self._file.tell() > 0 and not self._ends_with_newline():
+            self._file.write('\n')  # 与崩溃时写了一半的行隔开
+
+    @staticmethod
+    def student_key(student: Dict[str, str]) -> str:
+        """学生唯一标识（姓名+链接）"""
+        return f"{student['name']}|{student['url']}"
+
+    def _replay(self):
+        """读取已有日志，恢复状态"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 崩溃时写了一半的行
+                self._apply(record)
+        finished = sum(1 for s in self.students.values() if s.get('state') == StudentState.DOWNLOADED)
+        log.info(f"✓ 已读取抓取日志: {len(self.students)} 个学生，其中 {finished} 个已完成，"
+                 f"已完成 {self.last_completed_page()} 页")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def _apply(self, record: Dict):
+        if record.get('event') == 'student':
+            entry = self.students.setdefault(record['key'], {})
+            entry.update({k: v for k, v in record.items() if k not in ('event', 'key')})
+        elif record.get('event') == 'page':
+            self.pages[record['page']] = record
+
+    def _write(self, record: Dict):
+        record['ts'] = time.time()
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._apply(record)
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def record_student(self, student: Dict[str, str], state: str, **extra):
+        """记录学生状态，extra 可包含 photo_url、referer、reason 等"""
+        record = {'event': 'student', 'key': self.student_key(student),
+                  'name': student['name'], 'url': student['url'], 'state': state}
+        record.update(extra)
+        self._write(record)
+
+    def record_page(self, page_num: int, url: str, done: bool = False):
+        """记录分页游标"""
+        self._write({'event': 'page', 'page': page_num, 'url': url, 'done': done})
+
+    def get_student(self, student: Dict[str, str]) -> Optional[Dict]:
+        """获取学生的最新状态"""
+        with self._lock:
+            entry = self.students.get(self.student_key(student))
+            return dict(entry) if entry else None
+
+    def last_completed_page(self) -> int:
+        """最后一个全部处理完的页码（没有则为0）"""
+        done = [page for page, record in self.pages.items() if record.get('done')]
+        return max(done) if done else 0
+
+    def page_url(self, page_num: int) -> Optional[str]:
+        """页码对应的列表页地址"""
+        record = self.pages.get(page_num)
+        return record.get('url') if record else None
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
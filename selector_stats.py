@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+选择器命中统计 - 按网站域名记录各选择器的命中次数并持久化，
+之后的页面和下次运行优先尝试已知有效的选择器
+"""
+
+import os
+import json
+import logging
+import threading
+from typing import Dict, List
+
+log = logging.getLogger(__name__)
+
+
+class SelectorStats:
+    """{域名: {分组: {选择器: {'hits': n, 'misses': n}}}}"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data: Dict[str, Dict[str, Dict[str, Dict[str, int]]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"⚠ 读取选择器统计失败，重新开始统计: {e}")
+            self.data = {}
+
+    def save(self):
+        """原子写入（先写临时文件再替换）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def _entry(self, domain: str, group: str, selector: str) -> Dict[str, int]:
+        return (self.data.setdefault(domain, {})
+                .setdefault(group, {})
+                .setdefault(selector, {'hits': 0, 'misses': 0}))
+
+    def record_hit(self, domain: str, group: str, selector: str):
+        with self._lock:
+            self._entry(domain, group, selector)['hits'] += 1
+            self._dirty = True
+
+    def record_miss(self, domain: str, group: str, selector: str):
+        with self._lock:
+            self._entry(domain, group, selector)['misses'] += 1
+            self._dirty = True
+
+    def order(self, domain: str, group: str, selectors: List[str]) -> List[str]:
+        """按命中次数从高到低排序，次数相同（包括从未命中）保持原有优先级"""
+        with self._lock:
+            stats = self.data.get(domain, {}).get(group, {})
+            hits = {selector: stats.get(selector, {}).get('hits', 0) for selector in selectors}
+        return sorted(selectors, key=lambda selector: -hits[selector])
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段计时 - 用上下文管理器记录导航、等待、查找照片、下载、翻页等各阶段耗时，
+逐条写入JSONL事件文件，运行结束时汇总各阶段的 p50/p95/最大值和最慢的学生
+"""
+
+import json
+import math
+import time
+import threading
+import unicodedata
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# 最慢学生统计使用的阶段（整个学生的处理时间）
+STUDENT_STAGE = 'process_student'
+
+# 汇总表的列: (表头, 汇总字段, 显示宽度, 数值格式)；表头和数据行都按这里的宽度对齐
+REPORT_COLUMNS = [
+    ('阶段', 'name', 30, ''),
+    ('次数', 'count', 8, 'd'),
+    ('失败', 'failed', 8, 'd'),
+    ('p50', 'p50', 9, '.2f'),
+    ('p95', 'p95', 9, '.2f'),
+    ('最大', 'max', 9, '.2f'),
+    ('总计', 'total', 9, '.1f'),
+]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """最近秩法百分位数（sorted_values 已升序排列且非空）"""
+    rank = min(max(math.ceil(fraction * len(sorted_values)), 1), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def pad(text: str, width: int, left: bool = False) -> str:
+    """按终端显示宽度补齐（中文等全角字符占两列）"""
+    display = sum(2 if unicodedata.east_asian_width(ch) in 'WF' else 1 for ch in text)
+    fill = ' ' * max(width - display, 0)
+    return text + fill if left else fill + text
+
+
+class StageTimer:
+    """线程安全的阶段计时器
+
+    用法:
+        with timer.stage('download', student=name) as event:
+            event['bytes'] = size   # 可附加字段
+            event['ok'] = False     # 可标记结果（抛出异常时自动记为失败）
+
+    path 为None时只在内存中统计，不写文件。事件文件不逐行 fsync，避免拖慢循环。
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.durations: Dict[str, List[float]] = {}
+        self.failures: Dict[str, int] = {}
+        self.students: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8') if path else None
+
+    @contextmanager
+    def stage(self, name: str, **fields) -> Iterator[Dict]:
+        """计时一个阶段；产出的字典可写入附加字段，其中 'ok' 表示结果"""
+        event = dict(fields)
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield event
+        except BaseException:
+            event['ok'] = False
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, started, event)
+
+    def record(self, name: str, duration: float, started: Optional[float] = None,
+               fields: Optional[Dict] = None):
+        """记录一次阶段耗时（秒）"""
+        fields = dict(fields or {})
+        ok = bool(fields.pop('ok', True))
+        with self._lock:
+            self.durations.setdefault(name, []).append(duration)
+            if not ok:
+                self.failures[name] = self.failures.get(name, 0) + 1
+            if name == STUDENT_STAGE and 'student' in fields:
+                self.students.append((duration, fields['student']))
+            if self._file:
+                record = {'event': 'stage', 'stage': name, 'start': started or time.time(),
+                          'duration': round(duration, 6), 'ok': ok,
+                          'thread': threading.current_thread().name}
+                record.update(fields)
+                self._file.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """{阶段: {count, failed, total, p50, p95, max}}（时间单位为秒）"""
+        with self._lock:
+            items = [(name, sorted(values), self.failures.get(name, 0))
+                     for name, values in self.durations.items()]
+        result = {}
+        for name, values, failed in items:
+            result[name] = {
+                'count': len(values),
+                'failed': failed,
+                'total': sum(values),
+                'p50': percentile(values, 0.50),
+                'p95': percentile(values, 0.95),
+                'max': values[-1],
+            }
+        return result
+
+    def slowest_students(self, count: int = 5) -> List[Tuple[float, str]]:
+        """处理时间最长的学生 [(秒, 姓名)]"""
+        with self._lock:
+            return sorted(self.students, reverse=True)[:count]
+
+    def report(self, slowest: int = 5) -> List[str]:
+        """运行结束时的汇总表（按总耗时排序）"""
+        summary = self.summary()
+        if not summary:
+            return []
+        lines = [''.join(pad(title, width, left=(key == 'name')) for title, key, width, _ in REPORT_COLUMNS)]
+        for name, stats in sorted(summary.items(), key=lambda item: item[1]['total'], reverse=True):
+            row = {**stats, 'name': name}
+            lines.append(''.join(pad(format(row[key], spec), width, left=(key == 'name'))
+                                 for _, key, width, spec in REPORT_COLUMNS))
+        students = self.slowest_students(slowest)
+        if students:
+            lines.append("最慢的学生: " + ", ".join(f"{name} ({seconds:.1f}s)" for seconds, name in students))
+        return lines
+
+    def close(self):
+        """写入汇总事件并关闭事件文件"""
+        if not self._file:
+            return
+        summary = self.summary()
+        with self._lock:
+            record = {'event': 'summary', 'ts': time.time(), 'stages': summary,
+                      'slowest': [{'student': name, 'duration': round(seconds, 3)}
+                                  for seconds, name in sorted(self.students, reverse=True)[:10]]}
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.close()
+            self._file = None
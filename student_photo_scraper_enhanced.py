@@ -7,6 +7,7 @@
 
 import os
 import time
+import logging
 import requests
 import json
 from selenium import webdriver
@@ -15,32 +16,180 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import SessionNotCreatedException, TimeoutException, WebDriverException
+from requests.structures import CaseInsensitiveDict
 import urllib.parse
 import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
+from config import Config
+from download_pool import DownloadJob, PhotoDownloadPool
+from scrape_journal import ScrapeJournal, StudentState
+from http_fetcher import HttpDetailFetcher
+from page_scripts import EXTRACT_ROSTER_JS, FIND_PHOTO_CANDIDATES_JS
+from waits import PageWaiter
+from browser_pool import BrowserWorkerPool
+from selector_stats import SelectorStats
+from photo_store import PhotoStore
+from fetch_index import FetchIndex
+from image_validation import ImageSniffer, check_and_normalize
+from url_inference import PhotoUrlInference
+from pagination import RosterPrefetcher
+from stage_timer import StageTimer
+from response_capture import CapturedResponse, ResponseCapture, enable_performance_logging
+from browser_profile import apply_page_load_strategy, block_resources
+from tab_manager import DetailTabManager
+from rate_limiter import RateLimiter, RetryQueue, Throttled, backoff_delay
+from browser_startup import (forget_chromedriver, is_driver_version_mismatch, load_profile_state,
+                             resolve_chromedriver, save_profile_state)
+
+log = logging.getLogger(__name__)
+
 class EnhancedStudentPhotoScraper:
-    def __init__(self, download_dir="student_photos"):
+    # 学生列表页中学生链接的选择器（按优先级）
+    STUDENT_LINK_SELECTORS = [
+        "a[href*='student']",
+        ".student-name a",
+        ".student-info a",
+        "a.student-link",
+        "table tbody tr td a",
+        ".list-item a",
+        ".name-link",
+        "a[href*='detail']",
+        "a[href*='info']",
+    ]
+    
+    # "下一页"按钮的选择器
+    NEXT_BUTTON_SELECTORS = [
+        "a.next:not(.disabled)",
+        ".pagination .next:not(.disabled)",
+        "a[rel='next']:not(.disabled)",
+        ".page-next:not(.disabled)",
+        "a:contains('下一页'):not(.disabled)",
+    ]
+    
+    def __init__(self, download_dir="student_photos", resume=False, http_fast_path=False, browsers=1,
+                 refresh=False, infer_urls=None, pipeline=False, capture_responses=None, lean=None,
+                 rate_limit=None, chromedriver=None, profile_dir=None):
         self.download_dir = os.path.abspath(download_dir)
+        self.resume = resume
+        self.refresh = refresh
+        self.http_fast_path = http_fast_path
+        self.pipeline = pipeline
+        self.browsers = browsers
+        self.browser_pool: Optional[BrowserWorkerPool] = None
+        self.http_fetcher: Optional[HttpDetailFetcher] = None
         self.setup_directories()
+        self.photo_store = PhotoStore(self.download_dir)
+        self.fetch_index = FetchIndex(os.path.join(self.download_dir, Config.FILE_SETTINGS['fetch_index_file']))
+        self._init_browser_state()
+        self.download_pool: Optional[PhotoDownloadPool] = None
+        self.journal: Optional[ScrapeJournal] = None
+        self._driver_path: Optional[str] = None  # 解析后为路径，'' 表示交给Selenium查找
+        self.chromedriver = chromedriver
+        # 保留的浏览器配置目录（登录状态跨运行保存），None 为每次使用空白配置
+        profile_dir = profile_dir or Config.DRIVER_SETTINGS['profile_dir']
+        self.profile_dir = os.path.abspath(profile_dir) if profile_dir else None
+        self.selector_stats: Optional[SelectorStats] = None
+        if infer_urls is None:
+            infer_urls = Config.INFERENCE_SETTINGS['enabled']
+        self.url_inference: Optional[PhotoUrlInference] = PhotoUrlInference() if infer_urls else None
+        if capture_responses is None:
+            capture_responses = Config.CAPTURE_SETTINGS['enabled']
+        self.capture_responses = capture_responses
+        # 精简配置：DOM就绪即返回，并屏蔽与照片无关的资源
+        self.lean = Config.LEAN_PROFILE['enabled'] if lean is None else lean
+        # 按主机自适应限速（导航、HTTP快速通道和下载共用），失败的学生按退避时间重试
+        self.limiter = RateLimiter(enabled=rate_limit)
+        self.retry_queue = RetryQueue()
+        # 分阶段计时（开始抓取时改为写入事件文件；工作浏览器共用主抓取器的计时器）
+        self.timer = StageTimer()
+    
+    def _init_browser_state(self):
+        """每个浏览器各自持有的状态（主抓取器和工作浏览器的抓取器都从这里开始）"""
         self.driver = None
         self.session = requests.Session()
+        self._waiter: Optional[PageWaiter] = None
+        self._capture: Optional[ResponseCapture] = None
+        self._tabs: Optional[DetailTabManager] = None
+    
+    # 工作浏览器沿用的设置和共用的组件
+    _SHARED_WITH_WORKERS = (
+        'download_dir', 'resume', 'refresh', 'http_fast_path', 'pipeline',
+        'chromedriver', '_driver_path', 'capture_responses', 'lean',
+        'photo_store', 'fetch_index', 'download_pool', 'journal', 'selector_stats',
+        'url_inference', 'limiter', 'retry_queue', 'timer',
+    )
+    
+    @classmethod
+    def for_worker(cls, parent: 'EnhancedStudentPhotoScraper') -> 'EnhancedStudentPhotoScraper':
+        """工作浏览器使用的抓取器：沿用主抓取器的设置，共用其照片存储、索引、下载池、抓取日志、
+        限速器和计时器（不从磁盘重新读取）；不使用主抓取器的浏览器配置目录（同一目录不能被两个Chrome同时打开）"""
+        worker = cls.__new__(cls)
+        for name in cls._SHARED_WITH_WORKERS:
+            setattr(worker, name, getattr(parent, name))
+        worker.browsers = 1
+        worker.browser_pool = None
+        worker.http_fetcher = None
+        worker.profile_dir = None
+        worker._init_browser_state()
+        return worker
         
+    @property
+    def waiter(self) -> PageWaiter:
+        """当前浏览器的等待器（更换driver后自动重建）"""
+        if self._waiter is None or self._waiter.driver is not self.driver:
+            self._waiter = PageWaiter(self.driver)
+        return self._waiter
+    
+    @property
+    def network_log(self) -> bool:
+        """是否记录浏览器Network事件：响应捕获要取照片内容，限速器要读导航的状态码和 Retry-After"""
+        return bool(self.capture_responses or self.limiter.enabled)
+    
+    def _network_responses(self) -> Optional[ResponseCapture]:
+        """当前浏览器的网络响应记录（未记录Network事件时为None）"""
+        if not self.network_log or self.driver is None:
+            return None
+        if self._capture is None or self._capture.driver is not self.driver:
+            self._capture = ResponseCapture(self.driver)
+        return self._capture
+    
+    @property
+    def capture(self) -> Optional[ResponseCapture]:
+        """当前浏览器的响应捕获（未开启时为None）"""
+        if not self.capture_responses:
+            return None
+        return self._network_responses()
+    
+    @property
+    def tabs(self) -> Optional[DetailTabManager]:
+        """列表标签页 + 复用的详情标签页（TAB_SETTINGS['detail_tabs'] 为0时为None，使用弹出窗口）"""
+        count = Config.TAB_SETTINGS['detail_tabs']
+        if count < 1 or self.driver is None:
+            return None
+        if self._tabs is None or self._tabs.driver is not self.driver:
+            self._tabs = DetailTabManager(self.driver, count, on_new_tab=block_resources if self.lean else None)
+        return self._tabs
+    
     def setup_directories(self):
         """创建必要的目录"""
         if not os.path.exists(self.download_dir):
             os.makedirs(self.download_dir)
-            print(f"✓ 创建目录: {self.download_dir}")
+            log.info(f"✓ 创建目录: {self.download_dir}")
     
-    def setup_driver(self):
-        """设置Chrome浏览器驱动（自动管理ChromeDriver）"""
+    def build_chrome_options(self, headless: bool = False, profile_dir: Optional[str] = None) -> Options:
+        """Chrome启动参数"""
         chrome_options = Options()
+        if headless:
+            chrome_options.add_argument("--headless=new")
+        if profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument(f"--window-size={Config.BROWSER_SETTINGS['window_size']}")
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
@@ -58,46 +207,52 @@ class EnhancedStudentPhotoScraper:
         }
         chrome_options.add_experimental_option("prefs", prefs)
         
+        # 记录Network事件，照片内容可直接从浏览器取回，限速器也从中读取导航的状态码
+        if self.network_log:
+            enable_performance_logging(chrome_options)
+        if self.lean:
+            apply_page_load_strategy(chrome_options)
+        return chrome_options
+    
+    def resolve_driver_path(self, refresh: bool = False) -> str:
+        """chromedriver路径（同一进程内只解析一次；按Chrome版本缓存，版本不变时不联网）"""
+        if self._driver_path is None or refresh:
+            with self.timer.stage('driver_resolve') as event:
+                self._driver_path = resolve_chromedriver(self.chromedriver, refresh=refresh) or ''
+                event['path'] = self._driver_path
+        return self._driver_path
+    
+    def create_driver(self, headless: bool = False, profile_dir: Optional[str] = None):
+        """启动一个Chrome实例"""
+        options = self.build_chrome_options(headless, profile_dir)
         try:
-            # 使用webdriver-manager自动管理ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            print("✓ Chrome浏览器启动成功")
-            return True
-        except Exception as e:
-            print(f"✗ 启动浏览器失败: {e}")
-            return False
+            driver = webdriver.Chrome(service=Service(self.resolve_driver_path() or None), options=options)
+        except SessionNotCreatedException as e:
+            # 缓存的驱动与更新后的Chrome不匹配：删除缓存项，重新解析一次；其他原因直接抛出
+            if (self.chromedriver or not is_driver_version_mismatch(e)
+                    or not forget_chromedriver(self._driver_path)):
+                raise
+            log.info("🔄 缓存的ChromeDriver与当前Chrome版本不匹配，重新解析...")
+            driver = webdriver.Chrome(service=Service(self.resolve_driver_path(refresh=True) or None),
+                                      options=options)
+        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        # 无头浏览器不需要给操作员看完整页面，创建后立即屏蔽无关资源
+        if self.lean and headless:
+            block_resources(driver)
+        return driver
     
-    def switch_to_new_window(self, original_window: str) -> bool:
-        """切换到最新弹出的窗口"""
+    def setup_driver(self):
+        """设置Chrome浏览器驱动（自动管理ChromeDriver）"""
         try:
-            # 等待新窗口打开
-            WebDriverWait(self.driver, 15).until(
-                lambda driver: len(driver.window_handles) > 1
-            )
+            headless = Config.BROWSER_SETTINGS['headless']
+            with self.timer.stage('browser_launch'):
+                self.driver = self.create_driver(headless=headless, profile_dir=self.profile_dir)
             
-            # 获取所有窗口句柄
-            windows = self.driver.window_handles
-            
-            # 切换到最新的窗口（最后一个）
-            if len(windows) > 1:
-                latest_window = windows[-1]  # 获取最新的窗口
-                if latest_window != original_window:
-                    self.driver.switch_to.window(latest_window)
-                    print(f"✓ 已切换到最新窗口 (窗口 {len(windows)})")
-                    
-                    # 等待新窗口页面完全加载
-                    WebDriverWait(self.driver, 10).until(
-                        lambda driver: driver.execute_script("return document.readyState") == "complete"
-                    )
-                    time.sleep(2)  # 额外等待确保内容加载
-                    return True
-            
-            return False
+            log.info("✓ Chrome浏览器启动成功" + (" (无头模式)" if headless else "")
+                     + (f" (浏览器配置: {self.profile_dir})" if self.profile_dir else ""))
+            return True
         except Exception as e:
-            print(f"⚠ 切换窗口失败: {e}")
+            log.error(f"✗ 启动浏览器失败: {e}")
             return False
     
     def switch_to_latest_window(self) -> str:
@@ -115,233 +270,274 @@ class EnhancedStudentPhotoScraper:
     def close_extra_windows(self, original_window: str):
         """关闭多余的窗口，回到原始窗口"""
         try:
-            for window in self.driver.window_handles:
-                if window != original_window:
-                    self.driver.switch_to.window(window)
-                    self.driver.close()
-            self.driver.switch_to.window(original_window)
+            with self.timer.stage('close_windows'):
+                for window in self.driver.window_handles:
+                    if window != original_window:
+                        self.driver.switch_to.window(window)
+                        self.driver.close()
+                self.driver.switch_to.window(original_window)
         except Exception as e:
-            print(f"⚠ 关闭窗口时出错: {e}")
+            log.warning(f"⚠ 关闭窗口时出错: {e}")
     
-    def find_elements_with_multiple_selectors(self, selectors: List[str], timeout: int = 10) -> List:
-        """使用多个选择器查找元素"""
-        for selector in selectors:
-            try:
-                elements = WebDriverWait(self.driver, timeout).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-                )
-                if elements:
-                    print(f"✓ 找到元素: {selector}")
-                    return elements
-            except:
-                continue
-        return []
+    def current_domain(self) -> str:
+        """当前页面的域名（选择器统计按域名区分）"""
+        return urlparse(self.driver.current_url).netloc
+    
+    def ordered_selectors(self, group: str, selectors: List[str]) -> List[str]:
+        """按本网站的历史命中次数排序选择器"""
+        if not self.selector_stats:
+            return list(selectors)
+        return self.selector_stats.order(self.current_domain(), group, selectors)
+    
+    def record_selector_hit(self, group: str, selector: str, missed: Optional[List[str]] = None):
+        """记录命中的选择器，以及命中前未命中的选择器"""
+        if not self.selector_stats:
+            return
+        domain = self.current_domain()
+        self.selector_stats.record_hit(domain, group, selector)
+        for missed_selector in missed or []:
+            self.selector_stats.record_miss(domain, group, missed_selector)
     
     def get_students_from_page(self) -> List[Dict[str, str]]:
         """从当前页面获取学生列表"""
-        selectors = [
-            "a[href*='student']",
-            ".student-name a",
-            ".student-info a",
-            "a.student-link",
-            "table tbody tr td a",
-            ".list-item a",
-            ".name-link",
-            "a[href*='detail']",
-            "a[href*='info']",
-        ]
-        
-        students = []
-        elements = self.find_elements_with_multiple_selectors(selectors)
-        
-        # 获取当前窗口句柄，用于后续处理
-        original_window = self.driver.current_window_handle
-        
-        for element in elements:
-            try:
-                name = element.text.strip()
-                href = element.get_attribute('href')
-                
-                if name and href and len(name) >= 2:  # 过滤掉过短的姓名
-                    # 确保URL是完整的
-                    if href.startswith('//'):
-                        href = 'https:' + href
-                    elif href.startswith('/'):
-                        current_url = self.driver.current_url
-                        base_url = '/'.join(current_url.split('/')[:3])
-                        href = base_url + href
-                    
-                    # 检查是否是JavaScript链接
-                    if href.startswith('javascript:'):
-                        # 尝试点击元素打开新窗口
-                        try:
-                            element.click()
-                            time.sleep(2)
-                            if len(self.driver.window_handles) > 1:
-                                self.switch_to_new_window(original_window)
-                                # 获取新窗口的URL
-                                new_url = self.driver.current_url
-                                students.append({'name': name, 'url': new_url})
-                                # 关闭新窗口，回到原始窗口
-                                self.close_extra_windows(original_window)
-                            else:
-                                # 如果没有新窗口，使用原始href
-                                students.append({'name': name, 'url': href})
-                        except:
-                            students.append({'name': name, 'url': href})
-                    else:
-                        students.append({'name': name, 'url': href})
-            except Exception as e:
-                continue
+        # 先尝试本网站历史上最常命中的选择器
+        selectors = self.ordered_selectors('student_list', self.STUDENT_LINK_SELECTORS)
+        roster: Dict = {}
+        
+        def roster_found(driver):
+            nonlocal roster
+            roster = driver.execute_script(EXTRACT_ROSTER_JS, selectors, 2) or {}
+            return bool(roster.get('students'))
         
-        print(f"✓ 当前页面找到 {len(students)} 个学生")
+        # 一次页面脚本取回全部 (姓名, 绝对地址, onclick参数, 所在行)，列表未渲染完时轮询
+        with self.timer.stage('roster') as event:
+            self.waiter.until('page_load', roster_found)
+            students = roster.get('students') or []
+            event.update(ok=bool(students), students=len(students))
+        if students:
+            log.debug(f"✓ 找到元素: {roster['selector']}")
+            self.record_selector_hit('student_list', roster['selector'], selectors[:roster['index']])
+            unresolved = sum(1 for student in students if student['url'].startswith('javascript:'))
+            if unresolved:
+                log.warning(f"⚠ {unresolved} 个JavaScript链接无法从参数解析出地址，处理时将直接执行")
+        
+        log.info(f"✓ 当前页面找到 {len(students)} 个学生")
         return students
     
-    def wait_for_page_load(self, timeout: int = 10):
-        """等待页面完全加载"""
-        print("⏳ 等待页面加载...")
-        try:
-            WebDriverWait(self.driver, timeout).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
-            )
-            print("✅ 页面加载完成")
-            time.sleep(1)  # 减少额外等待
-        except:
-            print("⚠ 页面加载超时，继续尝试...")
-            time.sleep(2)  # 兜底等待
+    def wait_for_page_load(self, timeout: Optional[float] = None):
+        """等待页面完全加载（文档就绪且网络空闲）"""
+        log.debug("⏳ 等待页面加载...")
+        with self.timer.stage('page_load') as event:
+            event['ok'] = self.waiter.wait_for_document(timeout)
+            if event['ok']:
+                # 等待页面脚本发起的异步请求结束
+                self.waiter.wait_for_network_idle()
+        if event['ok']:
+            log.debug("✅ 页面加载完成")
+        else:
+            log.warning("⚠ 页面加载超时，继续尝试...")
     
     def find_photo_element(self) -> Optional[str]:
         """查找并返回照片URL"""
-        print("🔍 开始查找学生照片...")
-        
-        selectors = [
-            "img.student-photo",
-            ".student-avatar img",
-            "img[src*='photo']",
-            "img[src*='avatar']",
-            ".photo img",
-            "#student-photo",
-            "img[alt*='照片']",
-            "img[alt*='头像']",
-            ".profile-image img",
-            "img.profile-photo",
-            ".id-photo img",
-            "img.id-card",
-            ".student-card img",
-            "img[src*='head']",
-            "img[src*='face']",
-            ".avatar-img",
-            "img.avatar",
-        ]
-        
-        # 等待页面加载
-        self.wait_for_page_load()
+        with self.timer.stage('find_photo') as event:
+            photo_url = self._find_photo_element(event)
+            event['ok'] = photo_url is not None
+            return photo_url
+    
+    def _find_photo_element(self, event: Dict) -> Optional[str]:
+        """find_photo_element 的实现；各级查找分别计时，命中的级别写入 event['tier']"""
+        log.debug("🔍 开始查找学生照片...")
+        
+        selectors = self.ordered_selectors('photo', Config.STUDENT_PHOTO_SELECTORS)
+        
+        # 等待文档就绪，并等到照片图片解码完成（不等待与照片无关的资源）；
+        # 精简配置下只等DOM解析完成，之后由照片自身的加载状态判断
+        with self.timer.stage('find_photo.document') as document:
+            document['ok'] = self.waiter.wait_for_dom() if self.lean else self.waiter.wait_for_document()
+        if not document['ok']:
+            log.warning("⚠ 页面加载超时，继续尝试...")
+        with self.timer.stage('find_photo.wait_photo') as wait:
+            wait['ok'] = photo_ready = self.waiter.wait_for_photo(selectors)
         
         # 调试：打印当前页面信息
         try:
             current_url = self.driver.current_url
-            print(f"📍 当前页面URL: {current_url}")
+            log.debug(f"📍 当前页面URL: {current_url}")
             
             # 检查页面标题
             title = self.driver.title
-            print(f"📄 页面标题: {title}")
+            log.debug(f"📄 页面标题: {title}")
             
         except Exception as e:
-            print(f"⚠ 获取页面信息失败: {e}")
+            log.debug(f"⚠ 获取页面信息失败: {e}")
         
+        # 一次脚本调用完成所有选择器、尺寸、可见性检查
+        try:
+            # 照片已加载时无需再轮询
+            with self.timer.stage('find_photo.script') as script:
+                candidates = self.find_photo_candidates(timeout=0 if photo_ready else None, selectors=selectors)
+                script.update(ok=bool(candidates), candidates=len(candidates))
+        except WebDriverException as e:
+            log.warning(f"⚠ 页面内查找失败，改用逐个选择器查找: {e}")
+            event['tier'] = 'fallback'
+            return self.find_photo_by_selectors(selectors)
+        
+        if candidates:
+            best = candidates[0]
+            event['tier'] = best['tier']
+            if best['selector']:
+                self.record_selector_hit('photo', best['selector'])
+            source = f"选择器: {best['selector']}" if best['selector'] else f"通用查找 第{best['tier']}级"
+            log.debug(f"✅ 找到照片 ({source}, {best['width']}x{best['height']}): {best['src']}")
+            return best['src']
+        
+        log.debug("⚠ 未找到学生照片")
+        return None
+    
+    def find_photo_candidates(self, timeout: Optional[float] = None,
+                              selectors: Optional[List[str]] = None) -> List[Dict]:
+        """在页面内执行一次查找脚本，返回排好序的照片候选
+
+        标准选择器未命中时在 timeout 内轮询，等待照片元素出现；
+        超时后返回通用查找得到的候选（可能为空）。
+        """
+        if timeout is None:
+            timeout = Config.WAIT_TIME['photo_load']
+        selectors = selectors or Config.STUDENT_PHOTO_SELECTORS
+        keywords = Config.PHOTO_KEYWORDS
+        latest: List[Dict] = []
+        
+        def has_selector_match(driver):
+            nonlocal latest
+            latest = driver.execute_script(FIND_PHOTO_CANDIDATES_JS, selectors, keywords) or []
+            return any(candidate['tier'] == 1 for candidate in latest)
+        
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=Config.WAIT_TIME['poll_interval']).until(has_selector_match)
+        except TimeoutException:
+            pass
+        return latest
+    
+    def find_photo_by_selectors(self, selectors: Optional[List[str]] = None) -> Optional[str]:
+        """逐个选择器查找照片（每次元素访问都是一次WebDriver往返，作为页面脚本不可用时的兜底）"""
+        selectors = selectors or Config.STUDENT_PHOTO_SELECTORS
         found_imgs = []
+        missed = []
         
         # 尝试多个选择器
-        print("🔍 尝试标准选择器...")
-        for selector in selectors:
-            try:
-                img_elements = WebDriverWait(self.driver, 3).until(  # 减少等待时间
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-                )
+        log.debug("🔍 尝试标准选择器...")
+        with self.timer.stage('find_photo.selectors') as tier:
+            for selector in selectors:
+                try:
+                    img_elements = WebDriverWait(self.driver, 3).until(  # 减少等待时间
+                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
+                    )
                 
-                for img_element in img_elements:
-                    src = img_element.get_attribute('src')
-                    if src and not src.startswith('data:'):  # 排除base64图片
-                        width = img_element.size.get('width', 0)
-                        height = img_element.size.get('height', 0)
-                        if width > 50 and height > 50:
-                            print(f"✅ 找到照片 (选择器: {selector}): {src}")
-                            return src
-                        else:
-                            found_imgs.append(f"小图片: {src} ({width}x{height})")
-            except:
-                continue
+                    for img_element in img_elements:
+                        src = img_element.get_attribute('src')
+                        if src and not src.startswith('data:'):  # 排除base64图片
+                            width = img_element.size.get('width', 0)
+                            height = img_element.size.get('height', 0)
+                            if width > 50 and height > 50:
+                                log.debug(f"✅ 找到照片 (选择器: {selector}): {src}")
+                                self.record_selector_hit('photo', selector, missed)
+                                return src
+                            else:
+                                found_imgs.append(f"小图片: {src} ({width}x{height})")
+                except:
+                    pass
+                missed.append(selector)
+            tier['ok'] = False
         
-        print("🔍 标准选择器未找到，尝试通用查找...")
+        log.debug("🔍 标准选择器未找到，尝试通用查找...")
         
         # 如果没找到特定选择器，尝试查找页面中所有图片
-        try:
-            all_imgs = self.driver.find_elements(By.TAG_NAME, "img")
-            print(f"📊 页面中找到 {len(all_imgs)} 个图片")
+        with self.timer.stage('find_photo.generic') as tier:
+            try:
+                all_imgs = self.driver.find_elements(By.TAG_NAME, "img")
+                log.debug(f"📊 页面中找到 {len(all_imgs)} 个图片")
             
-            candidate_imgs = []
-            for i, img in enumerate(all_imgs):
-                try:
-                    src = img.get_attribute('src')
-                    if src and not src.startswith('data:'):
-                        width = img.size.get('width', 0)
-                        height = img.size.get('height', 0)
-                        is_displayed = img.is_displayed()
+                candidate_imgs = []
+                for i, img in enumerate(all_imgs):
+                    try:
+                        src = img.get_attribute('src')
+                        if src and not src.startswith('data:'):
+                            width = img.size.get('width', 0)
+                            height = img.size.get('height', 0)
+                            is_displayed = img.is_displayed()
                         
-                        print(f"   图片{i+1}: {src[:80]}... ({width}x{height}) 显示: {is_displayed}")
+                            log.debug(f"   图片{i+1}: {src[:80]}... ({width}x{height}) 显示: {is_displayed}")
                         
-                        # 过滤条件
-                        if width >= 100 and height >= 100 and is_displayed:
-                            # 检查URL是否包含照片相关关键词
-                            src_lower = src.lower()
-                            if any(keyword in src_lower for keyword in ['photo', 'avatar', 'pic', 'img', 'head', 'face', 'student']):
-                                candidate_imgs.append(src)
-                                if len(candidate_imgs) == 1:  # 返回第一个匹配的
-                                    print(f"✅ 找到候选照片: {src}")
-                                    return src
-                except Exception as e:
-                    print(f"   图片{i+1} 检查失败: {e}")
-                    continue
+                            # 过滤条件
+                            if width >= 100 and height >= 100 and is_displayed:
+                                # 检查URL是否包含照片相关关键词
+                                src_lower = src.lower()
+                                if any(keyword in src_lower for keyword in Config.PHOTO_KEYWORDS):
+                                    candidate_imgs.append(src)
+                                    if len(candidate_imgs) == 1:  # 返回第一个匹配的
+                                        log.debug(f"✅ 找到候选照片: {src}")
+                                        return src
+                    except Exception as e:
+                        log.debug(f"   图片{i+1} 检查失败: {e}")
+                        continue
                     
-            if candidate_imgs:
-                print(f"✅ 使用候选照片: {candidate_imgs[0]}")
-                return candidate_imgs[0]
+                if candidate_imgs:
+                    log.debug(f"✅ 使用候选照片: {candidate_imgs[0]}")
+                    return candidate_imgs[0]
                 
-        except Exception as e:
-            print(f"⚠ 通用查找失败: {e}")
+            except Exception as e:
+                log.warning(f"⚠ 通用查找失败: {e}")
+            tier['ok'] = False
         
         # 最后尝试查找所有可见的图片
-        print("🔍 最后尝试查找可见图片...")
-        try:
-            visible_imgs = []
-            all_imgs = self.driver.find_elements(By.TAG_NAME, "img")
+        log.debug("🔍 最后尝试查找可见图片...")
+        with self.timer.stage('find_photo.visible') as tier:
+            try:
+                visible_imgs = []
+                all_imgs = self.driver.find_elements(By.TAG_NAME, "img")
             
-            for img in all_imgs:
-                try:
-                    if img.is_displayed():
-                        width = img.size.get('width', 0)
-                        if width >= 100:
-                            src = img.get_attribute('src')
-                            if src and not src.startswith('data:'):
-                                visible_imgs.append(src)
+                for img in all_imgs:
+                    try:
+                        if img.is_displayed():
+                            width = img.size.get('width', 0)
+                            if width >= 100:
+                                src = img.get_attribute('src')
+                                if src and not src.startswith('data:'):
+                                    visible_imgs.append(src)
                                 
-                except Exception as e:
-                    continue
+                    except Exception as e:
+                        continue
             
-            if visible_imgs:
-                print(f"✅ 使用可见图片: {visible_imgs[0]}")
-                return visible_imgs[0]
-            else:
-                print("❌ 未找到任何符合条件的图片")
+                if visible_imgs:
+                    log.debug(f"✅ 使用可见图片: {visible_imgs[0]}")
+                    return visible_imgs[0]
+                else:
+                    log.debug("❌ 未找到任何符合条件的图片")
                 
-        except Exception as e:
-            print(f"⚠ 最终查找失败: {e}")
+            except Exception as e:
+                log.warning(f"⚠ 最终查找失败: {e}")
+            tier['ok'] = False
         
-        print("⚠ 未找到学生照片")
+        log.debug("⚠ 未找到学生照片")
         return None
     
-    def download_photo(self, name: str, photo_url: str) -> bool:
-        """下载单张照片"""
+    def download_photo(self, name: str, photo_url: str, referer: Optional[str] = None,
+                       cookies: Optional[Dict[str, str]] = None,
+                       session: Optional[requests.Session] = None,
+                       captured: Optional[CapturedResponse] = None) -> bool:
+        """下载单张照片
+
+        referer/cookies 未提供时从浏览器读取；在下载线程中调用时必须显式传入，
+        因为 WebDriver 不能跨线程使用。提供 captured（浏览器已取到的照片内容）时不再发送请求。
+        """
+        with self.timer.stage('download', student=name) as event:
+            event['ok'] = self._download_photo(name, photo_url, referer, cookies, session, captured, event)
+            return event['ok']
+    
+    def _download_photo(self, name: str, photo_url: str, referer: Optional[str],
+                        cookies: Optional[Dict[str, str]], session: Optional[requests.Session],
+                        captured: Optional[CapturedResponse], event: Dict) -> bool:
+        """download_photo 的实现；下载结果（字节数、来源、跳过原因）写入 event"""
         try:
             # 清理文件名
             safe_name = re.sub(r'[^\w\s-]', '', name).strip()
@@ -356,384 +552,927 @@ class EnhancedStudentPhotoScraper:
             else:
                 ext = '.jpg'
             
-            filename = f"{safe_name}{ext}"
-            filepath = os.path.join(self.download_dir, filename)
+            # 避免重复下载（按学生姓名+照片地址查索引，同名学生不会互相覆盖）；
+            # --refresh 时改为发送条件请求，照片未变化时服务器只返回304
+            already_saved = self.photo_store.has(name, photo_url)
+            if already_saved and not self.refresh:
+                log.debug(f"⚠ 照片已在索引中，跳过: {name}")
+                event['skipped'] = 'indexed'
+                return True
             
-            # 避免重复下载
-            if os.path.exists(filepath):
-                print(f"⚠ 文件已存在，跳过: {filename}")
+            filename = f"{safe_name}{ext}"
+            if self.photo_store.is_unmanaged_file(filename):
+                log.warning(f"⚠ 文件已存在，跳过: {filename}")
                 return False
             
-            # 获取浏览器cookies用于会话保持
-            cookies = self.driver.get_cookies()
-            session = requests.Session()
-            
-            # 添加cookies到session
-            for cookie in cookies:
-                session.cookies.set(cookie['name'], cookie['value'])
-            
-            # 下载图片
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Referer': self.driver.current_url,
-                'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
-                'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
-            }
-            
-            print(f"📥 正在下载: {photo_url}")
-            response = session.get(photo_url, headers=headers, timeout=15, stream=True)
-            response.raise_for_status()
-            
-            # 验证内容类型
-            content_type = response.headers.get('content-type', '')
-            if 'image' not in content_type:
-                print(f"⚠ 跳过非图片内容: {content_type}")
-                return False
+            response = None
+            if captured is not None:
+                # 浏览器打开详情页时已经取到了照片，直接使用其内容
+                log.debug(f"📥 使用浏览器已下载的照片: {photo_url}")
+                event['source'] = 'browser'
+                response_headers = CaseInsensitiveDict(captured.headers)
+                chunks = [captured.body]
+            else:
+                # 获取浏览器cookies用于会话保持
+                if cookies is None:
+                    cookies = self.get_browser_cookies()
+                if referer is None:
+                    referer = self.driver.current_url
+                if session is None:
+                    session = self.session
+                
+                # 下载图片
+                headers = {
+                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                    'Referer': referer,
+                    'Accept': 'image/webp,image/apng,image/*,*/*;q=0.8',
+                    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
+                }
+                if already_saved:
+                    headers.update(self.fetch_index.conditional_headers(photo_url))
+                
+                log.debug(f"📥 正在下载: {photo_url}")
+                event['source'] = 'http'
+                with self.limiter.request(photo_url) as slot:
+                    response = session.get(photo_url, headers=headers, cookies=cookies,
+                                           timeout=Config.DOWNLOAD_SETTINGS['timeout'], stream=True)
+                    try:
+                        slot.observe(response.status_code, response.headers)
+                    except Throttled:
+                        response.close()
+                        raise
+                if response.status_code == 304:
+                    response.close()
+                    self.fetch_index.touch(photo_url, response.headers)
+                    log.info(f"✓ 照片未变化 (304): {name}")
+                    event['skipped'] = 'not_modified'
+                    return True
+                response.raise_for_status()
+                response_headers = response.headers
+                chunks = response.iter_content(chunk_size=8192)
             
-            # 根据实际内容类型重新确定扩展名
-            content_type_lower = content_type.lower()
-            if 'jpeg' in content_type_lower or 'jpg' in content_type_lower:
-                ext = '.jpg'
-            elif 'png' in content_type_lower:
-                ext = '.png'
-            elif 'gif' in content_type_lower:
-                ext = '.gif'
-            elif 'bmp' in content_type_lower:
-                ext = '.bmp'
-            
-            # 更新文件名
-            filename = f"{safe_name}{ext}"
-            filepath = os.path.join(self.download_dir, filename)
+            size = response_headers.get('content-length')
+            if size:
+                log.debug(f"📏 文件大小: {int(size)} bytes")
+            
+            # 明确是文本（登录页、错误页）时直接跳过；其余按文件头判断
+            content_type = response_headers.get('content-type', '')
+            if content_type.lower().startswith('text/'):
+                if response is not None:
+                    response.close()
+                log.warning(f"⚠ 跳过非图片内容: {content_type}")
+                return False
             
-            # 保存文件
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+            # 边下载边计算内容哈希，并按文件头识别真实格式
+            writer = self.photo_store.new_writer()
+            sniffer = ImageSniffer()
+            try:
+                for chunk in chunks:
                     if chunk:  # 确保chunk不为空
-                        f.write(chunk)
+                        if not sniffer.feed(chunk):
+                            break
+                        writer.write(chunk)
+            except Exception:
+                writer.discard()
+                raise
             
             # 验证文件完整性
-            file_size = os.path.getsize(filepath)
+            file_size = writer.size
+            if (file_size or sniffer.decided) and not sniffer.finish():
+                if response is not None:
+                    response.close()
+                writer.discard()
+                log.warning(f"✗ 下载失败: 内容不是图片 ({content_type or '无content-type'}, {name})")
+                return False
             if file_size == 0:
-                print(f"✗ 下载失败: 文件为空 ({filename})")
-                os.remove(filepath)  # 删除空文件
+                log.warning(f"✗ 下载失败: 文件为空 ({name})")
+                writer.discard()  # 删除空文件
+                return False
+            ext = sniffer.ext
+            
+            # 解码一次：拒绝截断/损坏的图片，同时生成展示版本
+            writer.close()
+            check = check_and_normalize(writer.path)
+            if not check.valid:
+                log.warning(f"✗ 下载失败: 图片已损坏 ({check.reason}, {name})")
+                writer.discard()
                 return False
+            
+            entry = self.photo_store.commit(writer, name, safe_name, photo_url, ext, content_type,
+                                            display_path=check.display_path, display_ext=check.display_ext)
+            self.fetch_index.update(photo_url, response_headers, entry['sha256'])
+            event['bytes'] = file_size
+            if entry['placeholder']:
+                log.info(f"🖼 检测到占位图（{entry['refs']} 个学生共用同一图片），不生成照片文件: {name}")
+            elif entry['duplicate']:
+                log.info(f"♻ 内容与已有照片相同，已链接: {entry['file']} ({file_size} bytes)")
             elif file_size < 100:
-                print(f"⚠ 图片较小 ({file_size} bytes): {filename}")
-                return True
+                log.warning(f"⚠ 图片较小 ({file_size} bytes): {entry['file']}")
             else:
-                print(f"✓ 已保存: {filename} ({file_size} bytes)")
-                return True
+                log.info(f"✓ 已保存: {entry['file']} ({file_size} bytes)")
+            return True
                 
+        except Throttled:
+            raise
         except requests.exceptions.RequestException as e:
-            print(f"✗ 网络错误 {name}: {e}")
+            log.error(f"✗ 网络错误 {name}: {e}")
             return False
         except Exception as e:
-            print(f"✗ 下载失败 {name}: {e}")
+            log.error(f"✗ 下载失败 {name}: {e}")
             return False
     
-    def wait_for_new_window_or_navigation(self, original_window: str, original_url: str, timeout: int = 8) -> bool:
-        """等待新窗口或页面导航完成"""
-        start_time = time.time()
-        while time.time() - start_time < timeout:
+    def capture_photo(self, photo_url: str) -> Optional[CapturedResponse]:
+        """从浏览器取回详情页已加载的照片内容（必须在关闭详情页窗口之前调用）"""
+        capture = self.capture
+        if capture is None or not capture.available:
+            return None
+        with self.timer.stage('capture') as event:
+            captured = capture.body(photo_url)
+            event['ok'] = captured is not None
+        if captured is None:
+            log.debug("⚠ 浏览器中没有可用的照片内容，改为HTTP下载")
+        return captured
+    
+    def get_browser_cookies(self) -> Dict[str, str]:
+        """读取浏览器当前会话的cookies"""
+        return {cookie['name']: cookie['value'] for cookie in self.driver.get_cookies()}
+    
+    def download_photo_job(self, job: DownloadJob, session: requests.Session) -> bool:
+        """下载池的处理函数；服务器要求降速时在下载线程中按退避时间重试"""
+        for attempt in range(1, self.retry_queue.retries + 2):
             try:
-                # 检查是否有新窗口
-                current_windows = self.driver.window_handles
-                if len(current_windows) > 1 and current_windows[-1] != original_window:
-                    self.driver.switch_to.window(current_windows[-1])
-                    print("🔄 已切换到新窗口")
-                    return True
-                    
-                # 检查URL是否改变
-                current_url = self.driver.current_url
-                if current_url != original_url and not current_url.startswith('about:'):
-                    print("🔄 检测到页面导航")
-                    return True
-                    
-                time.sleep(0.5)
-            except:
-                time.sleep(0.5)
+                return self.download_photo(job.name, job.photo_url, referer=job.referer,
+                                           cookies=job.cookies, session=session, captured=job.captured)
+            except Throttled as e:
+                if attempt > self.retry_queue.retries:
+                    log.warning(f"✗ 下载重试次数已用完 ({e.status}): {job.name}")
+                    return False
+                delay = backoff_delay(attempt, self.retry_queue.base, self.retry_queue.maximum, e.retry_after)
+                log.info(f"🔁 下载被限流 ({e.status})，{delay:.1f} 秒后重试: {job.name}")
+                time.sleep(delay)
+        return False
+    
+    def record_download_result(self, student: Dict[str, str], success: bool):
+        """把下载结果写入抓取日志"""
+        if not self.journal:
+            return
+        if success:
+            self.journal.record_student(student, StudentState.DOWNLOADED)
+        else:
+            self.journal.record_student(student, StudentState.FAILED, reason='download_failed')
+    
+    def on_download_done(self, job: DownloadJob, success: bool):
+        """下载池回调（在下载线程中执行）"""
+        if job.student:
+            self.record_download_result(job.student, success)
+    
+    def wait_for_new_window_or_navigation(self, known_handles: List[str], original_url: str,
+                                          timeout: Optional[float] = None) -> bool:
+        """等待 known_handles 之外的新窗口出现或当前页面导航完成"""
+        with self.timer.stage('window_wait') as event:
+            result = self.waiter.wait_for_new_window_or_navigation(known_handles, original_url, timeout)
+            event['ok'] = bool(result)
+        
+        # 条件返回新窗口句柄，或True表示当前页面已导航
+        if isinstance(result, str):
+            self.driver.switch_to.window(result)
+            log.debug("🔄 已切换到新窗口")
+            return True
+        if result:
+            log.debug("🔄 检测到页面导航")
+            return True
         
-        print("⚠ 未检测到窗口变化或页面导航")
+        log.debug("⚠ 未检测到窗口变化或页面导航")
         return False
 
     def process_student(self, student: Dict[str, str]) -> bool:
         """处理单个学生"""
+        with self.timer.stage('process_student', student=student['name']) as event:
+            event['ok'] = self._process_student(student)
+            return event['ok']
+    
+    def _process_student(self, student: Dict[str, str]) -> bool:
+        """process_student 的实现"""
         try:
             original_window = self.driver.current_window_handle
             original_url = self.driver.current_url
+            tabs = self.tabs
+            if tabs:
+                tabs.attach(original_window)
             
-            print(f"\n📋 处理学生: {student['name']}")
-            print(f"🌐 目标URL: {student['url']}")
-
-            # 记录初始状态
-            initial_windows = len(self.driver.window_handles)
-            print(f"🔗 初始窗口数: {initial_windows}")
+            log.debug(f"\n📋 处理学生: {student['name']}")
+            log.debug(f"🌐 目标URL: {student['url']}")
 
-            # 根据URL类型选择处理方式
+            # 打开详情页；导航计入详情页所在主机的限速，状态码从浏览器网络日志中读取
             if student['url'].startswith('javascript:'):
-                print("⚡ 执行JavaScript链接...")
-                self.driver.execute_script(student['url'])
-                
-            elif student['url'].startswith('http'):
-                # 尝试多种方式处理HTTP链接
-                processed = False
-                
-                # 方法1: 尝试在当前页面查找并点击对应链接
-                if not processed:
-                    try:
-                        # 构建精确和模糊选择器
-                        selectors = [
-                            f"a[href='{student['url']}']",
-                            f"a[href*='{student['url'].split('/')[-1]}']",
-                            f"a[title*='{student['name']}']",
-                            f"a:contains('{student['name']}')",
-                            "a.student-link",
-                            "a.detail-link",
-                            "a[href*='student']",
-                            "a[href*='detail']",
-                            "a[target='_blank']",
-                            "td a",
-                            ".name a"
-                        ]
-                        
-                        for selector in selectors:
-                            try:
-                                elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                                for element in elements:
-                                    if element.is_displayed() and element.is_enabled():
-                                        # 验证链接相关性
-                                        text = element.text.strip()
-                                        href = element.get_attribute('href') or ''
-                                        
-                                        # 优先匹配姓名
-                                        if student['name'] in text:
-                                            print(f"🎯 通过姓名匹配点击: {text}")
-                                            element.click()
-                                            processed = True
-                                            break
-                                        elif student['url'] in href or href in student['url']:
-                                            print(f"🔗 通过URL匹配点击: {selector}")
-                                            element.click()
-                                            processed = True
-                                            break
-                                            
-                                if processed:
-                                    break
-                                    
-                            except Exception as e:
-                                continue
-                                
-                    except Exception as e:
-                        print(f"❌ 方法1失败: {e}")
-                
-                # 方法2: 直接访问URL（如果方法1失败）
-                if not processed:
-                    try:
-                        print("🔄 直接访问URL...")
-                        self.driver.get(student['url'])
-                        processed = True
-                    except Exception as e:
-                        print(f"❌ 直接访问失败: {e}")
-                        return False
-            
+                nav_url = original_url
             else:
-                # 相对路径或其他情况
-                try:
-                    full_url = urllib.parse.urljoin(original_url, student['url'])
-                    print(f"🔗 处理相对路径: {student['url']} -> {full_url}")
-                    self.driver.get(full_url)
-                except Exception as e:
-                    print(f"❌ 相对路径处理失败: {e}")
+                nav_url = urllib.parse.urljoin(original_url, student['url'])
+            with self.limiter.request(nav_url) as slot:
+                if not self._open_detail(student, original_url):
+                    slot.failed()
                     return False
+                slot.observe(*self.page_status())
 
-            # 等待页面变化
-            if not self.wait_for_new_window_or_navigation(original_window, original_url):
-                print("⚠ 等待超时，继续尝试...")
-                time.sleep(2)
-
-            # 确保页面完全加载
-            self.wait_for_page_load()
-            print(f"📍 当前页面: {self.driver.current_url}")
+            log.debug(f"📍 当前页面: {self.driver.current_url}")
 
             # 查找并下载照片
             photo_url = self.find_photo_element()
             download_success = False
             
             if photo_url:
-                print(f"📸 找到照片: {photo_url}")
-                
-                # 检查文件大小
-                try:
-                    response = requests.head(photo_url, timeout=5)
-                    size = response.headers.get('content-length')
-                    if size:
-                        print(f"📏 文件大小: {int(size)} bytes")
-                except:
-                    pass
+                log.debug(f"📸 找到照片: {photo_url}")
+                if self.url_inference:
+                    self.url_inference.observe(student['url'], photo_url)
+                # 照片已在浏览器中加载，直接取出内容，不再重新下载；
+                # 已保存过的照片会被跳过（--refresh 时改发条件请求），不必等待浏览器取回内容
+                captured = None
+                if not self.photo_store.has(student['name'], photo_url):
+                    captured = self.capture_photo(photo_url)
                 
-                download_success = self.download_photo(student['name'], photo_url)
-                if download_success:
-                    print(f"✅ 学生 {student['name']} 照片下载完成")
+                if self.download_pool:
+                    # 交给下载池，浏览器线程继续处理下一个学生
+                    self.queue_photo(student, photo_url, self.driver.current_url, captured)
+                    download_success = True
+                    log.info(f"📤 学生 {student['name']} 照片已加入下载队列 (等待中: {self.download_pool.pending()})")
                 else:
-                    print(f"❌ 学生 {student['name']} 照片下载失败")
+                    if self.journal:
+                        self.journal.record_student(student, StudentState.RESOLVED, photo_url=photo_url,
+                                                    referer=self.driver.current_url)
+                    download_success = self.download_photo(student['name'], photo_url, captured=captured)
+                    self.record_download_result(student, download_success)
+                    if download_success:
+                        log.info(f"✅ 学生 {student['name']} 照片下载完成")
+                    else:
+                        log.warning(f"❌ 学生 {student['name']} 照片下载失败")
             else:
-                print("⚠ 未找到学生照片")
+                log.debug("⚠ 未找到学生照片")
                 # 提供调试信息
                 try:
                     imgs = [img for img in self.driver.find_elements(By.TAG_NAME, "img") 
                            if img.size.get('width', 0) > 50]
-                    print(f"📊 找到 {len(imgs)} 个可能的照片")
+                    log.debug(f"📊 找到 {len(imgs)} 个可能的照片")
                     for i, img in enumerate(imgs[:3]):
                         src = img.get_attribute('src') or '无src'
                         alt = img.get_attribute('alt') or '无alt'
                         size = f"{img.size.get('width')}x{img.size.get('height')}"
-                        print(f"   图片{i+1}: {src[:60]}... ({size}) alt: {alt}")
+                        log.debug(f"   图片{i+1}: {src[:60]}... ({size}) alt: {alt}")
                 except Exception as e:
-                    print(f"❌ 调试信息获取失败: {e}")
+                    log.debug(f"❌ 调试信息获取失败: {e}")
                 
-                print(f"⚠ 学生 {student['name']} 无照片可下载")
+                log.warning(f"⚠ 学生 {student['name']} 无照片可下载")
+                if self.journal:
+                    self.journal.record_student(student, StudentState.FAILED, reason='photo_not_found')
                 download_success = False
 
             # 清理并返回原始窗口
-            self.close_extra_windows(original_window)
+            self.return_to_roster(original_window, original_url)
             
             # 明确显示完成状态
-            print(f"🏁 学生 {student['name']} 处理完成")
+            log.debug(f"🏁 学生 {student['name']} 处理完成")
             return download_success
 
+        except Throttled as e:
+            log.warning(f"🐢 服务器要求降速 ({e.status}): {student['name']}")
+            try:
+                self.return_to_roster(original_window, original_url)
+            except:
+                pass
+            self.defer_student(student, f"http_{e.status}", e.retry_after)
+            return False
+
         except Exception as e:
-            print(f"❌ 处理学生失败: {student['name']}")
-            print(f"   错误: {str(e)}")
+            log.error(f"❌ 处理学生失败: {student['name']}\n   错误: {str(e)}")
             
             # 清理窗口
             try:
-                self.close_extra_windows(original_window)
+                self.return_to_roster(original_window, original_url)
             except:
                 pass
+            # 超时、窗口错误等多为暂时性问题，稍后重试
+            self.defer_student(student, 'error')
             return False
     
+    def defer_student(self, student: Dict[str, str], reason: str, retry_after: Optional[float] = None):
+        """把处理失败的学生放入重试队列；重试次数用完时记入抓取日志"""
+        if self.retry_queue.defer((student['name'], student['url']), student, retry_after):
+            log.info(f"🔁 稍后重试: {student['name']} ({reason})")
+            return
+        log.warning(f"✗ 重试次数已用完: {student['name']} ({reason})")
+        if self.journal:
+            self.journal.record_student(student, StudentState.FAILED, reason=reason)
+    
+    def retry_deferred(self, totals: Dict[str, int]) -> int:
+        """按退避时间依次重试队列中的学生（重试中再次失败的会重新排队），返回找到照片的学生数"""
+        found = 0
+        if len(self.retry_queue):
+            log.info(f"\n🔁 重试 {len(self.retry_queue)} 个失败的学生...")
+        while True:
+            entry = self.retry_queue.pop()
+            if entry is None:
+                return found
+            student, attempt = entry
+            log.info(f"🔁 第 {attempt} 次重试: {student['name']}")
+            if self.process_student(student):
+                found += 1
+                totals['downloaded'] += 1
+    
+    def _open_detail(self, student: Dict[str, str], original_url: str) -> bool:
+        """打开学生详情页（详情标签页、弹出窗口或当前页面跳转），并切换到详情页；失败返回False"""
+        tabs = self.tabs
+        opened_in_tab = False
+        
+        # 记录初始状态：已打开的窗口（列表页和复用的详情标签页）都不算新窗口
+        known_handles = list(self.driver.window_handles)
+        log.debug(f"🔗 初始窗口数: {len(known_handles)}")
+
+        # 根据URL类型选择处理方式
+        if student['url'].startswith('javascript:'):
+            log.debug("⚡ 执行JavaScript链接...")
+            self.driver.execute_script(student['url'])
+            
+        elif tabs:
+            # 在复用的详情标签页中打开，列表标签页保持不动（不点击链接、不弹出窗口）
+            detail_url = urllib.parse.urljoin(original_url, student['url'])
+            with self.timer.stage('open_detail') as event:
+                hits = tabs.preload_hits
+                tabs.open(detail_url, self.waiter)
+                event['preloaded'] = tabs.preload_hits > hits
+            opened_in_tab = True
+            
+        elif student['url'].startswith('http'):
+            # 尝试多种方式处理HTTP链接
+            processed = False
+            
+            # 方法1: 尝试在当前页面查找并点击对应链接
+            if not processed:
+                try:
+                    # 构建精确和模糊选择器
+                    selectors = [
+                        f"a[href='{student['url']}']",
+                        f"a[href*='{student['url'].split('/')[-1]}']",
+                        f"a[title*='{student['name']}']",
+                        f"a:contains('{student['name']}')",
+                        "a.student-link",
+                        "a.detail-link",
+                        "a[href*='student']",
+                        "a[href*='detail']",
+                        "a[target='_blank']",
+                        "td a",
+                        ".name a"
+                    ]
+                    
+                    for selector in selectors:
+                        try:
+                            elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+                            for element in elements:
+                                if element.is_displayed() and element.is_enabled():
+                                    # 验证链接相关性
+                                    text = element.text.strip()
+                                    href = element.get_attribute('href') or ''
+                                    
+                                    # 优先匹配姓名
+                                    if student['name'] in text:
+                                        log.debug(f"🎯 通过姓名匹配点击: {text}")
+                                        element.click()
+                                        processed = True
+                                        break
+                                    elif student['url'] in href or href in student['url']:
+                                        log.debug(f"🔗 通过URL匹配点击: {selector}")
+                                        element.click()
+                                        processed = True
+                                        break
+                                        
+                            if processed:
+                                break
+                                
+                        except Exception as e:
+                            continue
+                            
+                except Exception as e:
+                    log.debug(f"❌ 方法1失败: {e}")
+            
+            # 方法2: 直接访问URL（如果方法1失败）
+            if not processed:
+                try:
+                    log.debug("🔄 直接访问URL...")
+                    self.driver.get(student['url'])
+                    processed = True
+                except Exception as e:
+                    log.error(f"❌ 直接访问失败: {e}")
+                    return False
+        
+        else:
+            # 相对路径或其他情况
+            try:
+                full_url = urllib.parse.urljoin(original_url, student['url'])
+                log.debug(f"🔗 处理相对路径: {student['url']} -> {full_url}")
+                self.driver.get(full_url)
+            except Exception as e:
+                log.error(f"❌ 相对路径处理失败: {e}")
+                return False
+
+        # 等待页面变化（详情标签页由 driver.get 打开，返回时已导航）
+        if not opened_in_tab and not self.wait_for_new_window_or_navigation(known_handles, original_url):
+            log.warning("⚠ 等待超时，继续尝试...")
+        return True
+    
+    def page_status(self) -> Tuple[Optional[int], Dict]:
+        """当前页面文档的HTTP状态码和头部（浏览器网络日志中没有记录时为 (None, {})）"""
+        responses = self._network_responses()
+        record = responses.status(self.driver.current_url) if responses else None
+        if not record:
+            return None, {}
+        return record['status'], record['headers']
+    
+    def return_to_roster(self, original_window: str, original_url: str):
+        """回到学生列表：关闭弹出窗口并切回列表标签页"""
+        tabs = self.tabs
+        if not tabs:
+            self.close_extra_windows(original_window)
+            return
+        with self.timer.stage('return_to_roster'):
+            tabs.release()
+            # JavaScript链接在列表标签页内跳转时，重新打开列表页
+            if self.driver.current_url != original_url:
+                self.driver.get(original_url)
+                self.wait_for_page_load()
+    
+    def preload_details(self, upcoming: List[Dict[str, str]], resolved_urls: Dict[str, Optional[str]]):
+        """有多个详情标签页时，在空闲标签页中提前加载接下来需要打开浏览器的学生"""
+        tabs = self.tabs
+        if not tabs or tabs.size < 2:
+            return
+        urls = []
+        base_url = self.driver.current_url
+        for student in upcoming:
+            if len(urls) >= tabs.size:
+                break
+            if student['url'].startswith('javascript:') or resolved_urls.get(student['url']):
+                continue
+            entry = (self.journal.get_student(student) if self.journal else None) or {}
+            if entry.get('state') == StudentState.DOWNLOADED or entry.get('photo_url'):
+                continue
+            if self.infer_photo_urls([student]):
+                continue
+            urls.append(urllib.parse.urljoin(base_url, student['url']))
+        for url in urls:
+            tabs.preload(url)
+    
     def has_next_page(self) -> bool:
         """检查是否有下一页"""
-        selectors = [
-            "a.next:not(.disabled)",
-            ".pagination .next:not(.disabled)",
-            "a[rel='next']:not(.disabled)",
-            ".page-next:not(.disabled)",
-            "a:contains('下一页'):not(.disabled)",
-        ]
-        
-        for selector in selectors:
-            try:
-                next_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
-                if next_btn.is_enabled() and next_btn.is_displayed():
-                    next_btn.click()
-                    time.sleep(2)
-                    return True
-            except:
+        with self.timer.stage('next_page') as event:
+            for selector in self.NEXT_BUTTON_SELECTORS:
+                try:
+                    next_btn = self.driver.find_element(By.CSS_SELECTOR, selector)
+                    if next_btn.is_enabled() and next_btn.is_displayed():
+                        with self.limiter.request(self.driver.current_url):
+                            next_btn.click()
+                            # 旧页面的按钮失效说明新页面已替换，再等待新页面加载
+                            self.waiter.wait_for_staleness(next_btn)
+                            self.wait_for_page_load()
+                        return True
+                except:
+                    continue
+            
+            event['ok'] = False
+            return False
+    
+    def queue_photo(self, student: Dict[str, str], photo_url: str, referer: str,
+                    captured: Optional[CapturedResponse] = None):
+        """把已知照片地址（以及浏览器已取到的内容）交给下载池"""
+        if self.journal:
+            self.journal.record_student(student, StudentState.RESOLVED, photo_url=photo_url, referer=referer)
+        self.download_pool.submit(DownloadJob(
+            name=student['name'],
+            photo_url=photo_url,
+            referer=referer,
+            cookies=self.get_browser_cookies(),
+            student=student,
+            captured=captured,
+        ))
+    
+    def infer_photo_urls(self, students: List[Dict[str, str]]) -> Dict[str, str]:
+        """照片地址模板已确认时，直接由学生链接生成照片地址"""
+        if not self.url_inference or not self.url_inference.confirmed:
+            return {}
+        inferred = {}
+        for student in students:
+            photo_url = self.url_inference.predict(student['url'])
+            if photo_url:
+                inferred[student['url']] = photo_url
+        return inferred
+    
+    def prefetch_photo_urls(self, students: List[Dict[str, str]]) -> Dict[str, Optional[str]]:
+        """HTTP快速通道：并行请求本页所有详情页，解析照片地址"""
+        if not self.http_fast_path:
+            return {}
+        if self.http_fetcher is None:
+            user_agent = self.driver.execute_script("return navigator.userAgent")
+            self.http_fetcher = HttpDetailFetcher(self.get_browser_cookies(), user_agent=user_agent,
+                                                  workers=Config.DOWNLOAD_SETTINGS['workers'],
+                                                  limiter=self.limiter)
+        else:
+            # 会话cookies可能在浏览过程中刷新
+            self.http_fetcher.session.cookies.update(self.get_browser_cookies())
+        
+        self.http_fetcher.selectors = self.ordered_selectors('photo', Config.STUDENT_PHOTO_SELECTORS)
+        results = self.http_fetcher.fetch_many(students, referer=self.driver.current_url)
+        found = sum(1 for url in results.values() if url)
+        log.info(f"⚡ HTTP快速通道: {found}/{len(students)} 个学生直接解析到照片")
+        return results
+    
+    def skip_to_page(self, target_page: int) -> int:
+        """断点续抓时直接跳到目标页，返回实际到达的页码"""
+        if target_page <= 1:
+            return 1
+        
+        # 分页地址各不相同时直接打开目标页
+        target_url = self.journal.page_url(target_page)
+        if target_url and target_url != self.journal.page_url(1):
+            log.info(f"⏩ 直接打开第 {target_page} 页: {target_url}")
+            self.driver.get(target_url)
+            self.wait_for_page_load()
+            return target_page
+        
+        # 否则只翻页，不处理学生
+        page_num = 1
+        while page_num < target_page:
+            if not self.has_next_page():
+                break
+            page_num += 1
+        log.info(f"⏩ 已跳到第 {page_num} 页")
+        return page_num
+    
+    def resume_student(self, student: Dict[str, str]) -> Optional[bool]:
+        """根据日志处理已知学生，返回None表示需要正常处理"""
+        entry = self.journal.get_student(student) if self.journal else None
+        if not entry:
+            if self.journal:
+                self.journal.record_student(student, StudentState.DISCOVERED)
+            return None
+        
+        if entry.get('state') == StudentState.DOWNLOADED:
+            log.debug(f"⏭ 已完成，跳过: {student['name']}")
+            return True
+        
+        # 照片地址已知但未下载完，无需再打开详情页
+        if self.resume and entry.get('state') == StudentState.RESOLVED and entry.get('photo_url'):
+            log.debug(f"⏭ 使用日志中的照片地址: {student['name']}")
+            self.queue_photo(student, entry['photo_url'], entry.get('referer') or self.driver.current_url)
+            return True
+        
+        return None
+    
+    def process_students(self, students: List[Dict[str, str]], totals: Dict[str, int], label: str) -> int:
+        """依次处理一批学生（一页或预取的全部名单），返回找到照片的学生数；totals 为累计计数"""
+        # HTTP快速通道：先批量解析照片地址，只有失败的学生才打开浏览器
+        pending = [s for s in students if not (self.journal.get_student(s) or {}).get('photo_url')]
+        inferred_photo_urls = self.infer_photo_urls(pending)
+        if inferred_photo_urls:
+            log.info(f"🧩 按模板生成 {len(inferred_photo_urls)} 个照片地址，跳过详情页")
+        http_photo_urls = self.prefetch_photo_urls(
+            [s for s in pending if s['url'] not in inferred_photo_urls])
+        
+        # 处理每个学生
+        downloaded = 0
+        for i, student in enumerate(students, 1):
+            log.debug(f"\n📋 正在处理第 {i}/{len(students)} 个学生: {student['name']}")
+            
+            resumed = self.resume_student(student)
+            if resumed is not None:
+                totals['processed'] += 1
+                if resumed:
+                    totals['downloaded'] += 1
+                    downloaded += 1
+                continue
+            
+            inferred_photo_url = (inferred_photo_urls.get(student['url'])
+                                  or self.infer_photo_urls([student]).get(student['url']))
+            if inferred_photo_url:
+                log.debug(f"🧩 按模板生成照片地址: {student['name']} -> {inferred_photo_url}")
+                self.url_inference.record_used()
+                self.queue_photo(student, inferred_photo_url, student['url'])
+                totals['processed'] += 1
+                totals['downloaded'] += 1
+                downloaded += 1
+                continue
+            
+            http_photo_url = http_photo_urls.get(student['url'])
+            if http_photo_url:
+                log.debug(f"⚡ HTTP直接获取照片: {student['name']} -> {http_photo_url}")
+                if self.url_inference:
+                    self.url_inference.observe(student['url'], http_photo_url)
+                self.queue_photo(student, http_photo_url, student['url'])
+                totals['processed'] += 1
+                totals['downloaded'] += 1
+                downloaded += 1
+                continue
+            
+            if self.browser_pool:
+                self.browser_pool.submit(student)
                 continue
+            
+            # 当前学生和后面几个学生的详情页先在空闲标签页中开始加载
+            self.preload_details(students[i - 1:], {**inferred_photo_urls, **http_photo_urls})
+            
+            success = self.process_student(student)
+            if success:
+                totals['downloaded'] += 1
+                downloaded += 1
+                log.debug(f"✅ 进度: {i}/{len(students)} 完成 (已找到照片)")
+            else:
+                log.debug(f"⚠ 进度: {i}/{len(students)} 跳过 (无照片)")
+            
+            totals['processed'] += 1
+            
+            # 显示总体进度
+            progress = (i / len(students)) * 100
+            log.info(f"📊 {label}进度: {progress:.1f}% ({downloaded}/{len(students)} {label}, {totals['downloaded']}/{totals['processed']} 总计)")
         
-        return False
+        # 列表页还在当前页时重试本批失败的学生（请求间隔由限速器控制，不再固定等待）
+        if not self.browser_pool:
+            downloaded += self.retry_deferred(totals)
+        return downloaded
+    
+    def print_timing_report(self):
+        """各阶段耗时汇总（单位：秒）和最慢的学生，以及各主机最终的限速状态"""
+        lines = self.timer.report()
+        if lines:
+            print(f"\n⏱ 各阶段耗时 (秒，明细见 {self.timer.path}):")
+            for line in lines:
+                print(f"   {line}")
+        limits = self.limiter.report()
+        if limits:
+            print("\n🚦 请求限速:")
+            for line in limits:
+                print(f"   {line}")
+        if self.retry_queue.given_up:
+            print(f"   重试后仍失败: {self.retry_queue.given_up} 个")
+    
+    def resume_session(self) -> bool:
+        """使用保留的浏览器配置时打开上次的学生列表页；能读到学生说明登录状态仍有效"""
+        if not self.profile_dir:
+            return False
+        start_url = load_profile_state(self.profile_dir).get('start_url')
+        if not start_url:
+            return False
+        with self.timer.stage('session_check') as event:
+            try:
+                self.driver.get(start_url)
+                self.wait_for_page_load()
+                selectors = self.ordered_selectors('student_list', self.STUDENT_LINK_SELECTORS)
+                roster = self.driver.execute_script(EXTRACT_ROSTER_JS, selectors, 2) or {}
+                event['ok'] = bool(roster.get('students'))
+            except WebDriverException as e:
+                log.debug(f"⚠ 无法打开上次的学生列表页: {e}")
+                event['ok'] = False
+        if event['ok']:
+            log.info(f"✓ 登录状态仍然有效，直接从上次的学生列表开始: {start_url}")
+        else:
+            log.info("⚠ 上次的登录状态已失效，请在浏览器中重新登录")
+        return event['ok']
     
     def scrape_all_photos(self):
         """抓取所有照片"""
+        launched = time.perf_counter()
+        # 各阶段耗时（包括启动阶段）写入事件文件，结束时汇总
+        self.timer = StageTimer(os.path.join(self.download_dir, Config.FILE_SETTINGS['timings_file']))
         if not self.setup_driver():
+            self.timer.close()
             return
         
         try:
-            print("\n=== 学生照片抓取工具 ===")
-            print("🚀 使用说明：")
-            print("1. 脚本会自动下载匹配的ChromeDriver")
-            print("2. 浏览器打开后，请：")
-            print("   - 输入教务处网址")
-            print("   - 登录系统")
-            print("   - 导航到学生列表页面")
-            print("3. 完成后返回终端确认是否开始")
-            print()
-            
-            # 打开空白页面
-            self.driver.get("about:blank")
-            
-            # 等待用户确认
-            while True:
-                ready = input("🎯 确认是否开始抓取？ (y/n): ").strip().lower()
-                if ready in ['y', 'yes', '是']:
-                    break
-                elif ready in ['n', 'no', '否']:
-                    print("已取消操作")
-                    return
-                else:
-                    print("请输入 y 或 n")
+            # 保留的浏览器配置中登录仍有效时无需操作员确认
+            resumed_session = self.resume_session()
+            if not resumed_session:
+                print("\n=== 学生照片抓取工具 ===")
+                print("🚀 使用说明：")
+                print("1. 脚本会自动下载匹配的ChromeDriver")
+                print("2. 浏览器打开后，请：")
+                print("   - 输入教务处网址")
+                print("   - 登录系统")
+                print("   - 导航到学生列表页面")
+                print("3. 完成后返回终端确认是否开始")
+                print()
+                
+                # 打开空白页面（登录失效时停留在系统返回的登录页）
+                if not self.driver.current_url.startswith('http'):
+                    self.driver.get("about:blank")
+                
+                # 等待用户确认
+                while True:
+                    ready = input("🎯 确认是否开始抓取？ (y/n): ").strip().lower()
+                    if ready in ['y', 'yes', '是']:
+                        break
+                    elif ready in ['n', 'no', '否']:
+                        print("已取消操作")
+                        return
+                    else:
+                        print("请输入 y 或 n")
             
-            total_processed = 0
-            total_downloaded = 0
+            # 记下学生列表地址，下次启动时用于检查登录状态
+            if self.profile_dir:
+                save_profile_state(self.profile_dir, start_url=self.driver.current_url)
+            startup = time.perf_counter() - launched
+            self.timer.record('startup', startup, time.time() - startup, {'interactive': not resumed_session})
+            log.info(f"⏱ 启动到开始抓取用时 {startup:.1f} 秒"
+                     + ("" if resumed_session else "（含操作员登录）"))
+            
+            # 操作员登录完成后，主浏览器也只加载详情页需要的资源
+            if self.lean:
+                block_resources(self.driver)
+            
+            totals = {'processed': 0, 'downloaded': 0}
             page_num = 1
             
-            while True:
-                print(f"\n📄 处理第 {page_num} 页...")
+            # 读取选择器命中统计
+            stats_path = os.path.join(self.download_dir, Config.FILE_SETTINGS['selector_stats_file'])
+            self.selector_stats = SelectorStats(stats_path)
+            
+            # 打开抓取日志
+            journal_path = os.path.join(self.download_dir, Config.FILE_SETTINGS['journal_file'])
+            self.journal = ScrapeJournal(journal_path, resume=self.resume)
+            
+            # 启动并发下载池
+            self.download_pool = PhotoDownloadPool(self.download_photo_job, on_done=self.on_download_done).start()
+            
+            # 预取模式先读完全部分页的名单（已完成的学生由日志跳过，无需跳页）
+            roster = None
+            if self.pipeline:
+                with self.timer.stage('roster_prefetch') as event:
+                    roster = RosterPrefetcher(self).collect()
+                    event.update(ok=roster is not None, pages=len(roster or []))
+            if self.resume and roster is None:
+                page_num = self.skip_to_page(self.journal.last_completed_page() + 1)
+            
+            # 启动多浏览器工作池，主浏览器只负责翻页和读取学生列表
+            if self.browsers > 1:
+                self.browser_pool = BrowserWorkerPool(self, self.browsers).start(
+                    self.driver.get_cookies(), self.driver.current_url)
+                if self.browser_pool.alive == 0:
+                    log.warning("⚠ 没有可用的工作浏览器，改为单浏览器处理")
+                    self.browser_pool.close()
+                    self.browser_pool = None
+            
+            # 使用工作池时，页面要等池中学生全部处理完才算完成
+            deferred_pages = []
+            
+            if roster is not None:
+                students = []
+                for roster_page, roster_url, page_students in roster:
+                    self.journal.record_page(roster_page, roster_url)
+                    students.extend(page_students)
+                if students:
+                    log.info(f"\n📚 已读取 {len(roster)} 页共 {len(students)} 个学生，开始连续处理")
+                    self.process_students(students, totals, "全部")
+                    for roster_page, roster_url, _ in roster:
+                        if self.browser_pool:
+                            deferred_pages.append((roster_page, roster_url))
+                        else:
+                            self.journal.record_page(roster_page, roster_url, done=True)
+                else:
+                    log.warning("⚠ 未找到学生，请确认已在正确页面")
+            
+            while roster is None:
+                log.info(f"\n📄 处理第 {page_num} 页...")
+                page_url = self.driver.current_url
+                self.journal.record_page(page_num, page_url)
                 
                 # 获取当前页面学生
                 students = self.get_students_from_page()
                 if not students:
                     if page_num == 1:
-                        print("⚠ 未找到学生，请确认已在正确页面")
+                        log.warning("⚠ 未找到学生，请确认已在正确页面")
                         break
                     else:
-                        print("✓ 所有页面处理完成")
+                        log.info("✓ 所有页面处理完成")
                         break
                 
-                print(f"📊 本页共找到 {len(students)} 个学生")
+                log.info(f"📊 本页共找到 {len(students)} 个学生")
                 
-                # 处理每个学生
-                page_downloaded = 0
-                for i, student in enumerate(students, 1):
-                    print(f"\n📋 正在处理第 {i}/{len(students)} 个学生: {student['name']}")
-                    
-                    success = self.process_student(student)
-                    if success:
-                        total_downloaded += 1
-                        page_downloaded += 1
-                        print(f"✅ 进度: {i}/{len(students)} 完成 (已下载)")
-                    else:
-                        print(f"⚠ 进度: {i}/{len(students)} 跳过 (无照片)")
-                    
-                    total_processed += 1
-                    
-                    # 显示总体进度
-                    progress = (i / len(students)) * 100
-                    print(f"📊 本页进度: {progress:.1f}% ({page_downloaded}/{len(students)} 本页, {total_downloaded}/{total_processed} 总计)")
-                    
-                    # 避免请求过快
-                    time.sleep(1.5)
+                page_downloaded = self.process_students(students, totals, "本页")
                 
-                print(f"\n✅ 第 {page_num} 页处理完成！")
-                print(f"   本页学生: {len(students)} 个")
-                print(f"   本页下载: {page_downloaded} 张照片")
-                print(f"   总计下载: {total_downloaded}/{total_processed}")
+                if self.browser_pool:
+                    deferred_pages.append((page_num, page_url))
+                    log.info(f"\n📤 第 {page_num} 页学生已交给浏览器工作池 (等待中: {self.browser_pool.queue.qsize()})")
+                else:
+                    self.journal.record_page(page_num, page_url, done=True)
+                log.info(f"\n✅ 第 {page_num} 页处理完成！")
+                log.info(f"   本页学生: {len(students)} 个")
+                log.info(f"   本页下载: {page_downloaded} 张照片")
+                log.info(f"   总计下载: {totals['downloaded']}/{totals['processed']}")
+                
+                self.selector_stats.save()
+                self.photo_store.save()
+                self.fetch_index.save()
                 
                 # 检查下一页
                 if not self.has_next_page():
-                    print("✓ 已到达最后一页")
+                    log.info("✓ 已到达最后一页")
                     break
                 
                 page_num += 1
-                print(f"\n🔄 准备处理第 {page_num} 页...")
+                log.info(f"\n🔄 准备处理第 {page_num} 页...")
+            
+            # 等待工作浏览器处理完剩余学生
+            if self.browser_pool:
+                log.info(f"\n⏳ 等待浏览器工作池处理剩余学生...")
+                leftover = self.browser_pool.close()
+                totals['processed'] += self.browser_pool.processed
+                totals['downloaded'] += self.browser_pool.found
+                for student in leftover:
+                    totals['processed'] += 1
+                    if self.process_student(student):
+                        totals['downloaded'] += 1
+                self.retry_deferred(totals)
+                for done_page, done_url in deferred_pages:
+                    self.journal.record_page(done_page, done_url, done=True)
+            
+            # 等待队列中剩余的照片下载完成
+            log.info(f"\n⏳ 等待剩余 {self.download_pool.pending()} 个下载任务完成...")
+            self.download_pool.close()
             
             print(f"\n🎉 任务完成！")
-            print(f"📊 总计处理: {total_processed} 个学生")
-            print(f"📥 成功下载: {total_downloaded} 张照片")
+            print(f"📊 总计处理: {totals['processed']} 个学生")
+            print(f"🔍 找到照片: {totals['downloaded']} 个学生")
+            print(f"📥 成功下载: {self.download_pool.downloaded} 张照片")
+            if self.url_inference and self.url_inference.predicted:
+                print(f"🧩 按模板生成照片地址: {self.url_inference.predicted} 个学生")
+            if self.http_fetcher and (self.http_fetcher.hits or self.http_fetcher.misses):
+                print(f"⚡ HTTP快速通道: {self.http_fetcher.hits} 个学生直接解析到照片，"
+                      f"{self.http_fetcher.misses} 个回退到浏览器")
             print(f"📁 保存目录: {self.download_dir}")
+            self.print_timing_report()
             
         except KeyboardInterrupt:
-            print("\n⏹️ 用户中断操作")
+            log.warning("\n⏹️ 用户中断操作")
         except Exception as e:
-            print(f"❌ 运行错误: {e}")
+            log.error(f"❌ 运行错误: {e}")
         finally:
+            if self.browser_pool:
+                self.browser_pool.close(cancel=True)
+                self.browser_pool = None
+            if self.download_pool:
+                self.download_pool.close()
+                self.download_pool = None
+            if self.journal:
+                self.journal.close()
+            self.timer.close()
+            if self.selector_stats:
+                self.selector_stats.save()
+            self.photo_store.save()
+            self.fetch_index.save()
+            if self.http_fetcher:
+                self.http_fetcher.close()
+                self.http_fetcher = None
             if self.driver:
                 self.driver.quit()
-                print("✓ 浏览器已关闭")
+                log.info("✓ 浏览器已关闭")
 
 def main():
-    scraper = EnhancedStudentPhotoScraper()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="学生照片抓取工具")
+    parser.add_argument("--dir", default="student_photos", help="照片保存目录")
+    parser.add_argument("--resume", action="store_true", help="根据抓取日志从上次中断处继续（不加则重新开始记录）")
+    parser.add_argument("--http", action="store_true", help="登录后直接用HTTP请求详情页，失败时再用浏览器")
+    parser.add_argument("--browsers", type=int, default=Config.BROWSER_SETTINGS['workers'],
+                        help="并行处理详情页的无头浏览器数量")
+    parser.add_argument("--refresh", action="store_true",
+                        help="重新检查已下载的照片（条件请求，未变化的照片不会重新下载）")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="先读取全部分页的学生名单，再连续处理所有学生（不在每页之间停顿）")
+    parser.add_argument("--no-infer", action="store_true",
+                        help="不推断照片地址模板（每个学生都打开详情页）")
+    
+    parser.add_argument("--no-capture", action="store_true",
+                        help="不从浏览器读取照片内容（每张照片都用HTTP重新下载）")
+    parser.add_argument("--no-lean", action="store_true",
+                        help="详情页加载全部资源（不屏蔽样式表、字体、统计脚本等，等待页面完全加载）")
+    parser.add_argument("--no-rate-limit", action="store_true",
+                        help="不自适应限速（不等待令牌、不遵守 Retry-After；失败的学生仍会重试）")
+    parser.add_argument("--chromedriver", default=Config.DRIVER_SETTINGS['chromedriver_path'],
+                        help="指定chromedriver路径（不再联网解析驱动版本）")
+    parser.add_argument("--profile", default=Config.DRIVER_SETTINGS['profile_dir'],
+                        help="保留浏览器配置的目录（登录状态跨运行保存；登录仍有效时无需确认直接开始）")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="终端输出级别（DEBUG 显示每个学生的详细步骤；各阶段耗时始终写入 .timings.jsonl）")
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(message)s")
+    # 第三方库的连接细节不输出
+    for noisy in ("urllib3", "selenium", "WDM"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+    
+    scraper = EnhancedStudentPhotoScraper(args.dir, resume=args.resume, http_fast_path=args.http,
+                                          browsers=args.browsers, refresh=args.refresh,
+                                          infer_urls=False if args.no_infer else None,
+                                          pipeline=args.pipeline,
+                                          capture_responses=False if args.no_capture else None,
+                                          lean=False if args.no_lean else None,
+                                          rate_limit=False if args.no_rate_limit else None,
+                                          chromedriver=args.chromedriver, profile_dir=args.profile)
     scraper.scrape_all_photos()
 
 if __name__ == "__main__":
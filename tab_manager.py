@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+详情标签页管理 - 学生列表固定在一个标签页中，详情页在一个或多个长期复用的标签页中打开，
+列表页的DOM不会因为跳转而重建，也不必为每个学生创建、切换、关闭弹出窗口
+
+有多个详情标签页时，可以在空闲标签页中提前开始加载后面学生的详情页（不等待加载完成），
+处理到该学生时直接切换过去。
+"""
+
+import logging
+from typing import Callable, Dict, List, Optional
+
+from selenium.common.exceptions import NoSuchWindowException, WebDriverException
+
+from page_scripts import PRELOAD_ARRIVED_JS, PRELOAD_JS
+
+log = logging.getLogger(__name__)
+
+
+class DetailTabManager:
+    """列表标签页 + 复用的详情标签页
+
+    open(url) 切换到详情标签页并打开地址；release() 回到列表标签页，
+    并关闭页面脚本弹出的其他窗口。on_new_tab(driver) 在每个新建的详情标签页中调用一次
+    （如屏蔽无关资源，DevTools 设置只作用于当前标签页）。
+    """
+
+    def __init__(self, driver, tabs: int = 1, on_new_tab: Optional[Callable] = None):
+        self.driver = driver
+        self.size = max(1, tabs)
+        self.on_new_tab = on_new_tab
+        self.roster: Optional[str] = None
+        self.tabs: List[str] = []
+        # 标签页 -> 已在其中开始加载、尚未使用的地址
+        self.preloaded: Dict[str, str] = {}
+        self.current: Optional[str] = None
+        self.preload_hits = 0
+
+    def attach(self, roster_handle: Optional[str] = None):
+        """记住列表标签页（默认为当前窗口）；只在第一次调用时生效"""
+        if self.roster is None:
+            self.roster = roster_handle or self.driver.current_window_handle
+
+    def _create_tab(self) -> str:
+        """新建详情标签页（创建后停留在新标签页）"""
+        self.driver.switch_to.new_window('tab')
+        handle = self.driver.current_window_handle
+        if self.on_new_tab:
+            self.on_new_tab(self.driver)
+        self.tabs.append(handle)
+        log.debug(f"🗂 新建详情标签页 ({len(self.tabs)}/{self.size})")
+        return handle
+
+    def _free_tab(self) -> Optional[str]:
+        """没有预加载内容的标签页；不足时新建；全部占用时返回None"""
+        for handle in self.tabs:
+            if handle not in self.preloaded:
+                return handle
+        if len(self.tabs) < self.size:
+            return self._create_tab()
+        return None
+
+    def _discard(self, handle: str):
+        """标签页已被页面关闭"""
+        if handle in self.tabs:
+            self.tabs.remove(handle)
+        self.preloaded.pop(handle, None)
+
+    def open(self, url: str, waiter=None) -> str:
+        """在详情标签页中打开 url，返回标签页句柄
+
+        url 已在某个标签页中预加载时直接切换过去，并等待新页面替换旧文档（需要 waiter）。
+        """
+        self.attach()
+        for handle, preloaded_url in list(self.preloaded.items()):
+            if preloaded_url != url:
+                continue
+            del self.preloaded[handle]
+            try:
+                self.driver.switch_to.window(handle)
+            except NoSuchWindowException:
+                self._discard(handle)
+                break
+            if waiter is not None:
+                waiter.until('navigation', lambda driver: driver.execute_script(PRELOAD_ARRIVED_JS))
+            self.current = handle
+            self.preload_hits += 1
+            return handle
+
+        for attempt in range(2):
+            handle = self._free_tab() or self.tabs[0]
+            self.preloaded.pop(handle, None)
+            try:
+                self.driver.switch_to.window(handle)
+                self.driver.get(url)
+            except NoSuchWindowException:
+                self._discard(handle)
+                if attempt:
+                    raise
+                continue
+            self.current = handle
+            return handle
+
+    def preload(self, url: str) -> bool:
+        """在空闲标签页中开始加载 url（不等待），之后 open(url) 直接使用；没有空闲标签页时返回False"""
+        if self.size < 2 or url in self.preloaded.values():
+            return False
+        self.attach()
+        previous = self.driver.current_window_handle
+        try:
+            handle = next((h for h in self.tabs if h not in self.preloaded and h != self.current), None)
+            if handle is None and len(self.tabs) < self.size:
+                handle = self._create_tab()
+            if handle is None:
+                return False
+            self.driver.switch_to.window(handle)
+            self.driver.execute_script(PRELOAD_JS, url)
+            self.preloaded[handle] = url
+            return True
+        except WebDriverException as e:
+            log.debug(f"⚠ 预加载详情页失败 {url}: {e}")
+            return False
+        finally:
+            try:
+                self.driver.switch_to.window(previous)
+            except WebDriverException:
+                pass
+
+    def release(self):
+        """回到列表标签页，关闭不属于本管理器的窗口（页面脚本弹出的窗口）"""
+        self.attach()
+        self.current = None
+        keep = set(self.tabs) | {self.roster}
+        for handle in self.driver.window_handles:
+            if handle not in keep:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+        self.driver.switch_to.window(self.roster)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缩略图磁盘缓存 - 按 (照片路径, 修改时间, 文件大小, 目标尺寸) 保存缩放好的JPEG，
+同一张照片在同一尺寸下只解码缩放一次；不依赖Tkinter，查看器和抽认卡服务都可使用
+"""
+
+import os
+import hashlib
+import tempfile
+import logging
+import threading
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+class ThumbnailCache:
+    """cache_dir/ab/abcdef....jpg，键包含源文件的 mtime 和大小，照片被替换后自动失效"""
+
+    def __init__(self, cache_dir: str, quality: Optional[int] = None):
+        self.cache_dir = cache_dir
+        self.quality = quality or Config.VIEWER_SETTINGS['thumbnail_quality']
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def bucket(size: Tuple[int, int]) -> Tuple[int, int]:
+        """目标尺寸按步长向下取整，窗口微调大小时仍能命中缓存"""
+        step = Config.VIEWER_SETTINGS['size_step']
+        return tuple(max(step, dimension // step * step) for dimension in size)
+
+    def cache_path(self, path: str, size: Tuple[int, int]) -> Optional[str]:
+        """缓存文件路径；源文件不存在时返回None"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}|{stat.st_mtime_ns}|{stat.st_size}|{size[0]}x{size[1]}"
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + '.jpg')
+
+    def _render(self, path: str, size: Tuple[int, int]) -> Image.Image:
+        with Image.open(path) as image:
+            if image.format == 'JPEG':
+                image.draft('RGB', size)
+            image.load()
+            if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+                rgba = image.convert('RGBA')
+                result = Image.new('RGB', rgba.size, (255, 255, 255))
+                result.paste(rgba, mask=rgba.getchannel('A'))
+            else:
+                result = image.convert('RGB')
+        result.thumbnail(size, Image.Resampling.LANCZOS)
+        return result
+
+    def _store(self, image: Image.Image, cache_path: str):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                image.save(f, 'JPEG', quality=self.quality)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_image(self, path: str, size: Tuple[int, int]) -> Image.Image:
+        """返回缩放到 size 以内的图片（已加载到内存）"""
+        cache_path = self.cache_path(path, size)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with Image.open(cache_path) as cached:
+                    cached.load()
+                    self._count(True)
+                    return cached.copy()
+            except OSError:
+                pass  # 缓存文件损坏，重新生成
+        self._count(False)
+        image = self._render(path, size)
+        if cache_path:
+            try:
+                self._store(image, cache_path)
+            except OSError as e:
+                log.warning(f"⚠ 写入缩略图缓存失败: {e}")
+        return image
+
+    def get_path(self, path: str, size: Tuple[int, int]) -> Optional[str]:
+        """确保缩略图已生成并返回缓存文件路径（供直接发送文件的场景使用）"""
+        cache_path = self.cache_path(path, size)
+        if cache_path is None:
+            return None
+        if os.path.exists(cache_path):
+            self._count(True)
+            return cache_path
+        self._count(False)
+        self._store(self._render(path, size), cache_path)
+        return cache_path
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+照片地址推断 - 从已处理学生的 (详情页地址, 照片地址) 中学习模板，
+例如 .../detail?xh=2021001 -> .../photo?xh=2021001，验证通过后直接由列表页链接生成照片地址
+"""
+
+import logging
+import os
+import threading
+from typing import Dict, Optional, Set
+from urllib.parse import parse_qsl, urlparse
+
+from config import Config
+
+log = logging.getLogger(__name__)
+
+
+class PhotoUrlInference:
+    """状态: learning（收集样本）-> verifying（用新学生核对）-> confirmed（直接生成）
+
+    核对失败时丢弃模板重新学习，失败次数过多则停用（disabled）。
+    """
+
+    LEARNING = 'learning'
+    VERIFYING = 'verifying'
+    CONFIRMED = 'confirmed'
+    DISABLED = 'disabled'
+
+    def __init__(self, learn_samples: Optional[int] = None, verify_samples: Optional[int] = None):
+        settings = Config.INFERENCE_SETTINGS
+        self.learn_samples = learn_samples or settings['learn_samples']
+        self.verify_samples = verify_samples or settings['verify_samples']
+        self.min_token_length = settings['min_token_length']
+        self.max_failures = settings['max_failures']
+
+        self.state = self.LEARNING
+        self.template: Optional[str] = None
+        self.predicted = 0
+        self._candidates: Optional[Set[str]] = None
+        self._sample_photos: Set[str] = set()
+        self._samples = 0
+        self._verified = 0
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    def _tokens(self, url: str) -> Dict[str, str]:
+        """学生地址中可能是学号的片段：查询参数值、路径段、去掉扩展名的路径段"""
+        parsed = urlparse(url)
+        tokens = {}
+        for key, value in parse_qsl(parsed.query):
+            tokens[f"query:{key}"] = value
+        segments = [segment for segment in parsed.path.split('/') if segment]
+        for i, segment in enumerate(segments):
+            tokens[f"path:{i}"] = segment
+            tokens[f"stem:{i}"] = os.path.splitext(segment)[0]
+        return {key: value for key, value in tokens.items() if len(value) >= self.min_token_length}
+
+    def _templates(self, student_url: str, photo_url: str) -> Set[str]:
+        """把照片地址中出现的学生地址片段替换为占位符"""
+        templates = set()
+        for key, value in self._tokens(student_url).items():
+            if value in photo_url:
+                templates.add(photo_url.replace(value, '{{' + key + '}}'))
+        return templates
+
+    def _render(self, template: str, student_url: str) -> Optional[str]:
+        tokens = self._tokens(student_url)
+        result = template
+        while '{{' in result:
+            start = result.index('{{')
+            end = result.index('}}', start)
+            key = result[start + 2:end]
+            if key not in tokens:
+                return None
+            result = result[:start] + tokens[key] + result[end + 2:]
+        return result
+
+    def _restart(self, reason: str):
+        self._failures += 1
+        self.template = None
+        self._candidates = None
+        self._sample_photos = set()
+        self._samples = 0
+        self._verified = 0
+        if self._failures >= self.max_failures:
+            self.state = self.DISABLED
+            log.warning(f"⚠ 照片地址推断已停用: {reason}")
+        else:
+            self.state = self.LEARNING
+            log.warning(f"⚠ 照片地址模板无效，重新学习: {reason}")
+
+    def observe(self, student_url: str, photo_url: str):
+        """记录一个正常处理得到的照片地址"""
+        if not student_url.startswith('http'):
+            return
+        with self._lock:
+            if self.state == self.LEARNING:
+                templates = self._templates(student_url, photo_url)
+                self._candidates = templates if self._candidates is None else self._candidates & templates
+                self._sample_photos.add(photo_url)
+                self._samples += 1
+                if not self._candidates:
+                    self._restart("照片地址与学生链接无关")
+                elif self._samples >= self.learn_samples:
+                    if len(self._sample_photos) < 2:
+                        self._restart("样本照片地址全部相同（可能是占位图）")
+                        return
+                    self.template = sorted(self._candidates)[0]
+                    self.state = self.VERIFYING
+                    log.info(f"🧩 学到照片地址模板: {self.template}，开始核对")
+
+            elif self.state == self.VERIFYING:
+                if self._render(self.template, student_url) == photo_url:
+                    self._verified += 1
+                    if self._verified >= self.verify_samples:
+                        self.state = self.CONFIRMED
+                        log.info(f"✅ 照片地址模板已确认，后续学生直接生成照片地址: {self.template}")
+                else:
+                    self._restart(f"核对不一致 {photo_url}")
+
+            elif self.state == self.CONFIRMED:
+                if self._render(self.template, student_url) != photo_url:
+                    self._restart(f"已确认的模板与实际不一致 {photo_url}")
+
+    def predict(self, student_url: str) -> Optional[str]:
+        """模板已确认时直接生成照片地址（只是查询，不计数；采用时调用 record_used）"""
+        with self._lock:
+            if self.state != self.CONFIRMED or not student_url.startswith('http'):
+                return None
+            return self._render(self.template, student_url)
+
+    def record_used(self):
+        """一个学生实际使用了生成的照片地址（跳过了详情页）"""
+        with self._lock:
+            self.predicted += 1
+
+    @property
+    def confirmed(self) -> bool:
+        return self.state == self.CONFIRMED
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+等待子系统 - 用显式条件代替固定的 time.sleep，超时时间根据实际观测到的页面延迟自适应调整
+"""
+
+import time
+import statistics
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from config import Config
+from page_scripts import NETWORK_IDLE_JS, PHOTO_LOADED_JS
+
+
+class AdaptiveTimeout:
+    """根据最近的观测延迟计算超时时间：p95 * factor，限制在 [minimum, maximum] 内"""
+
+    def __init__(self, initial: float, minimum: Optional[float] = None, maximum: Optional[float] = None,
+                 factor: Optional[float] = None, window: int = 50):
+        settings = Config.ADAPTIVE_WAIT
+        self.initial = initial
+        self.minimum = settings['min_timeout'] if minimum is None else minimum
+        self.maximum = settings['max_timeout'] if maximum is None else maximum
+        self.factor = settings['factor'] if factor is None else factor
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        """记录一次成功等待的耗时"""
+        self.samples.append(seconds)
+
+    @property
+    def value(self) -> float:
+        if len(self.samples) < 5:
+            return self.initial
+        p95 = statistics.quantiles(self.samples, n=20)[-1]
+        return max(self.minimum, min(self.maximum, p95 * self.factor))
+
+
+# 条件函数：与 expected_conditions 相同，接收 driver，满足时返回真值
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def dom_ready(driver):
+    """DOM已解析完成（不等待图片、样式等子资源）"""
+    return driver.execute_script("return document.readyState") != "loading"
+
+
+def new_window_or_navigation(known_handles: List[str], original_url: str):
+    """出现 known_handles 之外的新窗口（返回其句柄）或当前页面地址改变（返回True）
+
+    known_handles 为操作前已打开的全部窗口；复用的详情标签页一直开着，不能当作新窗口。
+    """
+    def condition(driver):
+        new_handles = [h for h in driver.window_handles if h not in known_handles]
+        if new_handles:
+            return new_handles[-1]
+        current_url = driver.current_url
+        if current_url != original_url and not current_url.startswith('about:'):
+            return True
+        return False
+    return condition
+
+
+def network_idle(quiet_seconds: float):
+    """页面加载完成，且最近 quiet_seconds 内没有新的资源请求结束"""
+    def condition(driver):
+        state = driver.execute_script(NETWORK_IDLE_JS)
+        return state['ready'] and state['idle_ms'] >= quiet_seconds * 1000
+    return condition
+
+
+def photo_image_loaded(selectors: List[str]):
+    """任一照片选择器命中的图片已解码完成（naturalWidth > 0）"""
+    def condition(driver):
+        return driver.execute_script(PHOTO_LOADED_JS, selectors)
+    return condition
+
+
+class PageWaiter:
+    """按场景分别维护自适应超时的等待器"""
+
+    def __init__(self, driver, page_timeout: Optional[float] = None):
+        self.driver = driver
+        self.poll = Config.WAIT_TIME['poll_interval']
+        page_timeout = page_timeout or Config.BROWSER_SETTINGS['timeout']
+        self.timeouts: Dict[str, AdaptiveTimeout] = {
+            'page_load': AdaptiveTimeout(page_timeout),
+            'dom_ready': AdaptiveTimeout(page_timeout),
+            'navigation': AdaptiveTimeout(8),
+            'new_window': AdaptiveTimeout(Config.WAIT_TIME['page_load']),
+            'photo_load': AdaptiveTimeout(Config.WAIT_TIME['photo_load']),
+            'network_idle': AdaptiveTimeout(Config.WAIT_TIME['page_load']),
+        }
+
+    def until(self, kind: str, condition: Callable, timeout: Optional[float] = None):
+        """等待条件成立，返回条件的值；超时返回None。成功的耗时计入该场景的统计"""
+        tracker = self.timeouts[kind]
+        start = time.time()
+        try:
+            result = WebDriverWait(self.driver, timeout or tracker.value, poll_frequency=self.poll,
+                                   ignored_exceptions=[WebDriverException]).until(condition)
+        except TimeoutException:
+            return None
+        tracker.observe(time.time() - start)
+        return result
+
+    def wait_for_document(self, timeout: Optional[float] = None) -> bool:
+        return bool(self.until('page_load', document_ready, timeout))
+
+    def wait_for_dom(self, timeout: Optional[float] = None) -> bool:
+        return bool(self.until('dom_ready', dom_ready, timeout))
+
+    def wait_for_network_idle(self, timeout: Optional[float] = None) -> bool:
+        quiet = Config.WAIT_TIME['network_idle']
+        return bool(self.until('network_idle', network_idle(quiet), timeout))
+
+    def wait_for_new_window_or_navigation(self, known_handles: List[str], original_url: str,
+                                          timeout: Optional[float] = None):
+        return self.until('navigation', new_window_or_navigation(known_handles, original_url), timeout)
+
+    def wait_for_new_window(self, known_handles: List[str], timeout: Optional[float] = None) -> Optional[str]:
+        """等待新窗口出现，返回新窗口句柄"""
+        def condition(driver):
+            new_handles = [h for h in driver.window_handles if h not in known_handles]
+            return new_handles[-1] if new_handles else False
+        return self.until('new_window', condition, timeout)
+
+    def wait_for_photo(self, selectors: List[str], timeout: Optional[float] = None) -> bool:
+        return bool(self.until('photo_load', photo_image_loaded(selectors), timeout))
+
+    def wait_for_staleness(self, element, timeout: Optional[float] = None) -> bool:
+        """等待元素从DOM中移除（翻页后旧页面元素失效）"""
+        def condition(_driver):
+            try:
+                element.is_enabled()
+                return False
+            except WebDriverException:
+                return True
+        return bool(self.until('navigation', condition, timeout))